@@ -0,0 +1,171 @@
+"""
+Headless batch runner for the Resume Co-pilot.
+
+Reads (resume, job description) pairs from a JSONL file and writes critiques and/or cover
+letters to an output JSONL file, using the same prompts, cache, rate limiter and retry
+policy as the Streamlit app:
+
+    python batch.py pairs.jsonl results.jsonl --task both --concurrency 8
+
+Each input line is a JSON object with "resume" and "job_description" keys, plus optional
+"id" (defaults to the line number) and "task" ("critique", "cover_letter" or "both").
+Every finished item is appended and flushed to the output file immediately, which doubles
+as the checkpoint: re-running the same command skips items that already succeeded.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+TASKS = ("critique", "cover_letter")
+
+
+def read_items(path, default_task):
+    """Yields (id, task, resume, job_description) lazily, one input line at a time."""
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                print(f"Skipping line {line_number}: invalid JSON ({e})", file=sys.stderr)
+                continue
+            item_id = str(record.get("id", line_number))
+            task = record.get("task", default_task)
+            for item_task in TASKS if task == "both" else (task,):
+                if item_task not in TASKS:
+                    print(f"Skipping line {line_number}: unknown task {item_task!r}", file=sys.stderr)
+                    continue
+                yield item_id, item_task, record.get("resume", ""), record.get("job_description", "")
+
+
+def load_checkpoint(path):
+    """(id, task) pairs already completed successfully in a previous run."""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # a line cut short by a crash
+            if record.get("ok"):
+                done.add((str(record["id"]), record["task"]))
+    return done
+
+
+class BatchRunner:
+    def __init__(self, output_path, concurrency):
+        import gen
+
+        self.gen = gen
+        self.output = open(output_path, "a", encoding="utf-8")
+        self.concurrency = concurrency
+        self.slots = threading.BoundedSemaphore(concurrency * 2)
+        self.lock = threading.Lock()
+        self.latencies = []
+        self.succeeded = 0
+        self.failed = 0
+
+    def process(self, item_id, task, resume, job_description):
+        started = time.perf_counter()
+        result, error = None, None
+        try:
+            if not resume or not job_description:
+                error = "Both 'resume' and 'job_description' are required."
+            else:
+                if task == "critique":
+                    prompt = self.gen.build_critique_prompt(job_description, resume)
+                else:
+                    prompt = self.gen.build_cover_letter_prompt(job_description, resume)
+                result = self.gen.get_ai_response(prompt, call_site=task)
+                if result is None:
+                    error = "Generation failed after retries."
+        except Exception as e:
+            error = str(e)
+        latency = time.perf_counter() - started
+
+        record = {"id": item_id, "task": task, "ok": error is None, "latency_ms": round(latency * 1000, 1)}
+        if error is None:
+            record["result"] = result
+        else:
+            record["error"] = error
+        with self.lock:
+            self.output.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self.output.flush()
+            os.fsync(self.output.fileno())
+            self.latencies.append(latency)
+            if error is None:
+                self.succeeded += 1
+            else:
+                self.failed += 1
+
+    def run(self, items, progress_every=50):
+        started = time.perf_counter()
+
+        def release(_):
+            self.slots.release()
+            with self.lock:
+                done = self.succeeded + self.failed
+            if progress_every and done % progress_every == 0:
+                elapsed = time.perf_counter() - started
+                print(f"{done} items, {done / elapsed:.2f} items/s", file=sys.stderr)
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="adept-batch") as pool:
+            for item in items:
+                # Bounded hand-off keeps memory flat however large the input file is.
+                self.slots.acquire()
+                pool.submit(self.process, *item).add_done_callback(release)
+        self.output.close()
+        return time.perf_counter() - started
+
+    def report(self, elapsed, skipped):
+        done = self.succeeded + self.failed
+        print(f"Processed {done} items in {elapsed:.1f}s ({done / elapsed if elapsed else 0:.2f} items/s); "
+              f"{self.succeeded} succeeded, {self.failed} failed, {skipped} skipped from checkpoint.")
+        if self.latencies:
+            ordered = sorted(self.latencies)
+            p95 = ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+            print(f"Per-item latency: mean {statistics.fmean(ordered):.2f}s, "
+                  f"p50 {statistics.median(ordered):.2f}s, p95 {p95:.2f}s, max {ordered[-1]:.2f}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="Input JSONL with resume/job_description pairs.")
+    parser.add_argument("output", help="Output JSONL; also used as the resume checkpoint.")
+    parser.add_argument("--task", choices=TASKS + ("both",), default="critique", help="Default task for lines without one.")
+    parser.add_argument("--concurrency", type=int, default=8, help="Maximum generations in flight.")
+    parser.add_argument("--fake-model", action="store_true", help="Use the offline fake model (dry runs, load tests).")
+    args = parser.parse_args(argv)
+
+    if args.fake_model:
+        import fake_model
+
+        fake_model.install()
+
+    done = load_checkpoint(args.output)
+    skipped = 0
+
+    def pending():
+        nonlocal skipped
+        for item in read_items(args.input, args.task):
+            if (item[0], item[1]) in done:
+                skipped += 1
+                continue
+            yield item
+
+    runner = BatchRunner(args.output, max(1, args.concurrency))
+    elapsed = runner.run(pending())
+    runner.report(elapsed, skipped)
+    return 1 if runner.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
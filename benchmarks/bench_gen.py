@@ -0,0 +1,359 @@
+"""
+Offline micro-benchmarks for the hot paths in gen.py.
+
+The Gemini client is replaced by fake_model.FakeGenerativeModel, so no network access or
+API key is needed. Results can be saved as a baseline and later checked against it:
+
+    python benchmarks/bench_gen.py                     # run and print
+    python benchmarks/bench_gen.py --save-baseline     # store results in baselines.json
+    python benchmarks/bench_gen.py --check             # exit 1 on a regression vs. the baseline
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GEN_PATH = os.path.join(ROOT, "gen.py")
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+sys.path.insert(0, ROOT)
+
+# The app reads these at import time; keep benchmarks hermetic and unthrottled.
+os.environ.setdefault("ADEPT_CACHE_DIR", tempfile.mkdtemp(prefix="adept-bench-"))
+os.environ.setdefault("ADEPT_METRICS_PORT", "0")
+os.environ.setdefault("ADEPT_METRICS_LOG", "")
+os.environ.setdefault("ADEPT_RATE_LIMIT_RPM", "100000000")
+os.environ.setdefault("ADEPT_RATE_LIMIT_TPM", "100000000000")
+os.environ.setdefault("ADEPT_RETRY_BASE_DELAY", "0.001")
+os.environ.setdefault("ADEPT_BREAKER_FAILURE_THRESHOLD", "1000000")
+os.environ.setdefault("ADEPT_MARKET_PULSE_WARM_INTERVAL", "0")
+
+import fake_model  # noqa: E402
+
+fake_model.install()
+
+import gen  # noqa: E402
+
+RESUME_SECTION = """
+EXPERIENCE
+Senior Data Analyst, Acme Corp (2019 - Present)
+- Built forecasting models in Python and SQL that cut inventory costs by 12%.
+- Led a team of four analysts and introduced dbt-based data quality checks.
+SKILLS
+Python, SQL, Pandas, scikit-learn, Tableau, Airflow, AWS, Communication
+PROJECTS
+Customer churn dashboard; demand forecasting pipeline; A/B testing toolkit.
+"""
+LARGE_RESUME = RESUME_SECTION * 60  # roughly a 15-page CV
+PROFILE = {
+    "resume_text": LARGE_RESUME,
+    "skills": ["Python", "SQL", "Tableau", "AWS"],
+    "interests": "Machine learning, analytics engineering",
+    "career_goal": "Data Scientist",
+}
+SAMPLE_JSON = json.dumps({
+    "market_summary": "Strong demand across sectors.",
+    "trending_skills": ["Python", "SQL", "MLOps"],
+    "salary_range": "₹12,00,000 - ₹25,00,000 per annum (India)",
+    "top_industries": ["Technology & SaaS", "Financial Services"],
+    "market_sentiment": "Growing",
+})
+# Not listed in gen.CACHE_TTLS, so every call reaches the (fake) model.
+UNCACHED_JSON_SITE = "bench_json"
+
+
+def summarize(samples, wall_time=None):
+    ordered = sorted(samples)
+
+    def pct(p):
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+    total = wall_time if wall_time is not None else sum(samples)
+    return {
+        "n": len(samples),
+        "mean_ms": statistics.fmean(samples) * 1000,
+        "p50_ms": pct(0.50) * 1000,
+        "p95_ms": pct(0.95) * 1000,
+        "p99_ms": pct(0.99) * 1000,
+        "ops_per_sec": len(samples) / total if total else float("inf"),
+    }
+
+
+def measure(fn, iterations, warmup=3):
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+
+def measure_concurrent(fn, iterations, workers=8):
+    def timed(_):
+        started = time.perf_counter()
+        fn()
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        samples = list(pool.map(timed, range(iterations)))
+    return summarize(samples, wall_time=time.perf_counter() - started)
+
+
+# --- Scenarios ---
+def bench_get_ai_response_overhead(iterations):
+    fake_model.configure()
+    return measure(lambda: gen.get_ai_response("Say hello.", call_site="interview_turn"), iterations)
+
+
+def bench_get_ai_response_cache_hit(iterations):
+    fake_model.configure()
+    prompt = gen.build_advisor_prompt(PROFILE, "summary")
+    call = lambda: gen.get_ai_response(prompt, is_json=True, call_site="advisor", response_schema=gen.ADVISOR_SECTION_SCHEMAS["summary"])  # noqa: E731
+    return measure(call, iterations)
+
+
+def bench_market_pulse_snapshot_hit(iterations):
+    fake_model.configure()
+    gen.get_market_pulse("Data Scientist")
+    return measure(lambda: gen.get_market_pulse("Data Scientist"), iterations * 10)
+
+
+def bench_get_ai_response_json(iterations):
+    fake_model.configure()
+    call = lambda: gen.get_ai_response(  # noqa: E731
+        gen.build_advisor_prompt(PROFILE, "learning_pathway"),
+        is_json=True,
+        call_site=UNCACHED_JSON_SITE,
+        response_schema=gen.ADVISOR_SECTION_SCHEMAS["learning_pathway"],
+    )
+    return measure(call, iterations)
+
+
+def bench_injected_faults(iterations):
+    """Concurrent calls with latency, 10% transient errors and 20% malformed JSON."""
+    fake_model.configure(latency=0.02, latency_jitter=0.03, error_rate=0.1, malformed_json_rate=0.2, seed=7)
+    call = lambda: gen.get_ai_response(  # noqa: E731
+        gen.build_advisor_prompt(PROFILE, "summary"),
+        is_json=True,
+        call_site=UNCACHED_JSON_SITE,
+        response_schema=gen.ADVISOR_SECTION_SCHEMAS["summary"],
+    )
+    result = measure_concurrent(call, iterations)
+    fake_model.configure()
+    return result
+
+
+def bench_cascade_escalations(iterations):
+    """Light-first route with 30% malformed JSON: escalations to the standard tier cost an extra call."""
+    fake_model.configure(latency=0.01, malformed_json_rate=0.3, seed=11)
+    call = lambda: gen.get_ai_response(  # noqa: E731
+        gen.build_market_pulse_prompt("Data Scientist"),
+        is_json=True,
+        call_site="market_pulse",
+        response_schema=gen.MARKET_PULSE_SCHEMA,
+    )
+    result = measure(call, iterations)
+    fake_model.configure()
+    return result
+
+
+def bench_hedged_slow_tail(iterations):
+    """3% of calls stall for 2 s; calls past the observed p95 are hedged (up to 5% of traffic)."""
+    fake_model.configure(latency=0.01)
+    call = lambda: gen.get_ai_response("Say hello.", call_site="bench_hedge")  # noqa: E731
+    for _ in range(gen.HEDGE_MIN_SAMPLES):
+        call()
+    fake_model.configure(latency=0.01, slow_rate=0.03, slow_latency=2.0, seed=5)
+    result = measure(call, iterations * 2)
+    fake_model.configure()
+    return result
+
+
+def bench_cold_import(iterations):
+    """Fresh interpreter importing gen.py: the cold start every new pod pays."""
+    code = "import fake_model; fake_model.install(); import gen"
+    run = lambda: subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=os.environ, check=True, capture_output=True)  # noqa: E731
+    return measure(run, max(3, iterations // 10), warmup=1)
+
+
+def bench_parse_json_clean(iterations):
+    return measure(lambda: gen.parse_json_response(SAMPLE_JSON), iterations * 10)
+
+
+def bench_parse_json_damaged(iterations):
+    damaged = "Here is the analysis:\n```json\n" + SAMPLE_JSON[: len(SAMPLE_JSON) * 2 // 3]
+    return measure(lambda: gen.parse_json_response(damaged), iterations * 10)
+
+
+def bench_build_advisor_prompt(iterations):
+    return measure(lambda: [gen.build_advisor_prompt(PROFILE, section) for section in gen.ADVISOR_SECTION_PROMPTS], iterations)
+
+
+def bench_local_skill_gap(iterations):
+    return measure(lambda: gen.local_advisor_sections(PROFILE), iterations * 10)
+
+
+def bench_keyword_alignment_many(iterations):
+    job_descriptions = [RESUME_SECTION + f" Requisition {i}." for i in range(100)]
+    return measure(lambda: gen.keyword_alignment_many(LARGE_RESUME, job_descriptions), iterations)
+
+
+def bench_build_interview_contents(iterations):
+    transcript = [{"role": "system", "content": "You are an expert interviewer."}]
+    for turn in range(30):
+        transcript.append({"role": "bot", "content": f"Question {turn}: " + fake_model.FILLER})
+        transcript.append({"role": "user", "content": f"Answer {turn}: " + RESUME_SECTION})
+    memory = gen.new_interview_memory()
+    return measure(lambda: gen.build_interview_contents(transcript, memory), iterations * 10)
+
+
+def _app_test(session_state):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(GEN_PATH, default_timeout=60)
+    for key, value in session_state.items():
+        at.session_state[key] = value
+    return at
+
+
+def _bench_page(page, iterations, extra_state=None, interact=None):
+    fake_model.configure()
+
+    def run():
+        at = _app_test({"page": page, "user_profile": dict(PROFILE), **(extra_state or {})})
+        at.run()
+        if interact is not None:
+            interact(at)
+        if at.exception:
+            raise RuntimeError(f"{page} raised: {at.exception[0].message}")
+
+    return measure(run, iterations, warmup=1)
+
+
+def bench_render_home(iterations):
+    return _bench_page("Home", iterations)
+
+
+def bench_render_profile_builder(iterations):
+    return _bench_page("Profile Builder", iterations)
+
+
+def bench_render_career_advisor(iterations):
+    return _bench_page("Career Advisor", iterations)
+
+
+def bench_render_market_pulse(iterations):
+    def interact(at):
+        at.text_input[0].input("data scientist")
+        at.button(key="market_pulse_button").click().run()
+
+    return _bench_page("Market Pulse", iterations, interact=interact)
+
+
+def bench_render_mock_interview(iterations):
+    chat = [{"role": "system", "content": "You are an expert interviewer for a 'Data Scientist' position."}]
+    for turn in range(15):
+        chat.append({"role": "bot", "content": f"Question {turn}: " + fake_model.FILLER})
+        chat.append({"role": "user", "content": f"Answer {turn}: I led the churn model project."})
+    state = {"interview_active": True, "interview_chat": chat, "interview_memory": gen.new_interview_memory()}
+    return _bench_page("Mock Interview", iterations, extra_state=state)
+
+
+def bench_render_resume_copilot(iterations):
+    return _bench_page("Resume Co-pilot", iterations)
+
+
+SCENARIOS = {
+    "cold_import_gen": bench_cold_import,
+    "get_ai_response_overhead": bench_get_ai_response_overhead,
+    "get_ai_response_cache_hit": bench_get_ai_response_cache_hit,
+    "get_ai_response_json": bench_get_ai_response_json,
+    "market_pulse_snapshot_hit": bench_market_pulse_snapshot_hit,
+    "get_ai_response_injected_faults": bench_injected_faults,
+    "cascade_light_to_standard": bench_cascade_escalations,
+    "hedged_slow_tail": bench_hedged_slow_tail,
+    "parse_json_clean": bench_parse_json_clean,
+    "parse_json_damaged": bench_parse_json_damaged,
+    "build_advisor_prompt_large_resume": bench_build_advisor_prompt,
+    "local_skill_gap_large_resume": bench_local_skill_gap,
+    "keyword_alignment_100_jds": bench_keyword_alignment_many,
+    "build_interview_contents_30_turns": bench_build_interview_contents,
+    "render_home": bench_render_home,
+    "render_profile_builder": bench_render_profile_builder,
+    "render_career_advisor": bench_render_career_advisor,
+    "render_market_pulse": bench_render_market_pulse,
+    "render_mock_interview": bench_render_mock_interview,
+    "render_resume_copilot": bench_render_resume_copilot,
+}
+
+
+def find_regressions(results, baseline, tolerance):
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if result["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {result['p95_ms']:.3f} ms vs. baseline {base['p95_ms']:.3f} ms")
+        if result["ops_per_sec"] < base["ops_per_sec"] * (1 - tolerance):
+            regressions.append(f"{name}: {result['ops_per_sec']:.1f} ops/s vs. baseline {base['ops_per_sec']:.1f} ops/s")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--only", help="Comma-separated scenario names (substring match).")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--check", action="store_true", help="Exit non-zero when a scenario regresses past --tolerance.")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="Allowed relative slowdown (default 0.3 = 30%%).")
+    args = parser.parse_args(argv)
+
+    selected = SCENARIOS
+    if args.only:
+        patterns = [p.strip() for p in args.only.split(",") if p.strip()]
+        selected = {name: fn for name, fn in SCENARIOS.items() if any(p in name for p in patterns)}
+
+    results = {}
+    print(f"{'scenario':40} {'n':>6} {'mean ms':>10} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'ops/s':>10}")
+    for name, scenario in selected.items():
+        result = scenario(args.iterations)
+        results[name] = result
+        print(
+            f"{name:40} {result['n']:>6} {result['mean_ms']:>10.3f} {result['p50_ms']:>10.3f} "
+            f"{result['p95_ms']:>10.3f} {result['p99_ms']:>10.3f} {result['ops_per_sec']:>10.1f}"
+        )
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"Saved baseline to {args.baseline}")
+
+    if args.check:
+        if not os.path.exists(args.baseline):
+            print(f"No baseline at {args.baseline}; run with --save-baseline first.")
+            return 1
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = find_regressions(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,266 @@
+"""
+A local stand-in for `google.generativeai.GenerativeModel`, so the app, benchmarks and
+services can run without network access or an API key.
+
+It answers text prompts with filler prose and JSON-mode prompts with a payload built from
+the request's `response_schema`. Latency, API errors and malformed JSON can be injected
+with configurable rates, and `request_options={"timeout": ...}` is honoured like the SDK's.
+`caching.CachedContent` is faked in-process too, with the same expiry behaviour.
+"""
+import asyncio
+import datetime
+import json
+import random
+import threading
+import time
+import types
+import uuid
+
+FILLER = (
+    "Thanks for sharing that. Could you walk me through a recent project where you had to "
+    "balance competing priorities, what trade-offs you made and how you measured success? "
+)
+
+
+class FakeAPIError(Exception):
+    """Mimics a google.api_core error: carries an HTTP status in `code`."""
+
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+
+
+class FakeUsage:
+    def __init__(self, prompt_token_count, candidates_token_count, cached_content_token_count=0):
+        self.prompt_token_count = prompt_token_count
+        self.candidates_token_count = candidates_token_count
+        self.cached_content_token_count = cached_content_token_count
+        self.total_token_count = prompt_token_count + candidates_token_count
+
+
+class FakeResponse:
+    def __init__(self, text, usage_metadata=None):
+        self.text = text
+        self.usage_metadata = usage_metadata
+
+
+class FakeStreamResponse:
+    """Iterable of chunks, like the SDK's streaming response; usage is known once consumed."""
+
+    def __init__(self, chunks, usage_metadata, chunk_delay):
+        self._chunks = chunks
+        self._chunk_delay = chunk_delay
+        self.usage_metadata = usage_metadata
+
+    def __iter__(self):
+        for chunk in self._chunks:
+            if self._chunk_delay:
+                time.sleep(self._chunk_delay)
+            yield FakeResponse(chunk)
+
+
+class FakeConfig:
+    """Knobs shared by every FakeGenerativeModel instance."""
+
+    def __init__(
+        self,
+        latency=0.0,
+        latency_jitter=0.0,
+        slow_rate=0.0,
+        slow_latency=0.0,
+        error_rate=0.0,
+        error_code=503,
+        malformed_json_rate=0.0,
+        chunk_size=40,
+        cache_min_tokens=0,
+        seed=None,
+    ):
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.error_rate = error_rate
+        self.error_code = error_code
+        self.malformed_json_rate = malformed_json_rate
+        self.chunk_size = chunk_size
+        self.cache_min_tokens = cache_min_tokens
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.calls = 0
+
+    def roll(self):
+        with self.lock:
+            self.calls += 1
+            return self.random.random()
+
+
+config = FakeConfig()
+
+
+def configure(**kwargs):
+    """Replaces the shared fake configuration, e.g. configure(latency=0.2, error_rate=0.1)."""
+    global config
+    config = FakeConfig(**kwargs)
+    return config
+
+
+def _sample_from_schema(schema, name="value"):
+    kind = str(schema.get("type", "STRING")).upper()
+    if kind == "OBJECT":
+        return {key: _sample_from_schema(sub, key) for key, sub in schema.get("properties", {}).items()}
+    if kind == "ARRAY":
+        return [_sample_from_schema(schema.get("items", {}), name) for _ in range(3)]
+    if kind in ("INTEGER", "NUMBER"):
+        return 42
+    if kind == "BOOLEAN":
+        return True
+    return f"Sample {name.replace('_', ' ')}"
+
+
+def _config_value(generation_config, key):
+    if isinstance(generation_config, dict):
+        return generation_config.get(key)
+    return getattr(generation_config, key, None)
+
+
+def _timeout(request_options):
+    """The client-side deadline passed like the SDK's request_options={"timeout": seconds}."""
+    return (request_options or {}).get("timeout")
+
+
+def _prompt_text(contents):
+    if isinstance(contents, str):
+        return contents
+    return json.dumps(contents, default=str)
+
+
+def _model_path(model_name):
+    return model_name if model_name.startswith("models/") else f"models/{model_name}"
+
+
+class FakeCachedContent:
+    """
+    In-process stand-in for `google.generativeai.caching.CachedContent`. Entries expire after
+    their TTL; referencing an expired or deleted one fails with a 404, as the API does.
+    """
+
+    _store = {}
+    _lock = threading.Lock()
+    created = 0
+
+    def __init__(self, name, model, text, expire_time):
+        self.name = name
+        self.model = model
+        self.text = text
+        self.expire_time = expire_time
+        self.token_count = max(1, len(text) // 4)
+
+    @classmethod
+    def create(cls, model, contents=None, system_instruction=None, ttl=None, display_name=None, **kwargs):
+        text = _prompt_text(system_instruction or "") + "".join(_prompt_text(c) for c in contents or [])
+        if len(text) // 4 < config.cache_min_tokens:
+            raise FakeAPIError(400, f"Cached content is too small. min_total_token_count={config.cache_min_tokens}")
+        if isinstance(ttl, datetime.timedelta):
+            ttl = ttl.total_seconds()
+        expire_time = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=ttl or 3600)
+        cached = cls(f"cachedContents/{uuid.uuid4().hex[:12]}", _model_path(model), text, expire_time)
+        with cls._lock:
+            cls._store[cached.name] = cached
+            cls.created += 1
+        return cached
+
+    @classmethod
+    def get(cls, name):
+        with cls._lock:
+            cached = cls._store.get(name)
+        if cached is None or cached.expired:
+            raise FakeAPIError(404, "CachedContent not found (or permission denied)")
+        return cached
+
+    @property
+    def expired(self):
+        return datetime.datetime.now(datetime.timezone.utc) >= self.expire_time
+
+    def delete(self):
+        with self._lock:
+            self._store.pop(self.name, None)
+
+
+class FakeGenerativeModel:
+    def __init__(self, model_name="gemini-2.5-flash", **kwargs):
+        self.model_name = _model_path(model_name)
+        self.cached_content = None
+
+    @classmethod
+    def from_cached_content(cls, cached_content, **kwargs):
+        model = cls(cached_content.model)
+        model.cached_content = cached_content.name
+        return model
+
+    def _plan(self, timeout=None):
+        """
+        Latency for this call, and the error to raise once it has passed (if any): an injected
+        API error after half the latency, or a 504 when the latency runs past `timeout`.
+        """
+        cfg = config
+        delay = cfg.latency + cfg.random.uniform(0, cfg.latency_jitter) if cfg.latency_jitter else cfg.latency
+        if cfg.slow_rate and cfg.roll() < cfg.slow_rate:
+            delay += cfg.slow_latency
+        if cfg.error_rate and cfg.roll() < cfg.error_rate:
+            delay, error = delay / 2, FakeAPIError(cfg.error_code, f"{cfg.error_code} injected failure from the fake model")
+        else:
+            error = None
+        if timeout is not None and delay > timeout:
+            return timeout, FakeAPIError(504, "504 Deadline Exceeded")
+        return delay, error
+
+    def _cached_prefix(self):
+        return FakeCachedContent.get(self.cached_content) if self.cached_content else None
+
+    def _respond(self, contents, generation_config, cached=None):
+        cfg = config
+        prompt = _prompt_text(contents)
+        mime_type = _config_value(generation_config, "response_mime_type")
+        schema = _config_value(generation_config, "response_schema")
+        if mime_type == "application/json" or schema:
+            text = json.dumps(_sample_from_schema(schema or {"type": "OBJECT", "properties": {}}))
+            if cfg.malformed_json_rate and cfg.roll() < cfg.malformed_json_rate:
+                # Truncated output wrapped in a fence, the damage we see most often in production.
+                text = "```json\n" + text[: max(1, len(text) * 2 // 3)]
+        else:
+            text = FILLER * 3
+        cached_tokens = cached.token_count if cached is not None else 0
+        usage = FakeUsage(max(1, len(prompt) // 4) + cached_tokens, max(1, len(text) // 4), cached_tokens)
+        return text, usage
+
+    def generate_content(self, contents, generation_config=None, stream=False, request_options=None, **kwargs):
+        cached = self._cached_prefix()
+        delay, error = self._plan(_timeout(request_options))
+        time.sleep(delay)
+        if error is not None:
+            raise error
+        text, usage = self._respond(contents, generation_config, cached)
+        if stream:
+            size = config.chunk_size
+            chunks = [text[i:i + size] for i in range(0, len(text), size)]
+            return FakeStreamResponse(chunks, usage, chunk_delay=0.0)
+        return FakeResponse(text, usage)
+
+    async def generate_content_async(self, contents, generation_config=None, request_options=None, **kwargs):
+        cached = self._cached_prefix()
+        delay, error = self._plan(_timeout(request_options))
+        await asyncio.sleep(delay)
+        if error is not None:
+            raise error
+        text, usage = self._respond(contents, generation_config, cached)
+        return FakeResponse(text, usage)
+
+
+def install():
+    """Points `google.generativeai` at the fake model so the app never reaches the network."""
+    import google.generativeai as genai
+
+    genai.GenerativeModel = FakeGenerativeModel
+    genai.caching = types.SimpleNamespace(CachedContent=FakeCachedContent)
+    genai.configure = lambda *args, **kwargs: None
+    return genai
@@ -1,7 +1,33 @@
+import time
+
+# Taken before any other import so script-run timings include import cost.
+SCRIPT_STARTED = time.perf_counter()
+
 import streamlit as st
-import google.generativeai as genai
+import asyncio
+import contextlib
+import dataclasses
+import datetime
+import functools
+import hashlib
 import json
-import time
+import logging
+import logging.handlers
+import os
+import random
+import re
+import shutil
+import sqlite3
+import threading
+import uuid
+import weakref
+import zlib
+from collections import OrderedDict, deque
+from collections.abc import MutableMapping
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
 
 # --- Configuration ---
 # Read from Streamlit secrets or default fallback placeholder
@@ -11,24 +37,170 @@ try:
 except Exception:
     API_KEY = "YOUR_GEMINI_API_KEY_HERE"
 
-try:
-    genai.configure(api_key=API_KEY)
-    # Changed to 'gemini-2.5-flash' as it works successfully with the new API key
-    model = genai.GenerativeModel('gemini-2.5-flash')
-except Exception as e:
-    st.error(f"Failed to configure AI model. Please check your API key. Error: {e}", icon="🚨")
-    st.stop()
-
-# --- Page Configuration ---
-st.set_page_config(
-    page_title="Adept AI",
-    page_icon="🤖",
-    layout="wide",
-    initial_sidebar_state="expanded",
+
+def get_setting(name, default):
+    """Reads a tunable from the environment or Streamlit secrets, falling back to `default`."""
+    value = os.environ.get(name)
+    if value is None:
+        try:
+            value = st.secrets[name]
+        except Exception:
+            return default
+    if isinstance(default, bool):
+        return str(value).strip().lower() in ("1", "true", "yes", "on")
+    try:
+        return type(default)(value)
+    except (TypeError, ValueError):
+        return default
+
+
+CACHE_DIR = get_setting("ADEPT_CACHE_DIR", ".adept_cache")
+CACHE_MAX_ENTRIES = get_setting("ADEPT_CACHE_MAX_ENTRIES", 5000)
+# Changed to 'gemini-2.5-flash' as it works successfully with the new API key
+MODEL_NAME = get_setting("ADEPT_MODEL", "gemini-2.5-flash")
+# Model tiers: the model and generation settings behind each, and its list price in USD per
+# million input/output tokens (only used for the cost metrics). max_output_tokens 0 = model default.
+MODEL_TIERS = {
+    "light": {
+        "model": get_setting("ADEPT_MODEL_LIGHT", "gemini-2.5-flash-lite"),
+        "temperature": get_setting("ADEPT_MODEL_LIGHT_TEMPERATURE", 0.7),
+        "max_output_tokens": get_setting("ADEPT_MODEL_LIGHT_MAX_OUTPUT_TOKENS", 2048),
+        "usd_per_mtok": (get_setting("ADEPT_MODEL_LIGHT_USD_IN", 0.10), get_setting("ADEPT_MODEL_LIGHT_USD_OUT", 0.40)),
+    },
+    "standard": {
+        "model": MODEL_NAME,
+        "temperature": get_setting("ADEPT_MODEL_TEMPERATURE", 0.7),
+        "max_output_tokens": get_setting("ADEPT_MODEL_MAX_OUTPUT_TOKENS", 0),
+        "usd_per_mtok": (get_setting("ADEPT_MODEL_USD_IN", 0.30), get_setting("ADEPT_MODEL_USD_OUT", 2.50)),
+    },
+}
+
+
+# Input tokens served from a context cache are billed at this fraction of the input price.
+CACHED_INPUT_PRICE_RATIO = 0.25
+# Gemini context caching: stable prompt prefixes (instructions, the user's resume) of at least
+# CONTEXT_CACHE_MIN_TOKENS are stored server-side for CONTEXT_CACHE_TTL seconds and referenced
+# instead of resent (TTL 0 disables). See ContextCacheRegistry.
+CONTEXT_CACHE_TTL = get_setting("ADEPT_CONTEXT_CACHE_TTL", 3600)
+CONTEXT_CACHE_MIN_TOKENS = get_setting("ADEPT_CONTEXT_CACHE_MIN_TOKENS", 1024)
+CONTEXT_CACHE_MAX_ENTRIES = get_setting("ADEPT_CONTEXT_CACHE_MAX_ENTRIES", 256)
+
+
+def _route_setting(call_site, default):
+    tiers = get_setting(f"ADEPT_ROUTE_{call_site.upper()}", default).split(",")
+    return tuple(tier.strip() for tier in tiers if tier.strip() in MODEL_TIERS) or ("standard",)
+
+
+# Tiers each call site tries, cheapest first, as a comma-separated ADEPT_ROUTE_<CALL_SITE>. A later
+# tier is only called when the answer before it fails its schema or quality checks (answer_problem).
+# Streamed call sites use their first tier only, since their text is on screen as it arrives.
+MODEL_ROUTES = {
+    call_site: _route_setting(call_site, default)
+    for call_site, default in {
+        "interview_opener": "light",
+        "interview_turn": "light",
+        "interview_summary": "light",
+        "market_pulse": "light,standard",
+        "advisor": "light,standard",
+        "feedback": "standard",
+        "critique": "standard",
+        "cover_letter": "standard",
+    }.items()
+}
+METRICS_HOST = get_setting("ADEPT_METRICS_HOST", "127.0.0.1")
+METRICS_PORT = get_setting("ADEPT_METRICS_PORT", 9464)
+# JSON-lines event log, off unless a path is set; rotated to <path>.1 past the size limit.
+METRICS_LOG_PATH = get_setting("ADEPT_METRICS_LOG", "")
+METRICS_LOG_MAX_BYTES = get_setting("ADEPT_METRICS_LOG_MAX_BYTES", 50 * 1024 * 1024)
+LLM_MAX_WORKERS = get_setting("ADEPT_LLM_MAX_WORKERS", 8)
+# Long generations (advisor sections, interview feedback, co-pilot output) run as background
+# jobs: this many at once, with this many more waiting before new jobs are turned away.
+JOB_MAX_WORKERS = get_setting("ADEPT_JOB_MAX_WORKERS", 8)
+JOB_MAX_QUEUED = get_setting("ADEPT_JOB_MAX_QUEUED", 32)
+JOB_POLL_SECONDS = get_setting("ADEPT_JOB_POLL_SECONDS", 1.0)
+# Finished jobs are kept this long for their session to collect.
+JOB_RETENTION_SECONDS = get_setting("ADEPT_JOB_RETENTION_SECONDS", 3600)
+# Speculative model calls (Market Pulse, interview opener) a session may trigger by saving its profile.
+PREFETCH_BUDGET = get_setting("ADEPT_PREFETCH_BUDGET", 6)
+RATE_LIMIT_RPM = get_setting("ADEPT_RATE_LIMIT_RPM", 60)
+RATE_LIMIT_TPM = get_setting("ADEPT_RATE_LIMIT_TPM", 250000)
+RETRY_ATTEMPTS = get_setting("ADEPT_RETRY_ATTEMPTS", 3)
+RETRY_BASE_DELAY = get_setting("ADEPT_RETRY_BASE_DELAY", 1.0)
+# Server retry hints longer than this fail the request instead of holding the user's spinner.
+RETRY_MAX_DELAY = get_setting("ADEPT_RETRY_MAX_DELAY", 20.0)
+BREAKER_FAILURE_THRESHOLD = get_setting("ADEPT_BREAKER_FAILURE_THRESHOLD", 5)
+BREAKER_COOLDOWN = get_setting("ADEPT_BREAKER_COOLDOWN", 30.0)
+# Seconds a model call may take in total, retries included, per call site (ADEPT_DEADLINE_<CALL_SITE>).
+CALL_DEADLINES = {
+    call_site: get_setting(f"ADEPT_DEADLINE_{call_site.upper()}", seconds)
+    for call_site, seconds in {
+        "interview_opener": 20.0,
+        "interview_turn": 20.0,
+        "interview_summary": 30.0,
+        "advisor": 45.0,
+        "market_pulse": 45.0,
+        "feedback": 90.0,
+        "critique": 90.0,
+        "cover_letter": 90.0,
+    }.items()
+}
+DEFAULT_CALL_DEADLINE = get_setting("ADEPT_DEADLINE_DEFAULT", 60.0)
+# A call still unanswered after the p95 latency observed for its call site and model gets one
+# duplicate, and the first answer wins. Hedges are capped at this fraction of calls (0 disables).
+HEDGE_MAX_FRACTION = get_setting("ADEPT_HEDGE_MAX_FRACTION", 0.05)
+# Threads that run hedgeable calls, primaries and duplicates alike. A call that finds them all
+# busy runs unhedged on its caller's thread instead of waiting for one.
+HEDGE_THREADS = get_setting("ADEPT_HEDGE_THREADS", 64)
+HEDGE_MIN_DELAY = get_setting("ADEPT_HEDGE_MIN_DELAY", 0.5)
+HEDGE_MIN_SAMPLES = get_setting("ADEPT_HEDGE_MIN_SAMPLES", 20)
+# Rough allowance for response tokens when reserving tokens-per-minute capacity.
+EXPECTED_OUTPUT_TOKENS = 800
+INTERVIEW_VERBATIM_MESSAGES = get_setting("ADEPT_INTERVIEW_VERBATIM_MESSAGES", 8)
+INTERVIEW_CONTEXT_TOKENS = get_setting("ADEPT_INTERVIEW_CONTEXT_TOKENS", 2000)
+# Memory caps for the bounded containers in session state; least recently used entries past
+# them spill to compressed files under CACHE_DIR.
+SESSION_MAX_BYTES = get_setting("ADEPT_SESSION_MAX_BYTES", 2 * 1024 * 1024)
+SESSION_GLOBAL_MAX_BYTES = get_setting("ADEPT_SESSION_GLOBAL_MAX_BYTES", 256 * 1024 * 1024)
+ANALYSIS_CACHE_MAX_ENTRIES = get_setting("ADEPT_ANALYSIS_CACHE_MAX_ENTRIES", 64)
+MARKET_PULSE_CACHE_MAX_ENTRIES = get_setting("ADEPT_MARKET_PULSE_CACHE_MAX_ENTRIES", 32)
+# Shows the per-session memory page in the sidebar.
+ADMIN_VIEW = get_setting("ADEPT_ADMIN_VIEW", False)
+# Chat messages drawn on each run; older ones stay behind a toggle so long interviews stay cheap to redraw.
+INTERVIEW_VISIBLE_MESSAGES = get_setting("ADEPT_INTERVIEW_VISIBLE_MESSAGES", 20)
+PDF_MAX_PAGES = get_setting("ADEPT_PDF_MAX_PAGES", 30)
+PDF_MAX_BYTES = get_setting("ADEPT_PDF_MAX_BYTES", 10 * 1024 * 1024)
+SKILLS_TAXONOMY_PATH = get_setting(
+    "ADEPT_SKILLS_TAXONOMY", os.path.join(os.path.dirname(os.path.abspath(__file__)), "skills_taxonomy.json")
 )
+# Token budgets for the long free-text documents pasted into each call site's prompt.
+PROMPT_BUDGETS = {
+    "advisor": {"resume": get_setting("ADEPT_BUDGET_ADVISOR_RESUME", 3000)},
+    "critique": {
+        "resume": get_setting("ADEPT_BUDGET_COPILOT_RESUME", 3000),
+        "job_description": get_setting("ADEPT_BUDGET_COPILOT_JOB_DESCRIPTION", 1500),
+    },
+    "cover_letter": {
+        "resume": get_setting("ADEPT_BUDGET_COPILOT_RESUME", 3000),
+        "job_description": get_setting("ADEPT_BUDGET_COPILOT_JOB_DESCRIPTION", 1500),
+    },
+}
+# Seconds a response stays valid per call site. Call sites not listed here are never cached
+# (Market Pulse keeps its own snapshot store, see MarketPulseStore).
+CACHE_TTLS = {
+    "advisor": get_setting("ADEPT_CACHE_TTL_ADVISOR", 24 * 3600),
+    "critique": get_setting("ADEPT_CACHE_TTL_CRITIQUE", 3600),
+    "cover_letter": get_setting("ADEPT_CACHE_TTL_COVER_LETTER", 3600),
+}
+# Market Pulse snapshots younger than this are served as they are; older ones are served
+# while a background refresh runs, until they pass the stale window and must be regenerated.
+MARKET_PULSE_FRESH_SECONDS = get_setting("ADEPT_MARKET_PULSE_FRESH_SECONDS", 12 * 3600)
+MARKET_PULSE_STALE_SECONDS = get_setting("ADEPT_MARKET_PULSE_STALE_SECONDS", 7 * 24 * 3600)
+# The warmer keeps the most requested titles fresh, checking every interval (0 disables it).
+MARKET_PULSE_WARM_TOP_N = get_setting("ADEPT_MARKET_PULSE_WARM_TOP_N", 25)
+MARKET_PULSE_WARM_INTERVAL = get_setting("ADEPT_MARKET_PULSE_WARM_INTERVAL", 600.0)
 
 # --- Custom Styling (UI Enhancement) ---
-st.markdown("""
+APP_CSS = """
 <style>
     @import url('https://fonts.googleapis.com/css2?family=Outfit:wght@300;400;600;700&display=swap');
 
@@ -228,7 +400,20 @@ st.markdown("""
         color: #E2E8F0 !important;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+
+@st.cache_resource
+def get_app_css():
+    """APP_CSS with comments and indentation stripped, computed once per process."""
+    css = re.sub(r"/\*.*?\*/", "", APP_CSS, flags=re.DOTALL)
+    return "\n".join(line.strip() for line in css.splitlines() if line.strip())
+
+
+def inject_styles():
+    # Streamlit drops elements a rerun doesn't re-emit, so this runs every rerun; it is one small element.
+    st.markdown(get_app_css(), unsafe_allow_html=True)
+
 
 
 # --- Session State Initialization ---
@@ -243,445 +428,3672 @@ def init_session_state():
     if "page" not in st.session_state:
         st.session_state.page = "Home"
     if "interview_chat" not in st.session_state:
-        st.session_state.interview_chat = []
+        st.session_state.interview_chat = SpillingList("interview_chat")
+    if "interview_memory" not in st.session_state:
+        st.session_state.interview_memory = new_interview_memory()
     if "analysis_cache" not in st.session_state:
-        st.session_state.analysis_cache = {}
+        st.session_state.analysis_cache = BoundedCache("analysis_cache", ANALYSIS_CACHE_MAX_ENTRIES)
     if "interview_feedback" not in st.session_state:
         st.session_state.interview_feedback = None
     if "interview_active" not in st.session_state:
         st.session_state.interview_active = False
     if "market_pulse_cache" not in st.session_state:
-        st.session_state.market_pulse_cache = {}
+        st.session_state.market_pulse_cache = BoundedCache("market_pulse_cache", MARKET_PULSE_CACHE_MAX_ENTRIES)
+    # Advisor section keys whose job did not produce a result, mapped to "failed" or "cancelled".
+    if "advisor_failures" not in st.session_state:
+        st.session_state.advisor_failures = {}
+    if "resume_upload_hash" not in st.session_state:
+        st.session_state.resume_upload_hash = None
+    # IDs of background jobs whose results this session has yet to collect.
+    if "advisor_jobs" not in st.session_state:
+        st.session_state.advisor_jobs = {}
+    if "interview_feedback_job" not in st.session_state:
+        st.session_state.interview_feedback_job = None
+    if "copilot_job" not in st.session_state:
+        st.session_state.copilot_job = None
+    if "copilot_result" not in st.session_state:
+        st.session_state.copilot_result = None
+    if "prefetch_spent" not in st.session_state:
+        st.session_state.prefetch_spent = 0
+    if "prefetched_opener" not in st.session_state:
+        st.session_state.prefetched_opener = None
+
+
+# --- Session Memory ---
+def _json_size(value):
+    return len(json.dumps(value, default=str, separators=(",", ":")).encode("utf-8"))
 
 
-# --- AI Helper Function ---
-def get_ai_response(prompt, is_json=False):
+def current_session_id():
+    ctx = _script_run_ctx()
+    return ctx.session_id if ctx is not None else "local"
+
+
+class SessionMemory:
     """
-    Generic function to get a response from the AI model.
-    Retries with exponential backoff.
+    Process-wide accounting for the bounded containers kept in session state. Keeps every
+    session under `session_max_bytes` and the process under `global_max_bytes` by spilling
+    the least recently used entries, across containers, to compressed files on disk.
     """
-    retries = 3
-    delay = 2
-    for i in range(retries):
-        try:
-            generation_config = genai.types.GenerationConfig(
-                # Only one candidate for now.
-                candidate_count=1,
-                temperature=0.7,
-            )
-            if is_json:
-                # Adding instruction for JSON output directly in the prompt
-                full_prompt = f"{prompt}\n\nIMPORTANT: Please provide the response in a valid JSON format only, with no other text or explanations."
-                response = model.generate_content(full_prompt, generation_config=generation_config)
-                # Attempt to find and parse the JSON block
-                json_text = response.text.strip().lstrip('```json').rstrip('```').strip()
-                return json.loads(json_text)
-            else:
-                response = model.generate_content(prompt, generation_config=generation_config)
-                return response.text
-        except Exception as e:
-            if i < retries - 1:
-                time.sleep(delay)
-                delay *= 2
-            else:
-                st.error(f"AI model request failed after multiple retries. Error: {e}", icon="🔥")
-                return None
-    return None
 
-# --- Page Rendering Functions ---
+    def __init__(self, spill_dir, session_max_bytes, global_max_bytes):
+        # Spill files left by a previous process belong to sessions that no longer exist.
+        shutil.rmtree(spill_dir, ignore_errors=True)
+        self.spill_dir = spill_dir
+        self.session_max_bytes = session_max_bytes
+        self.global_max_bytes = global_max_bytes
+        self._lock = threading.Lock()
+        self._containers = weakref.WeakSet()
 
-def render_home():
-    st.title("Welcome to Your Personalized AI Career Advisor 🚀")
-    st.markdown("### Your one-stop solution to navigate the job market, powered by Generative AI.")
+    def register(self, container):
+        """Tracks a new container and returns the directory its spilled entries go to."""
+        with self._lock:
+            self._containers.add(container)
+        return os.path.join(self.spill_dir, container.session_id, uuid.uuid4().hex)
 
-    st.markdown("""
-    <div class="card">
-    <p>In today's fast-paced job market, finding the right career path can be overwhelming. This tool is designed to be your personal guide. We'll help you understand your skills, discover exciting career opportunities, and prepare you for the interviews that will land you your dream job.</p>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        st.info("**1. Build Your Profile**", icon="👤")
-        st.write("Upload your resume or manually enter your skills, interests, and career goals. The more detail you provide, the better the advice!")
-    with col2:
-        st.info("**2. Get AI-Powered Insights**", icon="💡")
-        st.write("Discover your skill gaps, get a personalized learning plan, and explore career paths that match your unique profile.")
-    with col3:
-        st.info("**3. Prepare for Success**", icon="🎯")
-        st.write("Practice with our AI mock interviewer and fine-tune your resume to stand out to recruiters for any job.")
-        
-    if st.button("Get Started: Build Your Profile →", key="start_button"):
-        st.session_state.page = "Profile Builder"
-        st.rerun()
+    def containers(self):
+        with self._lock:
+            return list(self._containers)
 
+    def enforce(self, session_id):
+        containers = self.containers()
+        self._shrink([c for c in containers if c.session_id == session_id], self.session_max_bytes)
+        self._shrink(containers, self.global_max_bytes)
+        metrics = get_metrics()
+        help_text = "Bytes held by bounded session containers, in memory and spilled to disk."
+        metrics.set("adept_session_state_bytes", help_text, {"where": "memory"}, sum(c.bytes for c in containers))
+        metrics.set("adept_session_state_bytes", help_text, {"where": "disk"}, sum(c.spilled_bytes for c in containers))
 
-def render_profile_builder():
-    st.title("👤 Profile Builder")
-    st.markdown("Let's create a snapshot of your professional self. Provide as much detail as possible for the most accurate advice.")
+    @staticmethod
+    def _shrink(containers, limit):
+        total = sum(c.bytes for c in containers)
+        while total > limit:
+            candidates = [c for c in containers if c.spillable()]
+            if not candidates:
+                break
+            freed = min(candidates, key=lambda c: c.coldest_access()).spill_coldest()
+            if not freed:
+                break
+            total -= freed
+            get_metrics().inc("adept_session_spills_total", "Session state entries spilled to disk.", {})
 
-    with st.container(border=True):
-        st.subheader("Upload Your Resume (Optional)")
-        uploaded_file = st.file_uploader(
-            "Upload your resume (PDF, TXT) and we'll try to extract the text.", 
-            type=['txt', 'pdf']
-        )
-        if uploaded_file is not None:
-            try:
-                # Simple text extraction (for PDF, might need a library like PyMuPDF)
-                if uploaded_file.type == "application/pdf":
-                    st.warning("PDF parsing is experimental. For best results, please copy-paste the text below.", icon="⚠️")
-                    # Placeholder for more complex PDF extraction
-                    st.session_state.user_profile["resume_text"] = "PDF content extraction is a complex feature. Please paste your resume text manually for this demo."
-                else:
-                    st.session_state.user_profile["resume_text"] = uploaded_file.getvalue().decode("utf-8")
-            except Exception as e:
-                st.error(f"Error reading file: {e}")
+    def snapshot(self):
+        """Per-session memory usage, largest first, for the admin view."""
+        sessions = {}
+        for c in self.containers():
+            row = sessions.setdefault(c.session_id, {"session": c.session_id, "memory_bytes": 0, "spilled_bytes": 0, "entries": 0, "spilled_entries": 0})
+            row["memory_bytes"] += c.bytes
+            row["spilled_bytes"] += c.spilled_bytes
+            row["entries"] += c.entry_counts()[0]
+            row["spilled_entries"] += c.entry_counts()[1]
+        return sorted(sessions.values(), key=lambda row: -row["memory_bytes"])
 
-        resume_text = st.text_area(
-            "Or, paste your resume text here:", 
-            value=st.session_state.user_profile.get("resume_text", ""), 
-            height=300
-        )
-        st.session_state.user_profile["resume_text"] = resume_text
 
-    with st.container(border=True):
-        st.subheader("Your Skills & Interests")
-        skills = st.text_input(
-            "Enter your skills, separated by commas (e.g., Python, Data Analysis, React)",
-            value=", ".join(st.session_state.user_profile.get("skills", []))
-        )
-        st.session_state.user_profile["skills"] = [s.strip() for s in skills.split(',') if s.strip()]
+@st.cache_resource
+def get_session_memory():
+    return SessionMemory(os.path.join(CACHE_DIR, "session_spill"), SESSION_MAX_BYTES, SESSION_GLOBAL_MAX_BYTES)
 
-        interests = st.text_area(
-            "Describe your professional interests and passions:",
-            value=st.session_state.user_profile.get("interests", "")
-        )
-        st.session_state.user_profile["interests"] = interests
 
-    with st.container(border=True):
-        st.subheader("Your Career Goal")
-        career_goal = st.text_input(
-            "What is your target job role? (e.g., Software Engineer, Product Manager)",
-            value=st.session_state.user_profile.get("career_goal", "")
-        )
-        st.session_state.user_profile["career_goal"] = career_goal
+class _SpillingContainer:
+    """Shared plumbing: byte counters, the spill directory and compressed JSON files in it."""
 
-    if st.button("Save and Analyze My Profile", key="save_profile"):
-        if not st.session_state.user_profile["career_goal"] or (not st.session_state.user_profile["skills"] and not st.session_state.user_profile["resume_text"]):
-            st.error("Please provide your Career Goal and at least some skills or a resume.", icon="🚨")
-        else:
-            # Invalidate cache if profile changes
-            st.session_state.analysis_cache = {}
-            st.session_state.page = "Career Advisor"
-            st.success("Profile saved! Navigating to the Career Advisor...")
-            time.sleep(1)
-            st.rerun()
+    def __init__(self, name):
+        self.name = name
+        self.session_id = current_session_id()
+        self.bytes = 0
+        self.spilled_bytes = 0
+        self._lock = threading.RLock()
+        self._memory = get_session_memory()
+        self._dir = self._memory.register(self)
+        weakref.finalize(self, shutil.rmtree, self._dir, True)
 
-def render_career_advisor():
-    st.title("💡 AI Career Advisor")
-    st.markdown("Here are your personalized insights based on your profile.")
+    def _path(self, name):
+        return os.path.join(self._dir, hashlib.sha1(str(name).encode("utf-8")).hexdigest() + ".json.z")
 
-    profile = st.session_state.user_profile
-    if not profile["career_goal"] or (not profile["skills"] and not profile["resume_text"]):
-        st.warning("Please build your profile first to get advice!", icon="⚠️")
-        if st.button("Go to Profile Builder"):
-            st.session_state.page = "Profile Builder"
-            st.rerun()
-        return
+    def _write(self, name, value):
+        os.makedirs(self._dir, exist_ok=True)
+        data = zlib.compress(json.dumps(value, default=str).encode("utf-8"))
+        with open(self._path(name), "wb") as f:
+            f.write(data)
+        return len(data)
 
-    st.markdown(f"### Analysis for: **{profile['career_goal']}**")
+    def _read(self, name):
+        with open(self._path(name), "rb") as f:
+            return json.loads(zlib.decompress(f.read()))
 
-    cache_key = f"{profile['career_goal']}-{'-'.join(sorted(profile['skills']))}"
-    if cache_key in st.session_state.analysis_cache:
-        analysis = st.session_state.analysis_cache[cache_key]
-    else:
-        with st.spinner("Your AI advisor is analyzing your profile... This may take a moment."):
-            prompt = f"""
-            Analyze the user profile for a career as a '{profile['career_goal']}'.
-            User Skills: {', '.join(profile['skills'])}
-            User Resume: {profile['resume_text']}
-            User Interests: {profile['interests']}
+    def _remove(self, name):
+        with contextlib.suppress(OSError):
+            os.remove(self._path(name))
 
-            Provide a detailed analysis in a valid JSON structure. Do NOT include any text outside of the JSON.
-            Example JSON:
-            {{
-                "skill_gap_analysis": {{
-                    "required_skills": ["Python", "SQL", "Data Visualization", "Machine Learning", "Communication"],
-                    "user_has_skills": ["Python", "SQL"],
-                    "missing_skills": ["Data Visualization", "Machine Learning", "Communication"]
-                }},
-                "learning_pathway": [
-                    {{
-                        "skill_to_learn": "Data Visualization",
-                        "recommendation": "Master a library like Matplotlib or Seaborn.",
-                        "resources": [
-                            "Coursera: 'Data Visualization with Python'",
-                            "Project Idea: Create a dashboard analyzing a public dataset (e.g., COVID-19 trends)."
-                        ]
-                    }},
-                    {{
-                        "skill_to_learn": "Machine Learning",
-                        "recommendation": "Understand core concepts and popular libraries.",
-                        "resources": [
-                            "Book: 'Hands-On Machine Learning with Scikit-Learn, Keras & TensorFlow'",
-                            "Project Idea: Build a simple spam classifier for emails."
-                        ]
-                    }}
-                ],
-                "alternative_careers": [
-                    {{
-                        "career_title": "Data Engineer",
-                        "match_reason": "Strong foundation in Python and SQL are highly transferable to data engineering roles."
-                    }}
-                ],
-                "summary": "You have a strong foundational skillset for a Data Analyst role. Focusing on practical application through data visualization and machine learning projects will make you a highly competitive candidate."
-            }}
-            """
-            analysis = get_ai_response(prompt, is_json=True)
-            if analysis:
-                st.session_state.analysis_cache[cache_key] = analysis
-            else:
-                st.error("Failed to get analysis from AI. The model may be overloaded or the request timed out. Please try again later.", icon="🔥")
-                return
 
-    if not analysis:
-        return
-        
-    st.markdown(f'<div class="card"><p><strong>Summary:</strong> {analysis.get("summary", "No summary available.")}</p></div>', unsafe_allow_html=True)
+class BoundedCache(_SpillingContainer, MutableMapping):
+    """
+    LRU mapping for session state. Entries are counted by their JSON size; cold ones spill
+    to disk when SessionMemory asks and are read back transparently on access. Past
+    `max_entries` the least recently used entry is dropped altogether.
+    """
 
-    col1, col2 = st.columns(2)
-    with col1:
-        with st.container(border=True):
-            st.subheader("📊 Skill Gap Analysis")
-            sga = analysis.get("skill_gap_analysis", {})
-            if sga:
-                st.write("**Skills You Have:**")
-                for skill in sga.get("user_has_skills", []):
-                    st.markdown(f"✅ {skill}")
-                
-                st.write("**Skills to Develop:**")
-                for skill in sga.get("missing_skills", []):
-                    st.markdown(f"❌ {skill}")
-            else:
-                st.write("Could not perform skill gap analysis.")
-    with col2:
-         with st.container(border=True):
-            st.subheader("🛤️ Alternative Career Paths")
-            alt_careers = analysis.get("alternative_careers", [])
-            if alt_careers:
-                for career in alt_careers:
-                    with st.expander(f"**{career.get('career_title')}**"):
-                        st.write(career.get('match_reason'))
-            else:
-                st.write("No alternative careers could be identified at this time.")
+    # Mapping's __eq__ disables hashing; SessionMemory tracks containers by identity.
+    __hash__ = object.__hash__
 
-    st.subheader("📚 Your Personalized Learning Pathway")
-    learning_pathway = analysis.get("learning_pathway", [])
-    if learning_pathway:
-        for item in learning_pathway:
-            with st.expander(f"**Learn: {item.get('skill_to_learn')}** - {item.get('recommendation')}"):
-                for resource in item.get("resources", []):
-                    st.markdown(f"- {resource}")
-    else:
-        st.write("Could not generate a learning pathway.")
+    def __init__(self, name, max_entries):
+        super().__init__(name)
+        self.max_entries = max_entries
+        self._hot = OrderedDict()  # key -> [value, size, last access]
+        self._cold = OrderedDict()  # key -> compressed size on disk
 
-def render_market_pulse():
-    st.title("📈 Market Pulse Dashboard")
-    st.markdown("Get real-time insights into the job market for any career.")
+    def __getitem__(self, key):
+        with self._lock:
+            if key in self._hot:
+                entry = self._hot[key]
+                entry[2] = time.monotonic()
+                self._hot.move_to_end(key)
+                return entry[0]
+            if key not in self._cold:
+                raise KeyError(key)
+            value = self._read(key)
+            self._drop_cold(key)
+            self._put(key, value)
+        self._memory.enforce(self.session_id)
+        return value
 
-    job_title = st.text_input("Enter a job title to analyze:", placeholder="e.g., Data Scientist, UX Designer")
+    def __setitem__(self, key, value):
+        with self._lock:
+            self._discard(key)
+            self._put(key, value)
+            while len(self._hot) + len(self._cold) > self.max_entries:
+                self._discard(next(iter(self._cold)) if self._cold else next(iter(self._hot)))
+        self._memory.enforce(self.session_id)
 
-    if st.button("Analyze Market Trends", key="market_pulse_button"):
-        if not job_title:
-            st.error("Please enter a job title.", icon="🚨")
-        else:
-            with st.spinner(f"Analyzing the job market for '{job_title}'..."):
-                prompt = f"""
-                Analyze the current job market for a '{job_title}'. Based on recent trends and data, provide the following information in a valid JSON structure. Do not include any text outside of the JSON.
+    def __delitem__(self, key):
+        with self._lock:
+            if key not in self._hot and key not in self._cold:
+                raise KeyError(key)
+            self._discard(key)
 
-                Example JSON for 'Data Scientist':
-                {{
-                    "market_summary": "The market for Data Scientists remains strong, with high demand in the tech, finance, and healthcare sectors. The role is becoming more specialized, with an emphasis on machine learning operations (MLOps) and cloud platforms.",
-                    "trending_skills": ["Python", "SQL", "TensorFlow/PyTorch", "AWS/GCP/Azure", "MLOps"],
-                    "salary_range": "₹12,00,000 - ₹25,00,000 per annum (India)",
-                    "top_industries": ["Technology & SaaS", "Financial Services", "Healthcare & Pharma"],
-                    "market_sentiment": "Growing"
-                }}
-                """
-                analysis = get_ai_response(prompt, is_json=True)
-                if analysis:
-                    st.session_state.market_pulse_cache[job_title] = analysis
-                else:
-                    st.error("Failed to get market analysis. The model may be overloaded or the request timed out. Please try again later.", icon="🔥")
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._hot or key in self._cold
 
-    if job_title and job_title in st.session_state.market_pulse_cache:
-        data = st.session_state.market_pulse_cache[job_title]
-        st.markdown("---")
-        st.subheader(f"Insights for: {job_title}")
-        
-        st.markdown(f'<div class="card"><p><strong>Market Summary:</strong> {data.get("market_summary", "N/A")}</p></div>', unsafe_allow_html=True)
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self._cold) + list(self._hot))
 
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            st.metric(label="Market Sentiment", value=data.get("market_sentiment", "N/A"))
-        with col2:
-            st.metric(label="Estimated Salary Range (India)", value=data.get("salary_range", "N/A"))
-        
-        c1, c2 = st.columns(2)
-        with c1:
-            with st.container(border=True):
-                st.subheader("🔥 Trending Skills")
-                for skill in data.get("trending_skills", []):
-                    st.markdown(f"- {skill}")
-        
-        with c2:
-            with st.container(border=True):
-                st.subheader("🏢 Top Hiring Industries")
-                for industry in data.get("top_industries", []):
-                    st.markdown(f"- {industry}")
-        
-def render_mock_interview():
-    st.title("🎙️ AI Mock Interview Simulator")
-    st.markdown("Practice your interview skills. The AI will act as your interviewer and provide feedback.")
+    def __len__(self):
+        with self._lock:
+            return len(self._hot) + len(self._cold)
 
-    job_role = st.text_input("Enter the job role you want to practice for:", value=st.session_state.user_profile.get("career_goal", ""))
+    def _put(self, key, value):
+        size = _json_size(value)
+        self._hot[key] = [value, size, time.monotonic()]
+        self.bytes += size
 
-    if st.button("Start New Interview", type="primary") and job_role:
-        st.session_state.interview_active = True
-        st.session_state.interview_feedback = None
-        st.session_state.interview_chat = [{
-            "role": "system",
-            "content": f"You are an expert interviewer for a '{job_role}' position. Introduce yourself and ask the first relevant question. Ask only one question at a time and wait for the user's response before proceeding. Keep your questions concise."
-        }]
-        with st.spinner("Preparing your interviewer..."):
-            ai_response = get_ai_response(st.session_state.interview_chat[0]['content'])
-            if ai_response:
-                st.session_state.interview_chat.append({"role": "bot", "content": ai_response})
-            else:
-                st.session_state.interview_active = False
-        st.rerun()
+    def _drop_cold(self, key):
+        self.spilled_bytes -= self._cold.pop(key)
+        self._remove(key)
 
-    if not st.session_state.interview_active:
-        st.info("Enter a job role and click 'Start New Interview' to begin.")
-        if st.session_state.interview_feedback:
-            st.subheader("📋 Interview Feedback")
-            st.markdown(st.session_state.interview_feedback)
-        return
+    def _discard(self, key):
+        if key in self._hot:
+            self.bytes -= self._hot.pop(key)[1]
+        elif key in self._cold:
+            self._drop_cold(key)
 
-    # Display chat history
-    chat_container = st.container(height=500, border=True)
-    with chat_container:
-        for message in st.session_state.interview_chat[1:]: # Skip system prompt
-            if message["role"] == "user":
-                st.markdown(f'<div class="chat-message user"><div style="flex-grow: 1; text-align: right;">{message["content"]}</div><div class="avatar" style="background-color: #4B8BBE; color: white; display: flex; align-items: center; justify-content: center;">You</div></div>', unsafe_allow_html=True)
-            elif message["role"] == "bot":
-                st.markdown(f'<div class="chat-message bot"><div class="avatar" style="background-color: #1E3A5F; color: white; display: flex; align-items: center; justify-content: center;">AI</div><div>{message["content"]}</div></div>', unsafe_allow_html=True)
-    
-    # User input
-    if user_input := st.chat_input("Your answer..."):
-        st.session_state.interview_chat.append({"role": "user", "content": user_input})
-        
-        prompt_history = "\n".join([f"{'Human' if msg['role'] == 'user' else 'AI'}: {msg['content']}" for msg in st.session_state.interview_chat])
-        
-        with st.spinner("AI is thinking..."):
-            ai_response = get_ai_response(prompt_history)
-            if ai_response:
-                st.session_state.interview_chat.append({"role": "bot", "content": ai_response})
-        st.rerun()
+    def spillable(self):
+        return bool(self._hot)
 
-    if st.button("End Interview & Get Feedback"):
-        st.session_state.interview_active = False
-        with st.spinner("Generating your interview feedback..."):
-            transcript_text = "\n".join([f"{'User' if msg['role'] == 'user' else 'Interviewer'}: {msg['content']}" for msg in st.session_state.interview_chat[1:]])
-            feedback_prompt = f"""
-            The following is a transcript of a job interview for a '{job_role}' position.
-            Please act as a hiring manager and provide constructive feedback for the user (Human).
-            Analyze their responses for clarity, STAR method usage (for behavioral questions), technical accuracy, and overall communication style.
-            Provide a summary of their strengths, areas for improvement, and actionable tips. Format the response in Markdown.
-
-            Transcript:
-            {transcript_text}
-            """
-            feedback = get_ai_response(feedback_prompt)
-            st.session_state.interview_feedback = feedback
-        st.rerun()
-        
-def render_resume_copilot():
-    st.title("📄 Resume & Cover Letter Co-pilot")
-    st.markdown("Tailor your application materials to perfectly match the job you want.")
+    def coldest_access(self):
+        with self._lock:
+            return next(iter(self._hot.values()))[2] if self._hot else float("inf")
 
-    col1, col2 = st.columns(2)
+    def spill_coldest(self):
+        with self._lock:
+            if not self._hot:
+                return 0
+            key, (value, size, _) = self._hot.popitem(last=False)
+            self._cold[key] = self._write(key, value)
+            self.spilled_bytes += self._cold[key]
+            self.bytes -= size
+            return size
 
-    with col1:
-        job_desc = st.text_area("📋 Paste the Job Description Here", height=400, placeholder="e.g., We are looking for a proactive Product Manager...")
-    
-    with col2:
-        resume_content = st.text_area("📝 Paste Your Resume/CV Content Here", height=400, value=st.session_state.user_profile.get("resume_text", ""), placeholder="e.g., John Doe - Experienced Software Engineer...")
+    def entry_counts(self):
+        with self._lock:
+            return len(self._hot), len(self._cold)
 
-    option = st.radio(
-        "What would you like to generate?",
-        ("Critique My Resume", "Draft a Cover Letter"),
-        horizontal=True,
-    )
-    
-    if st.button("Analyze and Generate", key="copilot_generate"):
-        if not job_desc or not resume_content:
-            st.error("Please paste both the job description and your resume content.", icon="🚨")
+
+class SpillingList(_SpillingContainer):
+    """
+    Append-only list for the interview transcript. Under memory pressure its oldest items
+    spill to disk in compressed chunks. The first item (the system prompt) and the recent
+    end stay in memory, and reaching further back reads only the chunks that hold the
+    requested items.
+    """
+
+    # Leading items that never spill: the interview's system prompt is read on every turn.
+    PINNED = 1
+    # Recent items always kept in memory: everything the prompt and the chat view read each turn.
+    KEEP_IN_MEMORY = max(INTERVIEW_VERBATIM_MESSAGES, INTERVIEW_VISIBLE_MESSAGES)
+
+    def __init__(self, name, items=()):
+        super().__init__(name)
+        self._head = []
+        self._chunks = []  # [chunk id, item count, compressed size]
+        self._spilled_count = 0
+        self._tail = []
+        self._sizes = []
+        self._last_access = time.monotonic()
+        for item in items:
+            self._add(item)
+
+    def _add(self, item):
+        size = _json_size(item)
+        if len(self._head) < self.PINNED:
+            self._head.append(item)
         else:
-            with st.spinner("Your AI co-pilot is working its magic..."):
-                if option == "Critique My Resume":
-                    prompt = f"""
-                    Act as a professional resume reviewer. Critique the following resume based on the provided job description. 
-                    
-                    **Job Description:**
-                    {job_desc}
-
-                    **Resume Content:**
-                    {resume_content}
-
-                    Provide a detailed critique covering these areas:
-                    1.  **Keyword Alignment:** Identify key skills and qualifications from the job description that are missing or not emphasized in the resume.
-                    2.  **Action Verb Strength:** Suggest stronger action verbs to make the experience more impactful.
-                    3.  **Quantifiable Results:** Point out where the user could add numbers or metrics to show achievements.
-                    4.  **Overall Impression & Suggestions:** Give a final summary and actionable advice for improvement.
-
-                    Format the output using Markdown.
-                    """
-                else: # Draft a Cover Letter
-                    prompt = f"""
-                    Act as a professional career coach. Write a compelling and professional draft for a cover letter based on the user's resume and the target job description.
-
-                    **Job Description:**
-                    {job_desc}
-
-                    **User's Resume Content:**
-                    {resume_content}
-
-                    The cover letter should:
-                    - Be structured in 3-4 paragraphs.
-                    - Directly address the key requirements from the job description.
-                    - Highlight the most relevant skills and experiences from the user's resume.
-                    - Maintain a professional and enthusiastic tone.
-                    - Be a draft that the user can easily edit and personalize.
-
-                    Format the output using Markdown.
-                    """
-                
-                response = get_ai_response(prompt)
-                if response:
-                    st.markdown("---")
-                    st.subheader("✨ Your AI-Generated Result")
-                    st.markdown(response)
-                else:
-                    st.error("Failed to generate a response. Please try again.", icon="🔥")
+            self._tail.append(item)
+            self._sizes.append(size)
+        self.bytes += size
 
+    def append(self, item):
+        with self._lock:
+            self._add(item)
+            self._last_access = time.monotonic()
+        self._memory.enforce(self.session_id)
 
-# --- Main App Logic ---
-def main():
-    init_session_state()
+    def __len__(self):
+        with self._lock:
+            return len(self._head) + self._spilled_count + len(self._tail)
 
-    with st.sidebar:
+    def __iter__(self):
+        return iter(self._items())
+
+    def __getitem__(self, index):
+        with self._lock:
+            self._last_access = time.monotonic()
+            chunks = {}
+            if isinstance(index, slice):
+                return [self._get(i, chunks) for i in range(len(self))[index]]
+            if index < 0:
+                index += len(self)
+            if not 0 <= index < len(self):
+                raise IndexError("list index out of range")
+            return self._get(index, chunks)
+
+    def _get(self, index, chunks):
+        """Item `index` (0 <= index < len); a spilled one is read with its chunk, once per chunk via `chunks`."""
+        if index < len(self._head):
+            return self._head[index]
+        index -= len(self._head)
+        if index >= self._spilled_count:
+            return self._tail[index - self._spilled_count]
+        for chunk_id, count, _ in self._chunks:
+            if index < count:
+                if chunk_id not in chunks:
+                    chunks[chunk_id] = self._read(chunk_id)
+                return chunks[chunk_id][index]
+            index -= count
+
+    def _items(self):
+        return self[:]
+
+    def spillable(self):
+        return len(self._tail) > self.KEEP_IN_MEMORY
+
+    def coldest_access(self):
+        return self._last_access
+
+    def spill_coldest(self):
+        with self._lock:
+            count = len(self._tail) - self.KEEP_IN_MEMORY
+            if count <= 0:
+                return 0
+            chunk_id = len(self._chunks)
+            compressed = self._write(chunk_id, self._tail[:count])
+            self._chunks.append([chunk_id, count, compressed])
+            freed = sum(self._sizes[:count])
+            del self._tail[:count], self._sizes[:count]
+            self._spilled_count += count
+            self.bytes -= freed
+            self.spilled_bytes += compressed
+            return freed
+
+    def entry_counts(self):
+        with self._lock:
+            return len(self._head) + len(self._tail), self._spilled_count
+
+
+# --- Response Cache ---
+class ResponseCache:
+    """
+    Disk-backed LRU cache for model responses, shared by every session in the process.
+    Entries expire after their TTL and the least recently used ones are evicted
+    once the cache holds more than `max_entries`.
+    """
+
+    def __init__(self, path, max_entries=CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)")
+        self._conn.commit()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[1] <= now:
+                if row is not None:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key, value, ttl):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now + ttl, now),
+            )
+            self._conn.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def stats(self):
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+
+@st.cache_resource
+def get_response_cache():
+    return ResponseCache(os.path.join(CACHE_DIR, "llm_responses.sqlite3"))
+
+
+def _config_to_dict(generation_config):
+    if dataclasses.is_dataclass(generation_config):
+        return dataclasses.asdict(generation_config)
+    if isinstance(generation_config, dict):
+        return generation_config
+    return vars(generation_config)
+
+
+def make_cache_key(prompt, model_name, is_json, generation_config):
+    """Stable hash of everything that determines a model response."""
+    payload = json.dumps(
+        {
+            "prompt": prompt,
+            "model": model_name,
+            "is_json": is_json,
+            "generation_config": _config_to_dict(generation_config),
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@st.cache_resource
+def get_llm_executor():
+    """Thread pool shared by all sessions for model calls and other blocking work kept off the script thread."""
+    return ThreadPoolExecutor(max_workers=LLM_MAX_WORKERS, thread_name_prefix="adept-llm")
+
+
+# --- Model Access ---
+def _genai():
+    # Deferred so pages that never call the model don't pay for importing the SDK.
+    import google.generativeai as genai
+    return genai
+
+
+@st.cache_resource
+def get_model(model_name=MODEL_NAME):
+    """The Gemini client, created on first use and shared by every session in the process."""
+    started = time.perf_counter()
+    genai = _genai()
+    genai.configure(api_key=API_KEY)
+    model = genai.GenerativeModel(model_name)
+    get_metrics().set(
+        "adept_model_init_seconds", "Time to import the Gemini SDK and construct the client.",
+        {"model": model_name}, time.perf_counter() - started,
+    )
+    return model
+
+
+def load_model(model_name=MODEL_NAME):
+    try:
+        return get_model(model_name)
+    except Exception as e:
+        st.error(f"Failed to configure AI model. Please check your API key. Error: {e}", icon="🚨")
+        return None
+
+
+# --- Context Caching ---
+class PrefixedPrompt(str):
+    """
+    A prompt whose opening `prefix` stays the same across calls (instructions, the user's
+    resume) while `suffix` varies. Everywhere else it is an ordinary string; model calls send
+    a large enough prefix as server-side cached content and only the suffix inline.
+    """
+
+    def __new__(cls, prefix, suffix):
+        prompt = super().__new__(cls, prefix + suffix)
+        prompt.prefix = prefix
+        prompt.suffix = suffix
+        return prompt
+
+
+class CachedPrefix:
+    def __init__(self, key, cached_content, model, expires_at):
+        self.key = key
+        self.cached_content = cached_content
+        self.model = model
+        self.expires_at = expires_at
+
+
+class ContextCacheRegistry:
+    """
+    Local bookkeeping for Gemini cached contents, keyed by (model, prefix hash). A prefix is
+    cached from its second sighting within the TTL, in the background, so one-off prefixes
+    never pay for a cache and no request waits on a creation; until the cache exists callers
+    send the full prompt. Lifetimes are tracked here, so a cache about to expire is replaced
+    rather than referenced. Failed creations are not retried until the TTL has passed.
+    """
+
+    def __init__(self, ttl, max_entries, safety_margin=60.0):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # A cache must outlive the request that references it.
+        self.safety_margin = min(safety_margin, ttl / 2)
+        self._entries = OrderedDict()
+        # key -> time until which the sighting / failure counts; both bounded like _entries.
+        self._seen = OrderedDict()
+        self._failed = OrderedDict()
+        self._creating = set()
+        self._lock = threading.Lock()
+
+    def _count(self, result):
+        get_metrics().inc("adept_context_cache_total", "Context cache lookups by result.", {"result": result})
+
+    def _live(self, key, now):
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at - self.safety_margin > now:
+            self._entries.move_to_end(key)
+            return entry
+        return None
+
+    def _remember(self, table, key, until, now):
+        """Sets table[key] = until, dropping lapsed and (past max_entries) oldest keys."""
+        table.pop(key, None)
+        table[key] = until
+        while table and (len(table) > self.max_entries or next(iter(table.values())) <= now):
+            table.popitem(last=False)
+
+    def lookup(self, model_name, prefix):
+        """The cached prefix for this model, or None to send it inline (the first calls, or when it can't be cached)."""
+        key = (model_name, hashlib.sha256(prefix.encode("utf-8")).hexdigest())
+        now = time.time()
+        with self._lock:
+            entry = self._live(key, now)
+            if entry is None and self._entries.pop(key, None) is not None:
+                self._count("expired")
+            if entry is not None or key in self._creating or self._failed.get(key, 0) > now:
+                create = False
+            else:
+                create = self._seen.get(key, 0) > now
+                self._remember(self._seen, key, now + self.ttl, now)
+                if create:
+                    self._creating.add(key)
+        if entry is not None:
+            self._count("hit")
+            return entry
+        if create:
+            get_llm_executor().submit(self._create, key, model_name, prefix)
+        return None
+
+    def _create(self, key, model_name, prefix):
+        expires_at = time.time() + self.ttl
+        try:
+            genai = _genai()
+            cached_content = genai.caching.CachedContent.create(
+                model=model_name,
+                display_name=f"adept-{key[1][:16]}",
+                contents=[prefix],
+                ttl=datetime.timedelta(seconds=self.ttl),
+            )
+            model = genai.GenerativeModel.from_cached_content(cached_content=cached_content)
+        except Exception as e:
+            with self._lock:
+                self._creating.discard(key)
+                self._remember(self._failed, key, time.time() + self.ttl, time.time())
+            self._count("failed")
+            get_metrics().log({"event": "context_cache_failed", "model": model_name, "error": str(e)})
+            return None
+        entry = CachedPrefix(key, cached_content, model, expires_at)
+        with self._lock:
+            self._creating.discard(key)
+            self._entries[key] = entry
+            evicted = []
+            while len(self._entries) > self.max_entries:
+                evicted.append(self._entries.popitem(last=False)[1])
+        self._count("created")
+        for old in evicted:
+            get_llm_executor().submit(self._delete, old)
+        return entry
+
+    def _delete(self, entry):
+        # Best effort: the server deletes it at expiry anyway.
+        with contextlib.suppress(Exception):
+            entry.cached_content.delete()
+
+    def invalidate(self, entry):
+        """Forgets a cache the server no longer has (it expired or was deleted early)."""
+        with self._lock:
+            if self._entries.get(entry.key) is entry:
+                del self._entries[entry.key]
+        self._count("invalidated")
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "failed": len(self._failed)}
+
+
+@st.cache_resource
+def get_context_caches():
+    return ContextCacheRegistry(CONTEXT_CACHE_TTL, CONTEXT_CACHE_MAX_ENTRIES)
+
+
+def wants_context_cache(prompt):
+    return (
+        isinstance(prompt, PrefixedPrompt)
+        and CONTEXT_CACHE_TTL > 0
+        and estimate_tokens(prompt.prefix) >= CONTEXT_CACHE_MIN_TOKENS
+    )
+
+
+def with_context_cache(model, model_name, prompt):
+    """
+    (model, contents, cached prefix) to send: for a PrefixedPrompt with a large enough prefix,
+    a model bound to the cached prefix and just the suffix; otherwise the model and full prompt.
+    """
+    if wants_context_cache(prompt):
+        entry = get_context_caches().lookup(model_name, prompt.prefix)
+        if entry is not None:
+            return entry.model, prompt.suffix, entry
+    return model, prompt, None
+
+
+def drop_context_cache(entry, error):
+    """True when `error` says the server no longer has `entry`'s content; the entry is then forgotten."""
+    if entry is None or classify_error(error) != "bad_request":
+        return False
+    get_context_caches().invalidate(entry)
+    return True
+
+
+# --- Resume Extraction ---
+class ResumeExtractionError(Exception):
+    """Raised when an uploaded resume can't be turned into text."""
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def extract_pdf_text(content_hash, _buffer, _on_progress=None):
+    """
+    Extracts the text of a PDF page by page straight from the upload buffer.
+    Cached on `content_hash` so reruns never parse the same file twice.
+    """
+    import fitz  # PyMuPDF, only needed once someone uploads a PDF
+
+    pages = []
+    with fitz.open(stream=_buffer, filetype="pdf") as doc:
+        if doc.page_count > PDF_MAX_PAGES:
+            raise ResumeExtractionError(
+                f"This PDF has {doc.page_count} pages; resumes of up to {PDF_MAX_PAGES} pages are supported."
+            )
+        for page in doc:
+            pages.append(page.get_text("text"))
+            if _on_progress is not None:
+                _on_progress((page.number + 1) / doc.page_count)
+    return "\n".join(pages).strip()
+
+
+def extract_pdf_text_in_worker(content_hash, buffer):
+    """Runs PDF extraction on the shared pool, showing page progress until it finishes."""
+    progress = {"fraction": 0.0}
+
+    def on_progress(fraction):
+        progress["fraction"] = fraction
+
+    future = get_llm_executor().submit(extract_pdf_text, content_hash, buffer, on_progress)
+    bar = st.progress(0.0, text="Extracting text from your PDF...")
+    while not future.done():
+        bar.progress(progress["fraction"], text="Extracting text from your PDF...")
+        time.sleep(0.05)
+    bar.empty()
+    return future.result()
+
+
+def extract_resume_text(file_type, buffer, content_hash):
+    if buffer.nbytes > PDF_MAX_BYTES:
+        raise ResumeExtractionError(
+            f"This file is {buffer.nbytes / 1024 / 1024:.1f} MB; uploads of up to {PDF_MAX_BYTES / 1024 / 1024:.0f} MB are supported."
+        )
+    if file_type == "application/pdf":
+        return extract_pdf_text_in_worker(content_hash, buffer)
+    return str(buffer, "utf-8")
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key into one execution whose result every caller receives."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            # Followers re-raise whatever stopped the leader, even SystemExit or KeyboardInterrupt.
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+
+@st.cache_resource
+def get_single_flight():
+    return SingleFlight()
+
+
+# --- Metrics ---
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 40.0)
+
+
+class MetricsRegistry:
+    """
+    Process-wide counters and latency histograms, rendered in the Prometheus text
+    format. Every recorded event is also appended to a JSON-lines log when one is configured;
+    the log rotates once it reaches `log_max_bytes` and is written outside the metrics lock.
+    """
+
+    def __init__(self, log_path=None, log_max_bytes=0):
+        self.log_path = log_path
+        self._lock = threading.Lock()
+        self._metrics = {}
+        self._log_handler = None
+        if log_path:
+            os.makedirs(os.path.dirname(log_path) or ".", exist_ok=True)
+            self._log_handler = logging.handlers.RotatingFileHandler(
+                log_path, maxBytes=log_max_bytes, backupCount=1, encoding="utf-8", delay=True
+            )
+
+    def _series(self, kind, name, help_text):
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = {"kind": kind, "help": help_text, "series": {}}
+        return metric["series"]
+
+    def inc(self, name, help_text, labels, amount=1):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series("counter", name, help_text)
+            series[key] = series.get(key, 0) + amount
+
+    def set(self, name, help_text, labels, value):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._series("gauge", name, help_text)[key] = value
+
+    def observe(self, name, help_text, labels, value):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series("histogram", name, help_text)
+            histogram = series.setdefault(key, {"buckets": [0] * len(LATENCY_BUCKETS), "sum": 0.0, "count": 0})
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if value <= bound:
+                    histogram["buckets"][i] += 1
+            histogram["sum"] += value
+            histogram["count"] += 1
+
+    def log(self, event):
+        if self._log_handler is None:
+            return
+        line = json.dumps({"ts": time.time(), **event}, default=str)
+        self._log_handler.handle(logging.makeLogRecord({"msg": line}))
+
+    def prometheus_text(self):
+        def format_labels(key, extra=()):
+            pairs = list(key) + list(extra)
+            if not pairs:
+                return ""
+            return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+        lines = []
+        with self._lock:
+            for name, metric in sorted(self._metrics.items()):
+                lines.append(f"# HELP {name} {metric['help']}")
+                lines.append(f"# TYPE {name} {metric['kind']}")
+                for key, value in sorted(metric["series"].items()):
+                    if metric["kind"] != "histogram":
+                        lines.append(f"{name}{format_labels(key)} {value}")
+                        continue
+                    for bound, count in zip(LATENCY_BUCKETS, value["buckets"]):
+                        lines.append(f"{name}_bucket{format_labels(key, [('le', bound)])} {count}")
+                    lines.append(f"{name}_bucket{format_labels(key, [('le', '+Inf')])} {value['count']}")
+                    lines.append(f"{name}_sum{format_labels(key)} {value['sum']}")
+                    lines.append(f"{name}_count{format_labels(key)} {value['count']}")
+        return "\n".join(lines) + "\n"
+
+    def record_llm_call(self, record):
+        labels = {"call_site": record.call_site or "unknown"}
+        self.observe("adept_llm_call_seconds", "Latency of model calls, including retries.", labels, record.latency)
+        self.inc("adept_llm_calls_total", "Model calls by outcome.", {**labels, "status": record.status})
+        if record.retries:
+            self.inc("adept_llm_retries_total", "Retries issued after failed model calls.", labels, record.retries)
+        if record.prompt_tokens:
+            self.inc("adept_llm_prompt_tokens_total", "Prompt tokens reported by the API.", labels, record.prompt_tokens)
+        if record.response_tokens:
+            self.inc("adept_llm_response_tokens_total", "Response tokens reported by the API.", labels, record.response_tokens)
+        if record.cached_tokens:
+            self.inc("adept_llm_cached_tokens_total", "Prompt tokens served from a context cache.", labels, record.cached_tokens)
+        if record.cache:
+            self.inc("adept_llm_cache_total", "Response cache lookups by result.", {**labels, "result": record.cache})
+        for outcome in record.json_outcomes:
+            self.inc("adept_llm_json_parse_total", "JSON parse outcomes (ok, repaired, failed).", {**labels, "outcome": outcome})
+        for attempt in record.tiers:
+            tier_labels = {**labels, "tier": attempt["tier"]}
+            self.observe("adept_llm_tier_seconds", "Latency of model calls per tier, including retries.", tier_labels, attempt["seconds"])
+            self.inc("adept_llm_tier_calls_total", "Model calls per tier by outcome (ok, escalated, error).",
+                     {**tier_labels, "outcome": attempt["outcome"]})
+            self.inc("adept_llm_cost_usd_total", "Estimated model spend in USD per tier, from reported token counts.",
+                     tier_labels, attempt["cost_usd"])
+            if attempt["outcome"] == "escalated":
+                self.inc("adept_llm_escalations_total", "Answers sent to the next tier, by reason.",
+                         {**tier_labels, "reason": attempt["reason"]})
+        self.log({"event": "llm_call", **vars(record)})
+
+    def record_render(self, page, seconds):
+        self.observe("adept_render_seconds", "Time spent in each page's render function.", {"page": page}, seconds)
+        self.log({"event": "render", "page": page, "latency": seconds})
+
+
+@st.cache_resource
+def get_metrics():
+    return MetricsRegistry(METRICS_LOG_PATH, METRICS_LOG_MAX_BYTES)
+
+
+class LLMCallRecord:
+    """What happened during one logical model call, filled in as the call proceeds."""
+
+    def __init__(self, call_site):
+        self.call_site = call_site
+        self.started = time.perf_counter()
+        self.latency = 0.0
+        self.status = "error"
+        self.retries = 0
+        self.prompt_tokens = 0
+        self.response_tokens = 0
+        self.cached_tokens = 0
+        self.cache = None
+        self.json_outcomes = []
+        # One entry per model tier tried, filled in by track_tier.
+        self.tiers = []
+        self.hedges = 0
+        self.deadline = time.monotonic() + CALL_DEADLINES.get(call_site, DEFAULT_CALL_DEADLINE)
+
+    def add_usage(self, response):
+        usage = getattr(response, "usage_metadata", None)
+        if usage is not None:
+            self.prompt_tokens += getattr(usage, "prompt_token_count", 0) or 0
+            self.response_tokens += getattr(usage, "candidates_token_count", 0) or 0
+            self.cached_tokens += getattr(usage, "cached_content_token_count", 0) or 0
+
+
+@contextlib.contextmanager
+def track_tier(record, tier):
+    """Records one tier's share of a call: latency, tokens, cost and outcome (set by the caller)."""
+    attempt = {"tier": tier, "model": MODEL_TIERS[tier]["model"], "outcome": "error", "reason": None}
+    started = time.perf_counter()
+    prompt_tokens, response_tokens, cached_tokens = record.prompt_tokens, record.response_tokens, record.cached_tokens
+    try:
+        yield attempt
+    finally:
+        attempt["seconds"] = time.perf_counter() - started
+        attempt["prompt_tokens"] = record.prompt_tokens - prompt_tokens
+        attempt["response_tokens"] = record.response_tokens - response_tokens
+        attempt["cached_tokens"] = record.cached_tokens - cached_tokens
+        usd_in, usd_out = MODEL_TIERS[tier]["usd_per_mtok"]
+        input_tokens = attempt["prompt_tokens"] - attempt["cached_tokens"] * (1 - CACHED_INPUT_PRICE_RATIO)
+        attempt["cost_usd"] = (input_tokens * usd_in + attempt["response_tokens"] * usd_out) / 1e6
+        record.tiers.append(attempt)
+
+
+@contextlib.contextmanager
+def track_llm_call(call_site):
+    record = LLMCallRecord(call_site)
+    try:
+        yield record
+    finally:
+        record.latency = time.perf_counter() - record.started
+        get_metrics().record_llm_call(record)
+
+
+def timed_render(page):
+    """Decorator recording how long a page's render function takes."""
+    def decorator(render):
+        @functools.wraps(render)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return render(*args, **kwargs)
+            finally:
+                get_metrics().record_render(page, time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+def _script_run_ctx():
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+    except ImportError:
+        return None
+    return get_script_run_ctx(suppress_warning=True)
+
+
+@contextlib.contextmanager
+def track_payload(run):
+    """
+    Counts the bytes of the messages a script or fragment run sends to the browser over the
+    websocket. Usable as a decorator. Runs nested inside one already being tracked (a
+    fragment during a full app run) are counted only by the outer run.
+    """
+    ctx = _script_run_ctx()
+    enqueue = getattr(ctx, "_enqueue", None)
+    if enqueue is None or getattr(enqueue, "tracking_payload", False):
+        yield
+        return
+    sent = {"bytes": 0, "messages": 0}
+
+    def counting_enqueue(msg):
+        sent["bytes"] += msg.ByteSize()
+        sent["messages"] += 1
+        enqueue(msg)
+
+    counting_enqueue.tracking_payload = True
+    ctx._enqueue = counting_enqueue
+    try:
+        yield
+    finally:
+        ctx._enqueue = enqueue
+        metrics = get_metrics()
+        labels = {"run": run}
+        metrics.inc("adept_payload_runs_total", "Tracked script and fragment runs.", labels)
+        metrics.inc("adept_payload_bytes_total", "Bytes sent to the browser per kind of run.", labels, sent["bytes"])
+        metrics.inc("adept_payload_messages_total", "Messages sent to the browser per kind of run.", labels, sent["messages"])
+        metrics.log({"event": "payload", "run": run, **sent})
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = get_metrics().prometheus_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@st.cache_resource
+def start_metrics_server():
+    """Serves /metrics on METRICS_HOST:METRICS_PORT from a daemon thread (once per process; port 0 disables it)."""
+    if not METRICS_PORT:
+        return None
+    try:
+        server = ThreadingHTTPServer((METRICS_HOST, METRICS_PORT), _MetricsHandler)
+    except OSError as e:
+        logger.warning("Metrics endpoint disabled: could not bind %s:%s (%s)", METRICS_HOST, METRICS_PORT, e)
+        return None
+    threading.Thread(target=server.serve_forever, name="adept-metrics", daemon=True).start()
+    return server
+
+
+# --- Rate Limiting & Circuit Breaking ---
+class TokenBucket:
+    """Token bucket refilled continuously at `rate_per_minute`; reservations may run into debt."""
+
+    def __init__(self, rate_per_minute):
+        self.capacity = float(rate_per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount, max_wait=None):
+        """
+        Takes `amount` tokens and returns how many seconds the caller must wait before using
+        them, or None, taking nothing, when that wait would exceed `max_wait`.
+        """
+        amount = min(float(amount), self.capacity)
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            wait = 0.0 if self.tokens >= amount else (amount - self.tokens) / self.rate
+            if max_wait is not None and wait > max_wait:
+                return None
+            self.tokens -= amount
+            return wait
+
+    def try_take(self, amount):
+        """Takes `amount` tokens only if they are available now."""
+        amount = min(float(amount), self.capacity)
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < amount:
+                return False
+            self.tokens -= amount
+            return True
+
+    def refund(self, amount):
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + min(float(amount), self.capacity))
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute limits shared by every session in the process."""
+
+    def __init__(self, requests_per_minute, tokens_per_minute):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+
+    def reserve(self, estimated_tokens, max_wait=None):
+        """Seconds to wait before sending the request, or None (nothing reserved) if longer than `max_wait`."""
+        request_wait = self.requests.reserve(1, max_wait)
+        if request_wait is None:
+            return None
+        token_wait = self.tokens.reserve(estimated_tokens, max_wait)
+        if token_wait is None:
+            self.requests.refund(1)
+            return None
+        return max(request_wait, token_wait)
+
+    def acquire(self, estimated_tokens, deadline=None):
+        """
+        Waits until the request may be sent. Returns False at once, reserving nothing, when
+        that would be after `deadline` (time.monotonic()).
+        """
+        wait = self.reserve(estimated_tokens, None if deadline is None else deadline - time.monotonic())
+        if wait is None:
+            return False
+        if wait > 0:
+            time.sleep(wait)
+        return True
+
+    def try_acquire(self, estimated_tokens):
+        """Non-blocking acquire, for optional requests (hedges) that should never wait or run into debt."""
+        if not self.tokens.try_take(estimated_tokens):
+            return False
+        if not self.requests.try_take(1):
+            self.tokens.refund(estimated_tokens)
+            return False
+        return True
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive upstream failures so callers fail fast.
+    After `cooldown` seconds a single probe request is let through; an upstream failure
+    re-opens the breaker and any other outcome closes it. A probe that never reports back
+    (an abandoned stream) is given up on after another `cooldown`, so a new one can go out.
+    """
+
+    def __init__(self, failure_threshold, cooldown):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self.probe_started = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            now = time.monotonic()
+            stale_probe = self.probing and now - self.probe_started >= self.cooldown
+            if (not self.probing or stale_probe) and now - self.opened_at >= self.cooldown:
+                self.probing = True
+                self.probe_started = now
+                return True
+            return False
+
+    def retry_in(self):
+        with self._lock:
+            if self.opened_at is None:
+                return 0.0
+            return max(0.0, self.cooldown - (time.monotonic() - self.opened_at))
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def record_failure(self, kind):
+        if kind == "bad_request":
+            # The upstream answered; only the request itself was refused.
+            with self._lock:
+                if self.probing:
+                    self.failures = 0
+                    self.opened_at = None
+                    self.probing = False
+            return
+        with self._lock:
+            self.failures += 1
+            if self.probing or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                self.probing = False
+
+
+@st.cache_resource
+def get_rate_limiter():
+    return RateLimiter(RATE_LIMIT_RPM, RATE_LIMIT_TPM)
+
+
+@st.cache_resource
+def get_circuit_breaker():
+    return CircuitBreaker(BREAKER_FAILURE_THRESHOLD, BREAKER_COOLDOWN)
+
+
+class CallDeadlineExceeded(Exception):
+    """A model call ran out of its call site's deadline. Carries 504 so it classifies as transient."""
+
+    code = 504
+
+
+def rate_limit_deadline_miss(record):
+    """The error for a call whose rate-limiter wait would outlast its deadline, counted as a deadline miss."""
+    get_metrics().inc("adept_llm_deadline_misses_total", "Model calls that ran out of their deadline, by stage.",
+                      {"call_site": record.call_site or "unknown", "stage": "rate_limit"})
+    return CallDeadlineExceeded(f"The {record.call_site} call would wait past its deadline for rate-limit capacity.")
+
+
+class Hedger:
+    """
+    Decides when a slow model call gets a duplicate request: once it has run past the p95
+    latency observed for its (call site, model), and only while hedges stay under
+    `max_fraction` of calls. Every call earns `max_fraction` of a hedge credit; a hedge spends one.
+    """
+
+    def __init__(self, max_fraction, min_delay, min_samples, window=200, max_credit=5.0):
+        self.max_fraction = max_fraction
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.window = window
+        self.max_credit = max_credit
+        # Starts full, like TokenBucket, so a burst of slow calls right after startup can still be hedged.
+        self.credit = max_credit
+        self._latencies = {}
+        self._lock = threading.Lock()
+
+    def observe(self, key, seconds):
+        with self._lock:
+            self._latencies.setdefault(key, deque(maxlen=self.window)).append(seconds)
+
+    def hedge_delay(self, key):
+        """Seconds to wait before hedging this call, or None while there is too little data. Counts the call."""
+        if self.max_fraction <= 0:
+            return None
+        with self._lock:
+            self.credit = min(self.max_credit, self.credit + self.max_fraction)
+            samples = self._latencies.get(key)
+            if samples is None or len(samples) < self.min_samples:
+                return None
+            ordered = sorted(samples)
+        return max(self.min_delay, ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))])
+
+    def try_hedge(self):
+        with self._lock:
+            if self.credit < 1:
+                return False
+            self.credit -= 1
+            return True
+
+    def stats(self):
+        with self._lock:
+            return {"credit": self.credit, "keys": len(self._latencies)}
+
+
+@st.cache_resource
+def get_hedger():
+    return Hedger(HEDGE_MAX_FRACTION, HEDGE_MIN_DELAY, HEDGE_MIN_SAMPLES)
+
+
+@st.cache_resource
+def get_hedge_executor():
+    """
+    Threads for hedgeable calls, separate from the LLM pool so a call made from that pool
+    can't wait on itself. It never queues work, so it bounds how many calls are hedged at
+    once, not how many model calls the process makes (see _call_model).
+    """
+    return BoundedExecutor(HEDGE_THREADS, "adept-hedge")
+
+
+_BAD_REQUEST_ERRORS = {"InvalidArgument", "BadRequest", "PermissionDenied", "Unauthenticated", "Unauthorized", "NotFound", "FailedPrecondition"}
+
+
+def classify_error(error):
+    """Buckets a model API error as "quota", "bad_request" or "transient"."""
+    code = getattr(error, "code", None)
+    name = type(error).__name__
+    if code == 429 or name in ("ResourceExhausted", "TooManyRequests"):
+        return "quota"
+    if code in (400, 401, 403, 404) or name in _BAD_REQUEST_ERRORS or isinstance(error, (ValueError, TypeError)):
+        return "bad_request"
+    return "transient"
+
+
+def retry_hint(error):
+    """Seconds the server asked us to wait before retrying, if it said."""
+    for detail in getattr(error, "details", None) or []:
+        delay = getattr(detail, "retry_delay", None)
+        if delay is not None and hasattr(delay, "seconds"):
+            return delay.seconds + getattr(delay, "nanos", 0) / 1e9
+    match = re.search(r"retry in ([\d.]+)\s*s", str(error), re.IGNORECASE) or re.search(
+        r"retry_delay\s*{\s*seconds:\s*(\d+)", str(error)
+    )
+    return float(match.group(1)) if match else None
+
+
+def backoff_delay(error, attempt, deadline=None):
+    """
+    Jittered delay before retry number `attempt + 1`, or None when the error shouldn't be
+    retried, including when the retry could not start before `deadline` (time.monotonic()).
+    """
+    kind = classify_error(error)
+    if kind == "bad_request" or attempt >= RETRY_ATTEMPTS - 1:
+        return None
+    # Full jitter keeps sessions that failed together from retrying together.
+    delay = random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+    hint = retry_hint(error)
+    if hint is not None:
+        if hint > RETRY_MAX_DELAY:
+            return None
+        delay = hint + random.uniform(0, RETRY_BASE_DELAY)
+    if deadline is not None and time.monotonic() + delay >= deadline:
+        return None
+    return delay
+
+
+def ai_error_message(error):
+    """(message, icon) telling the user why a model call failed."""
+    kind = classify_error(error)
+    if isinstance(error, CallDeadlineExceeded) or getattr(error, "code", None) == 504:
+        return "The AI model took too long to respond. Please try again.", "⏱️"
+    if kind == "quota":
+        return "The AI service is receiving too many requests right now. Please try again in a minute.", "🔥"
+    if kind == "bad_request":
+        return f"The AI model could not process this request. Error: {error}", "🔥"
+    return f"AI model request failed after multiple retries. Error: {error}", "🔥"
+
+
+def report_ai_error(error):
+    message, icon = ai_error_message(error)
+    st.error(message, icon=icon)
+
+
+def circuit_open_message(breaker):
+    return f"The AI service is temporarily unavailable. Please try again in {breaker.retry_in():.0f} seconds."
+
+
+def check_circuit(breaker):
+    if breaker.allow():
+        return True
+    st.error(circuit_open_message(breaker), icon="🔌")
+    return False
+
+
+class AIResponseError(Exception):
+    """A failed streamed response, raised instead of shown when the stream runs in a background job."""
+
+
+class AIServiceError(Exception):
+    """
+    Why an async model call failed, for callers with no page to show an error on (the HTTP
+    service). `reason` is "circuit_open", "rate_limited", "bad_request", "deadline" or
+    "unavailable"; `retry_after` is in seconds, when known.
+    """
+
+    def __init__(self, reason, message, retry_after=None):
+        super().__init__(message)
+        self.reason = reason
+        self.retry_after = retry_after
+
+    @classmethod
+    def from_error(cls, error):
+        message, _ = ai_error_message(error)
+        if isinstance(error, CallDeadlineExceeded) or getattr(error, "code", None) == 504:
+            return cls("deadline", message)
+        kind = classify_error(error)
+        if kind == "quota":
+            return cls("rate_limited", message, retry_hint(error))
+        if kind == "bad_request":
+            return cls("bad_request", message)
+        return cls("unavailable", message)
+
+
+# --- AI Helper Functions ---
+def estimate_tokens(text):
+    """Cheap local token estimate (~4 characters per token for English text)."""
+    return max(1, len(text) // 4) if text else 0
+
+
+def model_route(call_site):
+    return MODEL_ROUTES.get(call_site, ("standard",))
+
+
+def _default_generation_config(is_json=False, response_schema=None, tier="standard"):
+    # A plain dict is accepted wherever a GenerationConfig is, and keeps cache hits free of the SDK.
+    generation_config = {
+        # Only one candidate for now.
+        "candidate_count": 1,
+        "temperature": MODEL_TIERS[tier]["temperature"],
+    }
+    if MODEL_TIERS[tier]["max_output_tokens"]:
+        generation_config["max_output_tokens"] = MODEL_TIERS[tier]["max_output_tokens"]
+    if is_json:
+        generation_config["response_mime_type"] = "application/json"
+        if response_schema is not None:
+            generation_config["response_schema"] = response_schema
+    return generation_config
+
+
+def _close_truncated_json(text):
+    """Closes strings, arrays and objects left open by output that was cut off mid-structure."""
+    closers = []
+    in_string = False
+    escaped = False
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            closers.append("}" if char == "{" else "]")
+        elif char in "}]" and closers:
+            closers.pop()
+    if in_string:
+        text = (text[:-1] if escaped else text) + '"'
+    text = text.rstrip()
+    # Drop a dangling `"key":` or a key that never got its colon.
+    text = re.sub(r',?\s*"(?:[^"\\]|\\.)*"\s*:\s*$', "", text)
+    if closers and closers[-1] == "}":
+        text = re.sub(r'([{,])\s*"(?:[^"\\]|\\.)*"$', r"\1", text)
+    text = text.rstrip().rstrip(",")
+    return text + "".join(reversed(closers))
+
+
+def parse_json_response(text):
+    """
+    Parses model output as JSON, repairing common damage locally instead of asking the
+    model again: code fences, prose around the payload, trailing commas and truncation.
+    Returns (data, outcome) where outcome is "ok" or "repaired"; raises ValueError if
+    nothing usable can be recovered.
+    """
+    text = text.strip()
+    try:
+        return json.loads(text), "ok"
+    except ValueError:
+        pass
+
+    fenced = re.search(r"```(?:json)?\s*(.*?)(?:```|$)", text, re.DOTALL)
+    if fenced:
+        text = fenced.group(1).strip()
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    if not starts:
+        raise ValueError("No JSON object found in the model response.")
+    text = text[min(starts):]
+    try:
+        # raw_decode ignores any prose that follows a complete payload.
+        return json.JSONDecoder().raw_decode(text)[0], "repaired"
+    except ValueError:
+        pass
+    repaired = _close_truncated_json(re.sub(r",\s*([}\]])", r"\1", text))
+    return json.loads(repaired), "repaired"
+
+
+_SCHEMA_TYPES = {"OBJECT": dict, "ARRAY": list, "STRING": str, "INTEGER": int, "NUMBER": (int, float), "BOOLEAN": bool}
+_REFUSAL = re.compile(r"^\s*(?:I'm sorry|I am sorry|I cannot|I can't|As an AI\b)", re.IGNORECASE)
+
+
+def schema_problem(value, schema):
+    """The first way `value` falls short of a response schema (wrong type, missing or empty required field), or None."""
+    expected = _SCHEMA_TYPES.get(str(schema.get("type", "STRING")).upper(), object)
+    if not isinstance(value, expected) or (expected is int and isinstance(value, bool)):
+        return "schema"
+    if isinstance(value, dict):
+        for key in schema.get("required", ()):
+            if key not in value or value[key] in ("", [], {}, None):
+                return "missing_field"
+        for key, sub_schema in schema.get("properties", {}).items():
+            if key in value and value[key] is not None:
+                problem = schema_problem(value[key], sub_schema)
+                if problem:
+                    return problem
+    elif isinstance(value, list):
+        for item in value:
+            problem = schema_problem(item, schema.get("items", {}))
+            if problem:
+                return problem
+    return None
+
+
+def answer_problem(result, is_json, response_schema):
+    """Why an answer should go to the next tier of its route, or None when it is good enough."""
+    if is_json:
+        if response_schema is not None:
+            return schema_problem(result, response_schema)
+        return None if result else "empty"
+    text = result.strip()
+    if len(text) < 20:
+        return "too_short"
+    if _REFUSAL.match(text):
+        return "refusal"
+    return None
+
+
+class LowQualityAnswer(Exception):
+    """Raised by a non-final tier whose answer is unusable, so the cascade moves to the next tier."""
+
+    def __init__(self, reason):
+        super().__init__(reason)
+        self.reason = reason
+
+
+def _record_hedge(record, outcome):
+    get_metrics().inc("adept_llm_hedges_total", "Hedged model calls by outcome (won, lost, over_budget).",
+                      {"call_site": record.call_site or "unknown", "outcome": outcome})
+
+
+class BoundedExecutor:
+    """A thread pool that turns work away, rather than queueing it, once every thread is busy."""
+
+    def __init__(self, max_workers, thread_name_prefix):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        self._slots = threading.BoundedSemaphore(max_workers)
+
+    def try_submit(self, fn, admit=None):
+        """
+        Runs fn on an idle thread and returns its Future, or None when no thread is idle or
+        `admit()` (called only once a thread is held) says no.
+        """
+        if not self._slots.acquire(blocking=False):
+            return None
+        if admit is not None and not admit():
+            self._slots.release()
+            return None
+        future = self._pool.submit(fn)
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+
+def _hedge_allowed(hedger, prompt, record):
+    if hedger.try_hedge() and get_rate_limiter().try_acquire(estimate_tokens(str(prompt)) + EXPECTED_OUTPUT_TOKENS):
+        record.hedges += 1
+        return True
+    _record_hedge(record, "over_budget")
+    return False
+
+
+def _call_model(model, prompt, generation_config, record):
+    """
+    One generate_content request bounded by the call's deadline. If it is still running after
+    the observed p95 a duplicate is sent and the first answer wins; the losing request can't be
+    cancelled mid-flight from a thread, so its answer is dropped.
+
+    Both requests run on the hedge pool, so the caller can take the duplicate's answer without
+    waiting on the primary. When the pool has no idle thread the call runs unhedged on the
+    caller's thread, and a duplicate is only sent if a thread is free for it.
+    """
+    remaining = record.deadline - time.monotonic()
+    if remaining <= 0:
+        raise CallDeadlineExceeded(f"No time left in the {record.call_site} deadline.")
+    key = (record.call_site, model.model_name)
+    hedger = get_hedger()
+    hedge_after = hedger.hedge_delay(key)
+
+    def request():
+        started = time.perf_counter()
+        response = model.generate_content(
+            prompt, generation_config=generation_config,
+            request_options={"timeout": max(0.001, record.deadline - time.monotonic())},
+        )
+        hedger.observe(key, time.perf_counter() - started)
+        return response
+
+    if hedge_after is None or hedge_after >= remaining:
+        return request()
+
+    pool = get_hedge_executor()
+    primary = pool.try_submit(request)
+    if primary is None:
+        return request()
+    pending = {primary}
+    if not wait(pending, timeout=hedge_after).done:
+        hedge = pool.try_submit(request, admit=lambda: _hedge_allowed(hedger, prompt, record))
+        if hedge is not None:
+            pending.add(hedge)
+    error = None
+    while pending:
+        done, pending = wait(pending, timeout=max(0.0, record.deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+        if not done:
+            raise CallDeadlineExceeded(f"The {record.call_site} call ran past its deadline.")
+        for future in done:
+            if future.exception() is None:
+                if record.hedges:
+                    _record_hedge(record, "lost" if future is primary else "won")
+                return future.result()
+            error = future.exception()
+    raise error
+
+
+async def _call_model_async(model, prompt, generation_config, record):
+    """Asyncio counterpart of _call_model; here the losing request is cancelled."""
+    remaining = record.deadline - time.monotonic()
+    if remaining <= 0:
+        raise CallDeadlineExceeded(f"No time left in the {record.call_site} deadline.")
+    key = (record.call_site, model.model_name)
+    hedger = get_hedger()
+    hedge_after = hedger.hedge_delay(key)
+
+    async def request():
+        started = time.perf_counter()
+        response = await model.generate_content_async(
+            prompt, generation_config=generation_config,
+            request_options={"timeout": max(0.001, record.deadline - time.monotonic())},
+        )
+        hedger.observe(key, time.perf_counter() - started)
+        return response
+
+    primary = asyncio.ensure_future(request())
+    pending = {primary}
+    try:
+        if hedge_after is not None and hedge_after < remaining:
+            done, _ = await asyncio.wait(pending, timeout=hedge_after)
+            if not done and _hedge_allowed(hedger, prompt, record):
+                pending.add(asyncio.ensure_future(request()))
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, timeout=max(0.0, record.deadline - time.monotonic()), return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done:
+                raise CallDeadlineExceeded(f"The {record.call_site} call ran past its deadline.")
+            for task in done:
+                if task.exception() is None:
+                    if record.hedges:
+                        _record_hedge(record, "lost" if task is primary else "won")
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def _generate_response(prompt, is_json, generation_config, record, tier="standard", escalate=False):
+    model = load_model(MODEL_TIERS[tier]["model"])
+    if model is None:
+        return None
+    target, contents, cached_prefix = with_context_cache(model, MODEL_TIERS[tier]["model"], prompt)
+    limiter = get_rate_limiter()
+    breaker = get_circuit_breaker()
+    for attempt in range(RETRY_ATTEMPTS):
+        record.retries = attempt
+        if not check_circuit(breaker):
+            return None
+        if not limiter.acquire(estimate_tokens(str(prompt)) + EXPECTED_OUTPUT_TOKENS, record.deadline):
+            report_ai_error(rate_limit_deadline_miss(record))
+            return None
+        try:
+            response = _call_model(target, contents, generation_config, record)
+            record.add_usage(response)
+            text = response.text
+        except Exception as e:
+            # Recorded first, so a probe that fails on a dropped cache still settles the breaker.
+            breaker.record_failure(classify_error(e))
+            if attempt < RETRY_ATTEMPTS - 1 and drop_context_cache(cached_prefix, e):
+                # The server dropped the cached prefix before our bookkeeping expected; send it inline.
+                target, contents, cached_prefix = model, prompt, None
+                continue
+            delay = backoff_delay(e, attempt, record.deadline)
+            if delay is None:
+                report_ai_error(e)
+                return None
+            time.sleep(delay)
+            continue
+
+        breaker.record_success()
+        if not is_json:
+            return text
+        try:
+            data, outcome = parse_json_response(text)
+            record.json_outcomes.append(outcome)
+            return data
+        except ValueError as e:
+            record.json_outcomes.append("failed")
+            if escalate:
+                # Cheaper to hand the request to the next tier than to retry a model that just failed it.
+                raise LowQualityAnswer("malformed_json")
+            if attempt == RETRY_ATTEMPTS - 1:
+                st.error(f"AI model returned malformed JSON after multiple retries. Error: {e}", icon="🔥")
+    return None
+
+
+def get_ai_response(prompt, is_json=False, call_site=None, response_schema=None):
+    """
+    Generic function to get a response from the AI model.
+    The call site's route (MODEL_ROUTES) picks the model tier; cascading routes escalate to
+    the next tier only when an answer fails answer_problem. Each call must finish within its
+    call site's CALL_DEADLINES entry, retries included, and a request still running past the
+    observed p95 is hedged with a duplicate (see Hedger). Calls pass through the shared rate limiter and circuit breaker, and retryable errors
+    are retried with jittered exponential backoff. Call sites with an entry in CACHE_TTLS
+    are served from the shared response cache when an identical request was made before,
+    and identical requests already in flight in another session share its result.
+    JSON calls use the model's JSON mode, constrained by `response_schema` when given.
+    """
+    with track_llm_call(call_site) as record:
+        result = _get_ai_response(prompt, is_json, call_site, response_schema, record)
+        record.status = "ok" if result is not None else "error"
+        return result
+
+
+def _route_cache_key(prompt, call_site, is_json, response_schema):
+    route = model_route(call_site)
+    return make_cache_key(
+        prompt,
+        ",".join(MODEL_TIERS[tier]["model"] for tier in route),
+        is_json,
+        {tier: _default_generation_config(is_json, response_schema, tier) for tier in route},
+    )
+
+
+def _cascade(prompt, is_json, call_site, response_schema, record):
+    route = model_route(call_site)
+    for position, tier in enumerate(route):
+        escalate = position < len(route) - 1
+        with track_tier(record, tier) as attempt:
+            generation_config = _default_generation_config(is_json, response_schema, tier)
+            try:
+                result = _generate_response(prompt, is_json, generation_config, record, tier, escalate)
+                # A failed call is not escalated: the next tier sits behind the same quota and breaker.
+                problem = answer_problem(result, is_json, response_schema) if escalate and result is not None else None
+            except LowQualityAnswer as e:
+                result, problem = None, e.reason
+            attempt["outcome"], attempt["reason"] = ("escalated" if problem else "ok" if result is not None else "error"), problem
+        if problem is None:
+            return result
+    return None
+
+
+def _get_ai_response(prompt, is_json, call_site, response_schema, record):
+    ttl = CACHE_TTLS.get(call_site, 0)
+    if ttl <= 0:
+        return _cascade(prompt, is_json, call_site, response_schema, record)
+
+    cache = get_response_cache()
+    cache_key = _route_cache_key(prompt, call_site, is_json, response_schema)
+    cached = cache.get(cache_key)
+    record.cache = "hit" if cached is not None else "miss"
+    if cached is not None:
+        return cached
+
+    def generate_and_cache():
+        # Another caller may have finished the same request while we waited for the flight slot.
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+        result = _cascade(prompt, is_json, call_site, response_schema, record)
+        if result is not None:
+            cache.set(cache_key, result, ttl)
+        return result
+
+    return get_single_flight().do(cache_key, generate_and_cache)
+
+
+class AsyncSingleFlight:
+    """SingleFlight for coroutines: concurrent awaits of the same key share one task."""
+
+    def __init__(self):
+        self._tasks = {}
+
+    async def do(self, key, coroutine_fn):
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(coroutine_fn())
+            self._tasks[key] = task
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        return await asyncio.shield(task)
+
+
+async def _generate_response_async(prompt, is_json, generation_config, record, tier="standard", escalate=False):
+    """Async counterpart of _generate_response. Failures raise AIServiceError instead of calling st.error."""
+    try:
+        model = get_model(MODEL_TIERS[tier]["model"])
+    except Exception as e:
+        raise AIServiceError("unavailable", f"The AI model could not be configured. Error: {e}")
+    target, contents, cached_prefix = model, prompt, None
+    if wants_context_cache(prompt):
+        # Creating the cache is a blocking API call.
+        target, contents, cached_prefix = await asyncio.get_running_loop().run_in_executor(
+            None, with_context_cache, model, MODEL_TIERS[tier]["model"], prompt
+        )
+    limiter = get_rate_limiter()
+    breaker = get_circuit_breaker()
+    for attempt in range(RETRY_ATTEMPTS):
+        record.retries = attempt
+        if not breaker.allow():
+            raise AIServiceError("circuit_open", circuit_open_message(breaker), breaker.retry_in())
+        wait = limiter.reserve(estimate_tokens(str(prompt)) + EXPECTED_OUTPUT_TOKENS, record.deadline - time.monotonic())
+        if wait is None:
+            raise AIServiceError("rate_limited", str(rate_limit_deadline_miss(record)))
+        if wait > 0:
+            await asyncio.sleep(wait)
+        try:
+            response = await _call_model_async(target, contents, generation_config, record)
+            record.add_usage(response)
+            text = response.text
+        except Exception as e:
+            breaker.record_failure(classify_error(e))
+            if attempt < RETRY_ATTEMPTS - 1 and drop_context_cache(cached_prefix, e):
+                target, contents, cached_prefix = model, prompt, None
+                continue
+            delay = backoff_delay(e, attempt, record.deadline)
+            if delay is None:
+                raise AIServiceError.from_error(e) from e
+            await asyncio.sleep(delay)
+            continue
+
+        breaker.record_success()
+        if not is_json:
+            return text
+        try:
+            data, outcome = parse_json_response(text)
+            record.json_outcomes.append(outcome)
+            return data
+        except ValueError:
+            record.json_outcomes.append("failed")
+            if escalate:
+                raise LowQualityAnswer("malformed_json")
+    return None
+
+
+async def _cascade_async(prompt, is_json, call_site, response_schema, record):
+    route = model_route(call_site)
+    for position, tier in enumerate(route):
+        escalate = position < len(route) - 1
+        with track_tier(record, tier) as attempt:
+            generation_config = _default_generation_config(is_json, response_schema, tier)
+            try:
+                result = await _generate_response_async(prompt, is_json, generation_config, record, tier, escalate)
+                problem = answer_problem(result, is_json, response_schema) if escalate and result is not None else None
+            except LowQualityAnswer as e:
+                result, problem = None, e.reason
+            attempt["outcome"], attempt["reason"] = ("escalated" if problem else "ok" if result is not None else "error"), problem
+        if problem is None:
+            return result
+    return None
+
+
+async def get_ai_response_async(prompt, is_json=False, call_site=None, response_schema=None, single_flight=None):
+    """
+    Asyncio counterpart of get_ai_response for the HTTP service, built on generate_content_async.
+    Shares the response cache, rate limiter, circuit breaker and metrics with the sync path;
+    pass an AsyncSingleFlight owned by the event loop to coalesce identical in-flight requests.
+    Raises AIServiceError when the model can't be reached or refuses the request; None means
+    the answers it gave were unusable.
+    """
+    with track_llm_call(call_site) as record:
+        ttl = CACHE_TTLS.get(call_site, 0)
+        if ttl <= 0:
+            result = await _cascade_async(prompt, is_json, call_site, response_schema, record)
+        else:
+            cache = get_response_cache()
+            cache_key = _route_cache_key(prompt, call_site, is_json, response_schema)
+            result = cache.get(cache_key)
+            record.cache = "hit" if result is not None else "miss"
+            if result is None:
+                async def generate_and_cache():
+                    result = await _cascade_async(prompt, is_json, call_site, response_schema, record)
+                    if result is not None:
+                        cache.set(cache_key, result, ttl)
+                    return result
+
+                if single_flight is not None:
+                    result = await single_flight.do(cache_key, generate_and_cache)
+                else:
+                    result = await generate_and_cache()
+        record.status = "ok" if result is not None else "error"
+        return result
+
+
+def _chunk_text(chunk):
+    # Trailing stream chunks can carry only a finish reason, in which case `.text` raises.
+    try:
+        return chunk.text
+    except ValueError:
+        return ""
+
+
+def get_ai_response_stream(prompt, call_site=None, raise_errors=False):
+    """
+    Streaming counterpart of get_ai_response for text responses; yields chunks as they arrive.
+    Failures before the first chunk are retried with the same limiter, breaker and backoff.
+    Once text has been shown to the user an error ends the stream instead of restarting it.
+    Errors are shown with st.error, or raised as AIResponseError with `raise_errors` (for
+    background jobs, which have no page to show them on).
+    """
+    def fail(message, icon="🔥"):
+        if raise_errors:
+            raise AIResponseError(message)
+        st.error(message, icon=icon)
+
+    with track_llm_call(call_site) as record:
+        tier = model_route(call_site)[0]
+        generation_config = _default_generation_config(tier=tier)
+        ttl = CACHE_TTLS.get(call_site, 0)
+        cache = get_response_cache() if ttl > 0 else None
+        if cache is not None:
+            cache_key = make_cache_key(prompt, MODEL_TIERS[tier]["model"], False, generation_config)
+            cached = cache.get(cache_key)
+            record.cache = "hit" if cached is not None else "miss"
+            if cached is not None:
+                record.status = "ok"
+                yield cached
+                return
+
+        with track_tier(record, tier) as tier_call:
+            model = load_model(MODEL_TIERS[tier]["model"])
+            if model is None:
+                fail("The AI model could not be configured. Please check the API key.", "🚨")
+                return
+            target, contents, cached_prefix = with_context_cache(model, MODEL_TIERS[tier]["model"], prompt)
+            limiter = get_rate_limiter()
+            breaker = get_circuit_breaker()
+            for attempt in range(RETRY_ATTEMPTS):
+                record.retries = attempt
+                if not breaker.allow():
+                    fail(circuit_open_message(breaker), "🔌")
+                    return
+                if not limiter.acquire(estimate_tokens(str(prompt)) + EXPECTED_OUTPUT_TOKENS, record.deadline):
+                    fail(*ai_error_message(rate_limit_deadline_miss(record)))
+                    return
+                received = []
+                try:
+                    response = target.generate_content(
+                        contents, generation_config=generation_config, stream=True,
+                        request_options={"timeout": max(0.001, record.deadline - time.monotonic())},
+                    )
+                    for chunk in response:
+                        text = _chunk_text(chunk)
+                        if text:
+                            received.append(text)
+                            yield text
+                    record.add_usage(response)
+                except Exception as e:
+                    breaker.record_failure(classify_error(e))
+                    if not received and attempt < RETRY_ATTEMPTS - 1 and drop_context_cache(cached_prefix, e):
+                        target, contents, cached_prefix = model, prompt, None
+                        continue
+                    if received:
+                        fail(f"The AI response was interrupted. Error: {e}")
+                        return
+                    delay = backoff_delay(e, attempt, record.deadline)
+                    if delay is None:
+                        fail(*ai_error_message(e))
+                        return
+                    time.sleep(delay)
+                    continue
+
+                breaker.record_success()
+                if received:
+                    record.status = tier_call["outcome"] = "ok"
+                    if cache is not None:
+                        cache.set(cache_key, "".join(received), ttl)
+                return
+
+
+# --- Background Jobs ---
+JOB_QUEUE_FULL_MESSAGE = "The server is busy right now. Please try again in a moment."
+
+
+class Job:
+    """One background generation. Streaming jobs accumulate their output in `text` as it arrives."""
+
+    def __init__(self, kind, session_id):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.session_id = session_id
+        self.status = "queued"
+        self.text = ""
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.finished_at = None
+        self.future = None
+        self._cancel = threading.Event()
+
+    @property
+    def finished(self):
+        return self.status in ("done", "failed", "cancelled")
+
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def cancel(self):
+        self._cancel.set()
+        if self.future is not None and self.future.cancel():
+            self.status = "cancelled"
+            self.finished_at = time.time()
+
+    def append(self, text):
+        self.text += text
+
+
+class JobExecutor:
+    """
+    Process-wide pool for long generations. Jobs outlive the script run that started them,
+    so navigating away doesn't throw their work away: the session keeps the job ID and
+    collects the result the next time it renders. At most `max_workers` jobs run and
+    `max_queued` more wait; beyond that, submit returns None.
+
+    The executor is a cache_resource, so it outlives the module instance Streamlit re-creates
+    on every run; it signals with return values rather than exception classes that a later
+    run would not recognise.
+    """
+
+    def __init__(self, max_workers, max_queued, retention):
+        self.retention = retention
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="adept-job")
+        self._slots = threading.BoundedSemaphore(max_workers + max_queued)
+        self._lock = threading.Lock()
+        self._jobs = {}
+
+    def submit(self, kind, fn):
+        """
+        Runs fn(job) in the background and returns the job, or None when the queue is full.
+        fn's return value is the result (None meaning failure); if it raises, the job fails
+        with the exception's message in `error`, keeping any partial `text`.
+        """
+        if not self._slots.acquire(blocking=False):
+            get_metrics().inc("adept_jobs_rejected_total", "Jobs turned away because the queue was full.", {"kind": kind})
+            return None
+        job = Job(kind, current_session_id())
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        job.future = self._pool.submit(self._run, job, fn)
+        job.future.add_done_callback(lambda _: self._slots.release())
+        return job
+
+    def _run(self, job, fn):
+        if job.cancelled():
+            job.status = "cancelled"
+        else:
+            job.status = "running"
+            try:
+                job.result = fn(job)
+                job.status = "cancelled" if job.cancelled() else "done" if job.result is not None else "failed"
+            except Exception as e:
+                job.error = str(e)
+                job.status = "failed"
+        job.finished_at = time.time()
+        labels = {"kind": job.kind, "status": job.status}
+        get_metrics().inc("adept_jobs_total", "Background jobs by kind and final status.", labels)
+        get_metrics().observe("adept_job_seconds", "Background job time from submission to finish.", {"kind": job.kind}, job.finished_at - job.created)
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _prune(self):
+        cutoff = time.time() - self.retention
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.finished and (job.finished_at or 0) < cutoff]:
+            del self._jobs[job_id]
+
+    def stats(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return {status: sum(job.status == status for job in jobs) for status in ("queued", "running", "done", "failed", "cancelled")}
+
+
+@st.cache_resource
+def get_job_executor():
+    return JobExecutor(JOB_MAX_WORKERS, JOB_MAX_QUEUED, JOB_RETENTION_SECONDS)
+
+
+def stream_into_job(job, chunks):
+    """
+    Consumes a response stream into job.text, stopping early when the job is cancelled.
+    Open the stream with raise_errors=True, so a failure fails the job instead of passing
+    for a complete answer.
+    """
+    try:
+        for chunk in chunks:
+            job.append(chunk)
+            if job.cancelled():
+                break
+    finally:
+        chunks.close()
+    return job.text or None
+
+
+def collect_job(job_id):
+    """The job if it has finished (or expired, as None with finished=True), so the caller can take its result."""
+    job = get_job_executor().get(job_id)
+    return job, job is None or job.finished
+
+
+# --- Prompt Building ---
+# Heading keywords by how much they matter to the model; sections not listed get priority 1.
+SECTION_PRIORITIES = {
+    3: ("experience", "employment", "work history", "professional experience", "skills", "technical skills",
+        "core competencies", "responsibilities", "requirements", "qualifications", "what you'll do",
+        "what you will do", "what we're looking for", "what we are looking for", "role"),
+    2: ("projects", "education", "certifications", "summary", "profile", "objective", "achievements",
+        "preferred", "nice to have", "bonus"),
+    0: ("hobbies", "interests", "references", "personal", "personal details", "declaration", "benefits",
+        "perks", "about us", "about the company", "who we are", "equal opportunity", "how to apply"),
+}
+_HEADING_PRIORITY = {keyword: priority for priority, keywords in SECTION_PRIORITIES.items() for keyword in keywords}
+_BOILERPLATE = re.compile(
+    r"equal opportunity employer|reasonable accommodation|references available|available upon request"
+    r"|all qualified applicants|without regard to race",
+    re.IGNORECASE,
+)
+
+
+def _heading_priority(line):
+    """Priority of the section a heading line opens, or None when the line isn't a heading."""
+    stripped = line.strip().rstrip(":").strip()
+    key = stripped.lower()
+    if not stripped or len(stripped) > 60 or stripped.endswith("."):
+        return None
+    if key in _HEADING_PRIORITY:
+        return _HEADING_PRIORITY[key]
+    if (stripped.isupper() and len(stripped.split()) <= 5) or (line.strip().endswith(":") and len(stripped.split()) <= 5):
+        return next((p for keyword, p in _HEADING_PRIORITY.items() if keyword in key), 1)
+    return None
+
+
+def split_sections(text):
+    """Splits a resume or job description into [heading, priority, lines] sections."""
+    sections = [["", 1, []]]
+    for line in text.splitlines():
+        priority = _heading_priority(line)
+        if priority is not None:
+            sections.append([line.strip(), priority, []])
+        else:
+            sections[-1][2].append(line)
+    return [section for section in sections if section[0] or section[2]]
+
+
+def compress_document(text, budget):
+    """
+    Shrinks a document towards `budget` estimated tokens: collapses whitespace, drops
+    repeated lines and legal boilerplate, then trims the least important sections
+    (hobbies, references, perks, ...) from the end before touching experience or skills.
+    Returns (text, original_tokens, compressed_tokens).
+    """
+    original_tokens = estimate_tokens(text)
+    seen = set()
+    sections = []
+    for heading, priority, lines in split_sections(text):
+        kept = []
+        for line in lines:
+            line = " ".join(line.split())
+            key = line.lower()
+            if not line or _BOILERPLATE.search(line) or (len(key) > 20 and key in seen):
+                continue
+            seen.add(key)
+            kept.append(line)
+        sections.append([heading, priority, kept])
+
+    sizes = [estimate_tokens(heading) + sum(estimate_tokens(line) + 1 for line in lines) for heading, _, lines in sections]
+    tokens = sum(sizes)
+    # Trim the least important sections first; within a priority, the largest section gives way first.
+    while tokens > budget:
+        candidates = [i for i, section in enumerate(sections) if section[0] or section[2]]
+        if not candidates:
+            break
+        i = min(candidates, key=lambda i: (sections[i][1], -sizes[i]))
+        heading, _, lines = sections[i]
+        if lines:
+            removed = estimate_tokens(lines.pop()) + 1
+        else:
+            removed = estimate_tokens(heading)
+            sections[i][0] = ""
+        sizes[i] -= removed
+        tokens -= removed
+
+    compressed = "\n".join(
+        "\n".join(([heading] if heading else []) + lines) for heading, _, lines in sections if heading or lines
+    )
+    return compressed, original_tokens, estimate_tokens(compressed)
+
+
+def fit_to_budget(text, call_site, document):
+    """Compresses `text` to the PROMPT_BUDGETS entry for this call site and records the tokens saved."""
+    budget = PROMPT_BUDGETS.get(call_site, {}).get(document)
+    if not text or not budget:
+        return text
+    compressed, before, after = compress_document(text, budget)
+    if before > after:
+        labels = {"call_site": call_site, "document": document}
+        get_metrics().inc("adept_prompt_tokens_saved_total", "Estimated prompt tokens removed by compression.", labels, before - after)
+        get_metrics().log({"event": "prompt_compressed", **labels, "tokens_before": before, "tokens_after": after})
+    return compressed
+
+
+# --- Skill Taxonomy ---
+_SENIORITY = re.compile(r"^(?:(?:senior|junior|sr|jr|lead|principal|staff|associate|entry level|graduate|trainee|intern)\s+)+")
+
+
+def _role_key(title):
+    return " ".join(re.sub(r"[^\w+#/ ]", " ", title.casefold()).split())
+
+
+class SkillIndex:
+    """
+    The bundled skill taxonomy as lookup tables: every alias maps to its canonical skill
+    ("sklearn" -> "scikit-learn"), and a single compiled alternation finds all of them in a
+    resume in one pass. Role titles and their aliases map to the role's core skills.
+
+    Aliases that are also everyday words ("Go", "R", "Excel") are listed under
+    `ambiguous_aliases` and only match in free text when spelled exactly that way, so "go
+    hiking" or "excel at" are not skills; an entry in the explicit skills list still matches
+    in any case.
+    """
+
+    def __init__(self, taxonomy):
+        self.aliases = {}
+        for skill, aliases in taxonomy.get("skills", {}).items():
+            for alias in (skill, *aliases):
+                self.aliases.setdefault(alias.casefold(), skill)
+        self.exact = {alias: self.aliases[alias.casefold()] for alias in taxonomy.get("ambiguous_aliases", [])}
+        self.skills = frozenset(self.aliases.values())
+        self.roles = {}
+        self.requirements = {}
+        for role, spec in taxonomy.get("roles", {}).items():
+            self.requirements[role] = [self.aliases.get(s.casefold(), s) for s in spec.get("required", [])]
+            for alias in (role, *spec.get("aliases", [])):
+                self.roles.setdefault(_role_key(alias), role)
+        ambiguous = {alias.casefold() for alias in self.exact}
+        alternatives = {alias: re.escape(alias) for alias in self.aliases if alias not in ambiguous}
+        # Case-sensitive, and never the start of "R&D" or "Go-to-market".
+        alternatives.update({alias: rf"(?-i:{re.escape(alias)})(?![&-])" for alias in self.exact})
+        # Longest alias first, so "react native" wins over "react" at the same position.
+        ordered = "|".join(alternatives[alias] for alias in sorted(alternatives, key=len, reverse=True))
+        self.pattern = re.compile(rf"(?<![\w+#])({ordered})(?![\w+#])", re.IGNORECASE)
+
+    def _canonical(self, alias):
+        return self.exact.get(alias) or self.aliases[alias.casefold()]
+
+    def extract(self, text):
+        """Canonical skills mentioned in `text`, in order of first mention."""
+        found = {}
+        for match in self.pattern.finditer(text or ""):
+            found.setdefault(self._canonical(match.group(1)), None)
+        return list(found)
+
+    def split_skills(self, text):
+        """Every skill mention in `text` (canonical, with repeats) and the text left once they are cut out."""
+        skills = []
+
+        def cut(match):
+            skills.append(self._canonical(match.group(1)))
+            return " "
+
+        return skills, self.pattern.sub(cut, text or "")
+
+    def profile_skills(self, profile):
+        """Canonical skills from the profile's skill list and resume."""
+        skills = set(self.extract(profile["resume_text"] or ""))
+        for entry in profile["skills"]:
+            skill = self.aliases.get(entry.strip().casefold())
+            skills.update([skill] if skill else self.extract(entry))
+        return skills
+
+    def role(self, career_goal):
+        """The taxonomy role for a career goal, ignoring seniority words, or None if unknown."""
+        key = _role_key(career_goal)
+        if key not in self.roles:
+            key = _SENIORITY.sub("", key)
+        return self.roles.get(key)
+
+    def skill_gap(self, role, user_skills):
+        required = self.requirements[role]
+        return {
+            "required_skills": list(required),
+            "user_has_skills": [skill for skill in required if skill in user_skills],
+            "missing_skills": [skill for skill in required if skill not in user_skills],
+        }
+
+    def alternative_careers(self, role, user_skills, limit=3):
+        """Other roles ranked by how much of their core skill set the user already has."""
+        scored = []
+        for other, required in self.requirements.items():
+            has = [skill for skill in required if skill in user_skills]
+            if other != role and has:
+                scored.append((len(has) / len(required), other, has, [s for s in required if s not in user_skills]))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        careers = []
+        for _, other, has, missing in scored[:limit]:
+            reason = f"You already have {len(has)} of its {len(has) + len(missing)} core skills ({', '.join(has[:5])})."
+            if missing:
+                reason += f" To close the gap, build up {', '.join(missing[:3])}."
+            careers.append({"career_title": other, "match_reason": reason})
+        return careers
+
+
+@st.cache_resource
+def get_skill_index():
+    with open(SKILLS_TAXONOMY_PATH, encoding="utf-8") as f:
+        return SkillIndex(json.load(f))
+
+
+def local_advisor_sections(profile):
+    """
+    Advisor sections answered from the skill taxonomy without a model call: the skill gap
+    and alternative careers. Empty when the career goal isn't a role the taxonomy knows,
+    in which case the model answers every section.
+    """
+    index = get_skill_index()
+    role = index.role(profile["career_goal"])
+    if role is None:
+        get_metrics().inc("adept_skill_gap_total", "Skill gap analyses by source.", {"source": "model"})
+        return {}
+    user_skills = index.profile_skills(profile)
+    get_metrics().inc("adept_skill_gap_total", "Skill gap analyses by source.", {"source": "taxonomy"})
+    return {
+        "skill_gap_analysis": index.skill_gap(role, user_skills),
+        "alternative_careers": index.alternative_careers(role, user_skills),
+    }
+
+
+# --- Keyword Alignment ---
+_KEYWORD = re.compile(r"[a-z][a-z0-9+#]+")
+_STOPWORDS = frozenset("""
+    a about above after all also an and any are as at be been being but by can could do does
+    etc for from has have having how if in into is it its may more most must of on or our out
+    over per should so such than that the their them then there these they this those through
+    to under up us via was we were what when where which while who will with within would you your
+    ability able across apply candidate candidates company strong excellent good great work working
+    team teams role roles job position experience experienced years year knowledge understanding
+    skills skill plus preferred required requirements responsibilities including include includes
+    looking join new based well using use used ensure other related relevant similar field
+    hiring seeking familiarity familiar proven hands environment fast paced nice opportunity
+""".split())
+# How much each job-description section counts towards the score, by section priority.
+_ALIGNMENT_SECTION_WEIGHTS = {3: 1.5, 2: 1.0, 1: 1.0, 0: 0.0}
+# Taxonomy skills ("Python", "Kubernetes") outweigh other content words wherever they appear.
+_ALIGNMENT_SKILL_WEIGHT = 2.0
+
+
+def keyword_terms(text):
+    """Alignment terms: canonical skills from the taxonomy, then the remaining content words."""
+    skills, rest = get_skill_index().split_skills(text)
+    return skills + [word for word in _KEYWORD.findall(rest.lower()) if word not in _STOPWORDS]
+
+
+def keyword_alignment_many(resume, job_descriptions, top_missing=15):
+    """
+    Scores one resume against many job descriptions in a single vectorised pass.
+
+    Terms are weighted TF-IDF style: sublinear term frequency, times 2 for taxonomy skills,
+    times an IDF over the sections of the same job description, so words that run through
+    every section ("develop", "business") count less than section-specific ones. Nothing
+    depends on the other job descriptions in the batch, so a job description scores the
+    same alone or among thousands. Counts are kept sparse, one entry per (section, term)
+    present, so memory grows with the text rather than sections x vocabulary.
+
+    Returns one dict per job description with the weighted share of its keywords the resume
+    covers (`score`, 0-100), its most important `missing` and `matched` keywords, and the
+    coverage of each of its `sections`.
+    """
+    import numpy as np  # Deferred like the SDK: only the co-pilot and the service score alignments.
+
+    vocabulary = {}
+    term_ids, unit_ids = [], []
+    owners, headings, priorities = [], [], []
+    for owner, job_description in enumerate(job_descriptions):
+        for heading, priority, lines in split_sections(job_description or ""):
+            terms = keyword_terms("\n".join(lines))
+            if terms:
+                term_ids.extend(vocabulary.setdefault(term, len(vocabulary)) for term in terms)
+                unit_ids.extend([len(owners)] * len(terms))
+                owners.append(owner)
+                headings.append(heading.rstrip(":").strip() or "General")
+                priorities.append(priority)
+
+    results = [{"score": 0, "missing": [], "matched": [], "sections": []} for _ in job_descriptions]
+    if not owners:
+        return results
+
+    size = len(vocabulary)
+    in_resume = np.zeros(size, dtype=bool)
+    in_resume[[vocabulary[term] for term in keyword_terms(resume) if term in vocabulary]] = True
+    skills = get_skill_index().skills
+    term_weights = np.array([_ALIGNMENT_SKILL_WEIGHT if term in skills else 1.0 for term in vocabulary])
+    section_weights = np.array([_ALIGNMENT_SECTION_WEIGHTS.get(p, 1.0) for p in priorities])
+    owners = np.array(owners)
+
+    # One entry per (section, term) present, with its count.
+    pairs, counts = np.unique(np.array(unit_ids, dtype=np.int64) * size + term_ids, return_counts=True)
+    units, terms = np.divmod(pairs, size)
+    # Per job description: how many of its sections mention each term, and how many sections it has.
+    job_terms, pair_job_term, section_freq = np.unique(owners[units] * size + terms, return_inverse=True, return_counts=True)
+    job_sections = np.bincount(owners, minlength=len(job_descriptions))
+    idf = np.log((1 + job_sections[owners[units]]) / (1 + section_freq[pair_job_term])) + 1
+    weights = (1 + np.log(counts)) * idf * term_weights[terms] * section_weights[units]
+    covered = in_resume[terms]
+
+    section_totals = np.bincount(units, weights=weights, minlength=len(owners))
+    section_hits = np.bincount(units, weights=weights * covered, minlength=len(owners))
+    job_term_weights = np.bincount(pair_job_term, weights=weights, minlength=len(job_terms))
+    jobs, job_term_ids = np.divmod(job_terms, size)
+    job_totals = np.bincount(jobs, weights=job_term_weights, minlength=len(job_descriptions))
+    job_hits = np.bincount(jobs, weights=job_term_weights * in_resume[job_term_ids], minlength=len(job_descriptions))
+
+    vocabulary = np.array(list(vocabulary), dtype=object)
+    # Each job description's terms, heaviest first (ties in order of first mention).
+    order = np.lexsort((job_term_ids, -job_term_weights, jobs))
+    bounds = np.searchsorted(jobs[order], np.arange(len(job_descriptions) + 1))
+    for owner, result in enumerate(results):
+        if job_totals[owner] > 0:
+            result["score"] = int(round(job_hits[owner] / job_totals[owner] * 100))
+        ranked = order[bounds[owner]:bounds[owner + 1]]
+        ranked = job_term_ids[ranked[job_term_weights[ranked] > 0]]
+        result["missing"] = list(vocabulary[ranked[~in_resume[ranked]]][:top_missing])
+        result["matched"] = list(vocabulary[ranked[in_resume[ranked]]][:top_missing])
+    for unit, owner in enumerate(owners):
+        if section_totals[unit] > 0:
+            coverage = section_hits[unit] / section_totals[unit]
+            results[owner]["sections"].append({"heading": headings[unit], "coverage": int(round(coverage * 100))})
+    return results
+
+
+def keyword_alignment(resume, job_description):
+    return keyword_alignment_many(resume, [job_description])[0]
+
+
+def render_keyword_alignment(alignment):
+    with st.container(border=True):
+        st.subheader("🔑 Keyword Alignment")
+        st.metric("Alignment score", f"{alignment['score']}%", help="Weighted share of the job description's keywords that appear in your resume.")
+        if alignment["missing"]:
+            st.markdown("**Missing keywords (most important first):** " + ", ".join(f"`{term}`" for term in alignment["missing"]))
+        else:
+            st.markdown("Your resume covers every keyword we found in the job description.")
+        for section in alignment["sections"]:
+            st.progress(section["coverage"] / 100, text=f"{section['heading']}: {section['coverage']}% covered")
+
+
+# --- Page Rendering Functions ---
+def navigate(page):
+    """Button callback: switches page before the click's script run, so no extra st.rerun() is needed."""
+    st.session_state.page = page
+
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def render_jobs(job_ids, cancel_label="Cancel"):
+    """
+    Live view of running jobs, refreshed every JOB_POLL_SECONDS: the partial output of a
+    streaming job and a cancel button. As soon as a job finishes the whole app reruns, so
+    the page can collect the result and draw it in place.
+    """
+    jobs = [get_job_executor().get(job_id) for job_id in job_ids]
+    if any(job is None or job.finished for job in jobs):
+        st.rerun()
+    text = "".join(job.text for job in jobs)
+    if text:
+        st.markdown(text + " ▌")
+    elif any(job.status == "queued" for job in jobs):
+        st.caption("Waiting for a free worker...")
+    if st.button(cancel_label, key=f"cancel_{job_ids[0]}"):
+        for job in jobs:
+            job.cancel()
+        st.rerun()
+
+
+
+@timed_render("home")
+def render_home():
+    st.title("Welcome to Your Personalized AI Career Advisor 🚀")
+    st.markdown("### Your one-stop solution to navigate the job market, powered by Generative AI.")
+
+    st.markdown("""
+    <div class="card">
+    <p>In today's fast-paced job market, finding the right career path can be overwhelming. This tool is designed to be your personal guide. We'll help you understand your skills, discover exciting career opportunities, and prepare you for the interviews that will land you your dream job.</p>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.info("**1. Build Your Profile**", icon="👤")
+        st.write("Upload your resume or manually enter your skills, interests, and career goals. The more detail you provide, the better the advice!")
+    with col2:
+        st.info("**2. Get AI-Powered Insights**", icon="💡")
+        st.write("Discover your skill gaps, get a personalized learning plan, and explore career paths that match your unique profile.")
+    with col3:
+        st.info("**3. Prepare for Success**", icon="🎯")
+        st.write("Practice with our AI mock interviewer and fine-tune your resume to stand out to recruiters for any job.")
+        
+    st.button("Get Started: Build Your Profile →", key="start_button", on_click=navigate, args=("Profile Builder",))
+
+
+@timed_render("profile_builder")
+def render_profile_builder():
+    st.title("👤 Profile Builder")
+    st.markdown("Let's create a snapshot of your professional self. Provide as much detail as possible for the most accurate advice.")
+
+    with st.container(border=True):
+        st.subheader("Upload Your Resume (Optional)")
+        uploaded_file = st.file_uploader(
+            "Upload your resume (PDF, TXT) and we'll try to extract the text.", 
+            type=['txt', 'pdf']
+        )
+        if uploaded_file is not None:
+            try:
+                buffer = uploaded_file.getbuffer()
+                content_hash = hashlib.sha256(buffer).hexdigest()
+                # Only a newly uploaded file replaces the text; reruns keep the user's edits.
+                if content_hash != st.session_state.resume_upload_hash:
+                    text = extract_resume_text(uploaded_file.type, buffer, content_hash)
+                    st.session_state.resume_upload_hash = content_hash
+                    if text:
+                        st.session_state.user_profile["resume_text"] = text
+                    else:
+                        st.warning("No text could be found in this file (it may be a scanned image). Please paste your resume text below.", icon="⚠️")
+            except ResumeExtractionError as e:
+                st.error(str(e), icon="🚨")
+            except Exception as e:
+                st.error(f"Error reading file: {e}")
+
+        resume_text = st.text_area(
+            "Or, paste your resume text here:", 
+            value=st.session_state.user_profile.get("resume_text", ""), 
+            height=300
+        )
+        st.session_state.user_profile["resume_text"] = resume_text
+
+    with st.container(border=True):
+        st.subheader("Your Skills & Interests")
+        skills = st.text_input(
+            "Enter your skills, separated by commas (e.g., Python, Data Analysis, React)",
+            value=", ".join(st.session_state.user_profile.get("skills", []))
+        )
+        st.session_state.user_profile["skills"] = [s.strip() for s in skills.split(',') if s.strip()]
+
+        interests = st.text_area(
+            "Describe your professional interests and passions:",
+            value=st.session_state.user_profile.get("interests", "")
+        )
+        st.session_state.user_profile["interests"] = interests
+
+    with st.container(border=True):
+        st.subheader("Your Career Goal")
+        career_goal = st.text_input(
+            "What is your target job role? (e.g., Software Engineer, Product Manager)",
+            value=st.session_state.user_profile.get("career_goal", "")
+        )
+        st.session_state.user_profile["career_goal"] = career_goal
+
+    if st.button("Save and Analyze My Profile", key="save_profile"):
+        if not st.session_state.user_profile["career_goal"] or (not st.session_state.user_profile["skills"] and not st.session_state.user_profile["resume_text"]):
+            st.error("Please provide your Career Goal and at least some skills or a resume.", icon="🚨")
+        else:
+            # No invalidation needed: the advisor caches each section under the fields it depends on.
+            prefetch_after_save(st.session_state.user_profile)
+            st.session_state.profile_saved = True
+            st.session_state.page = "Career Advisor"
+            st.rerun()
+
+ADVISOR_SECTION_PROMPTS = {
+    "skill_gap_analysis": """
+            List the skills required for this role, which of them the user already has, and which are missing.
+            Example JSON:
+            {
+                "skill_gap_analysis": {
+                    "required_skills": ["Python", "SQL", "Data Visualization", "Machine Learning", "Communication"],
+                    "user_has_skills": ["Python", "SQL"],
+                    "missing_skills": ["Data Visualization", "Machine Learning", "Communication"]
+                }
+            }
+            """,
+    "learning_pathway": """
+            Recommend a learning pathway for the skills the user is missing for this role, with concrete resources and project ideas.
+            Example JSON:
+            {
+                "learning_pathway": [
+                    {
+                        "skill_to_learn": "Data Visualization",
+                        "recommendation": "Master a library like Matplotlib or Seaborn.",
+                        "resources": [
+                            "Coursera: 'Data Visualization with Python'",
+                            "Project Idea: Create a dashboard analyzing a public dataset (e.g., COVID-19 trends)."
+                        ]
+                    },
+                    {
+                        "skill_to_learn": "Machine Learning",
+                        "recommendation": "Understand core concepts and popular libraries.",
+                        "resources": [
+                            "Book: 'Hands-On Machine Learning with Scikit-Learn, Keras & TensorFlow'",
+                            "Project Idea: Build a simple spam classifier for emails."
+                        ]
+                    }
+                ]
+            }
+            """,
+    "alternative_careers": """
+            Suggest alternative careers that suit the user's current profile.
+            Example JSON:
+            {
+                "alternative_careers": [
+                    {
+                        "career_title": "Data Engineer",
+                        "match_reason": "Strong foundation in Python and SQL are highly transferable to data engineering roles."
+                    }
+                ]
+            }
+            """,
+    "summary": """
+            Write a short overall summary of how well the user fits this role and what to focus on next.
+            Example JSON:
+            {
+                "summary": "You have a strong foundational skillset for a Data Analyst role. Focusing on practical application through data visualization and machine learning projects will make you a highly competitive candidate."
+            }
+            """,
+}
+
+
+_STRING_LIST = {"type": "ARRAY", "items": {"type": "STRING"}}
+
+ADVISOR_SECTION_SCHEMAS = {
+    "skill_gap_analysis": {
+        "type": "OBJECT",
+        "properties": {
+            "skill_gap_analysis": {
+                "type": "OBJECT",
+                "properties": {
+                    "required_skills": _STRING_LIST,
+                    "user_has_skills": _STRING_LIST,
+                    "missing_skills": _STRING_LIST,
+                },
+                "required": ["required_skills", "user_has_skills", "missing_skills"],
+            },
+        },
+        "required": ["skill_gap_analysis"],
+    },
+    "learning_pathway": {
+        "type": "OBJECT",
+        "properties": {
+            "learning_pathway": {
+                "type": "ARRAY",
+                "items": {
+                    "type": "OBJECT",
+                    "properties": {
+                        "skill_to_learn": {"type": "STRING"},
+                        "recommendation": {"type": "STRING"},
+                        "resources": _STRING_LIST,
+                    },
+                    "required": ["skill_to_learn", "recommendation", "resources"],
+                },
+            },
+        },
+        "required": ["learning_pathway"],
+    },
+    "alternative_careers": {
+        "type": "OBJECT",
+        "properties": {
+            "alternative_careers": {
+                "type": "ARRAY",
+                "items": {
+                    "type": "OBJECT",
+                    "properties": {
+                        "career_title": {"type": "STRING"},
+                        "match_reason": {"type": "STRING"},
+                    },
+                    "required": ["career_title", "match_reason"],
+                },
+            },
+        },
+        "required": ["alternative_careers"],
+    },
+    "summary": {
+        "type": "OBJECT",
+        "properties": {"summary": {"type": "STRING"}},
+        "required": ["summary"],
+    },
+}
+
+
+# Profile fields each section is derived from. Only these go into the section's prompt, and a
+# section is regenerated only when one of them changes.
+ADVISOR_SECTION_INPUTS = {
+    "skill_gap_analysis": ("career_goal", "skills", "resume_text"),
+    "learning_pathway": ("career_goal", "skills", "resume_text"),
+    "alternative_careers": ("career_goal", "skills", "resume_text", "interests"),
+    "summary": ("career_goal", "skills", "resume_text", "interests"),
+}
+
+
+def fingerprint_profile(profile):
+    """Per-field hashes of the profile, ignoring whitespace, title case and skill order."""
+    values = {
+        "career_goal": normalize_job_title(profile["career_goal"]),
+        "skills": "\n".join(sorted({skill.strip().casefold() for skill in profile["skills"]})),
+        "resume_text": " ".join(profile["resume_text"].split()),
+        "interests": " ".join(profile["interests"].split()),
+    }
+    return {field: hashlib.sha256(value.encode("utf-8")).hexdigest()[:16] for field, value in values.items()}
+
+
+def advisor_section_key(section, fingerprints):
+    return ":".join([section] + [fingerprints[field] for field in ADVISOR_SECTION_INPUTS[section]])
+
+
+def build_advisor_prompt(profile, section, skill_gap=None):
+    """
+    The section's prompt as a PrefixedPrompt: the career goal, skills and resume come first and
+    are identical for every section, so all four share one cached prefix.
+    """
+    inputs = ADVISOR_SECTION_INPUTS[section]
+    details = []
+    if "skills" in inputs:
+        details.append(f"User Skills: {', '.join(profile['skills'])}")
+    if "resume_text" in inputs:
+        details.append(f"User Resume: {profile['resume_text']}")
+    user_details = "\n            ".join(details)
+    interests = f"User Interests: {profile['interests']}" if "interests" in inputs else ""
+    known_gap = ""
+    if skill_gap:
+        known_gap = f"""
+            Skill gap (already established, build on it rather than re-deriving it):
+            Skills the user has: {', '.join(skill_gap['user_has_skills']) or 'none of the core skills'}
+            Skills the user is missing: {', '.join(skill_gap['missing_skills']) or 'none'}
+            """
+    prefix = f"""
+            Analyze the user profile for a career as a '{profile['career_goal']}'.
+            {user_details}
+            """
+    return PrefixedPrompt(prefix, f"""
+            {interests}
+            {known_gap}
+            Provide only the requested part of the analysis in a valid JSON structure. Do NOT include any text outside of the JSON.
+            {ADVISOR_SECTION_PROMPTS[section]}
+            """)
+
+
+def prepare_advisor_profile(profile):
+    """Copy of the profile with the resume compressed to the advisor's prompt budget."""
+    return {**profile, "resume_text": fit_to_budget(profile["resume_text"], "advisor", "resume")}
+
+
+def fetch_advisor_section(profile, section, skill_gap=None):
+    result = get_ai_response(
+        build_advisor_prompt(profile, section, skill_gap),
+        is_json=True,
+        call_site="advisor",
+        response_schema=ADVISOR_SECTION_SCHEMAS[section],
+    )
+    if isinstance(result, dict):
+        return result.get(section)
+    return None
+
+
+async def fetch_advisor_section_async(profile, section, single_flight=None, skill_gap=None):
+    result = await get_ai_response_async(
+        build_advisor_prompt(profile, section, skill_gap),
+        is_json=True,
+        call_site="advisor",
+        response_schema=ADVISOR_SECTION_SCHEMAS[section],
+        single_flight=single_flight,
+    )
+    if isinstance(result, dict):
+        return result.get(section)
+    return None
+
+
+def render_advisor_summary(summary):
+    st.markdown(f'<div class="card"><p><strong>Summary:</strong> {summary or "No summary available."}</p></div>', unsafe_allow_html=True)
+
+
+def render_skill_gap_analysis(sga):
+    with st.container(border=True):
+        st.subheader("📊 Skill Gap Analysis")
+        if sga:
+            st.write("**Skills You Have:**")
+            for skill in sga.get("user_has_skills", []):
+                st.markdown(f"✅ {skill}")
+            
+            st.write("**Skills to Develop:**")
+            for skill in sga.get("missing_skills", []):
+                st.markdown(f"❌ {skill}")
+        else:
+            st.write("Could not perform skill gap analysis.")
+
+
+def render_alternative_careers(alt_careers):
+    with st.container(border=True):
+        st.subheader("🛤️ Alternative Career Paths")
+        if alt_careers:
+            for career in alt_careers:
+                with st.expander(f"**{career.get('career_title')}**"):
+                    st.write(career.get('match_reason'))
+        else:
+            st.write("No alternative careers could be identified at this time.")
+
+
+def render_learning_pathway(learning_pathway):
+    st.subheader("📚 Your Personalized Learning Pathway")
+    if learning_pathway:
+        for item in learning_pathway:
+            with st.expander(f"**Learn: {item.get('skill_to_learn')}** - {item.get('recommendation')}"):
+                for resource in item.get("resources", []):
+                    st.markdown(f"- {resource}")
+    else:
+        st.write("Could not generate a learning pathway.")
+
+
+ADVISOR_SECTION_RENDERERS = {
+    "summary": render_advisor_summary,
+    "skill_gap_analysis": render_skill_gap_analysis,
+    "alternative_careers": render_alternative_careers,
+    "learning_pathway": render_learning_pathway,
+}
+
+
+def render_advisor_section_failure(section, key):
+    name = section.replace("_", " ")
+    if st.session_state.advisor_failures[key] == "cancelled":
+        st.info(f"The {name} section was cancelled.", icon="⏹️")
+        label = "Generate this section"
+    else:
+        st.error(f"Could not generate the {name} section. The model may be overloaded.", icon="🔥")
+        label = "Retry this section"
+    if st.button(label, key=f"retry_{section}"):
+        st.session_state.advisor_failures.pop(key, None)
+        st.rerun()
+
+
+@timed_render("career_advisor")
+def render_career_advisor():
+    st.title("💡 AI Career Advisor")
+    st.markdown("Here are your personalized insights based on your profile.")
+
+    profile = st.session_state.user_profile
+    if not profile["career_goal"] or (not profile["skills"] and not profile["resume_text"]):
+        st.warning("Please build your profile first to get advice!", icon="⚠️")
+        st.button("Go to Profile Builder", on_click=navigate, args=("Profile Builder",))
+        return
+
+    st.markdown(f"### Analysis for: **{profile['career_goal']}**")
+
+    # Sections are cached under the fingerprints of the fields they depend on, so after an
+    # edit only the sections reading a changed field are regenerated.
+    fingerprints = fingerprint_profile(profile)
+    keys = {section: advisor_section_key(section, fingerprints) for section in ADVISOR_SECTION_PROMPTS}
+    analysis = st.session_state.analysis_cache
+    seed_local_advisor_sections(profile, keys)
+    if st.session_state.pop("profile_saved", False):
+        st.toast("Profile saved!", icon="✅")
+
+    # Sections are generated as background jobs, so leaving the page mid-analysis keeps the work;
+    # finished jobs are collected into the cache here, on whichever run comes next.
+    advisor_jobs = st.session_state.advisor_jobs
+    containers = {"summary": st.container()}
+    col1, col2 = st.columns(2)
+    containers["skill_gap_analysis"] = col1.container()
+    containers["alternative_careers"] = col2.container()
+    containers["learning_pathway"] = st.container()
+
+    running, unscheduled = [], []
+    for section, container in containers.items():
+        key = keys[section]
+        if key in advisor_jobs:
+            job, finished = collect_job(advisor_jobs[key])
+            if finished:
+                del advisor_jobs[key]
+                if job is not None and job.status == "done":
+                    analysis[key] = job.result
+                else:
+                    st.session_state.advisor_failures[key] = job.status if job is not None else "failed"
+            else:
+                running.append(job.id)
+        with container:
+            if key in analysis:
+                ADVISOR_SECTION_RENDERERS[section](analysis[key])
+            elif key in st.session_state.advisor_failures:
+                render_advisor_section_failure(section, key)
+            else:
+                st.info(f"Analyzing your {section.replace('_', ' ')}...", icon="⏳")
+                if key not in advisor_jobs:
+                    unscheduled.append(section)
+
+    if unscheduled:
+        started = submit_advisor_jobs(profile, keys, unscheduled)
+        for section in unscheduled:
+            if section not in started:
+                st.session_state.advisor_failures[keys[section]] = "failed"
+        running.extend(started.values())
+        if not running:
+            st.rerun()
+    if running:
+        render_jobs(tuple(running), "Cancel analysis")
+
+def seed_local_advisor_sections(profile, keys):
+    """Fills in the sections the skill taxonomy can answer (known roles only); they cost no model call."""
+    analysis = st.session_state.analysis_cache
+    if keys["skill_gap_analysis"] not in analysis or keys["alternative_careers"] not in analysis:
+        # Known roles get their skill gap and alternatives from the taxonomy in milliseconds;
+        # the model is then only asked for the learning pathway and the summary.
+        for section, data in local_advisor_sections(profile).items():
+            analysis.setdefault(keys[section], data)
+
+
+def submit_advisor_jobs(profile, keys, sections):
+    """Starts a background job per section and returns {section: job ID}; sections the queue turned away are left out."""
+    prompt_profile = prepare_advisor_profile(profile)
+    skill_gap = st.session_state.analysis_cache.get(keys["skill_gap_analysis"])
+    started = {}
+    for section in sections:
+        job = get_job_executor().submit(
+            "advisor", lambda job, section=section: fetch_advisor_section(prompt_profile, section, skill_gap)
+        )
+        if job is None:
+            continue
+        st.session_state.advisor_jobs[keys[section]] = job.id
+        started[section] = job.id
+    return started
+
+
+# --- Speculative Prefetch ---
+def spend_prefetch_budget():
+    if st.session_state.prefetch_spent >= PREFETCH_BUDGET:
+        get_metrics().inc("adept_prefetch_total", "Prefetches by target and outcome.", {"target": "any", "outcome": "over_budget"})
+        return False
+    st.session_state.prefetch_spent += 1
+    return True
+
+
+def prefetch_after_save(profile):
+    """
+    Starts, in the background, what the user is likely to open after saving their profile:
+    the advisor sections (the page they land on), the Market Pulse snapshot for their career
+    goal and the interview opener for that role. Results land in the advisor jobs, the
+    snapshot store and `prefetched_opener`. The two speculative calls draw on PREFETCH_BUDGET.
+    """
+    fingerprints = fingerprint_profile(profile)
+    keys = {section: advisor_section_key(section, fingerprints) for section in ADVISOR_SECTION_PROMPTS}
+    seed_local_advisor_sections(profile, keys)
+    missing = [
+        section for section in ADVISOR_SECTION_PROMPTS
+        if keys[section] not in st.session_state.analysis_cache and keys[section] not in st.session_state.advisor_jobs
+    ]
+    for section in missing:
+        st.session_state.advisor_failures.pop(keys[section], None)
+    submit_advisor_jobs(profile, keys, missing)
+
+    metrics = get_metrics()
+    job_title = clean_job_title(profile["career_goal"])
+    # peek and generate directly: a speculative fetch is not a request, so it must not raise
+    # the title's request count the warmer ranks titles by.
+    snapshot = get_market_pulse_store().peek(job_title)
+    if snapshot is None or snapshot[1] >= MARKET_PULSE_FRESH_SECONDS:
+        if spend_prefetch_budget():
+            if get_job_executor().submit("prefetch", lambda job: generate_market_pulse(job_title)) is not None:
+                metrics.inc("adept_prefetch_total", "Prefetches by target and outcome.", {"target": "market_pulse", "outcome": "started"})
+
+    job_role = profile["career_goal"]
+    opener = st.session_state.prefetched_opener
+    if (opener is None or opener["job_role"] != job_role) and spend_prefetch_budget():
+        job = get_job_executor().submit(
+            "prefetch", lambda job: get_ai_response(interview_system_prompt(job_role), call_site="interview_opener")
+        )
+        if job is not None:
+            st.session_state.prefetched_opener = {"job_role": job_role, "job": job.id}
+            metrics.inc("adept_prefetch_total", "Prefetches by target and outcome.", {"target": "interview_opener", "outcome": "started"})
+
+
+def take_prefetched_opener(job_role):
+    """The prefetched interview opener for this role if it is ready, consumed so the next interview gets a new one."""
+    opener = st.session_state.prefetched_opener
+    if opener is None or opener["job_role"] != job_role:
+        return None
+    st.session_state.prefetched_opener = None
+    job, finished = collect_job(opener["job"])
+    if not finished:
+        # Still generating: stream a fresh opener instead of making the user wait on a spinner.
+        job.cancel()
+        return None
+    used = job is not None and job.status == "done"
+    get_metrics().inc("adept_prefetch_total", "Prefetches by target and outcome.", {"target": "interview_opener", "outcome": "used" if used else "missed"})
+    return job.result if used else None
+
+
+def clean_job_title(job_title):
+    """A job title as the user spelled it ("UX Designer", "iOS Developer"), minus stray whitespace."""
+    return " ".join(job_title.split())
+
+
+def normalize_job_title(job_title):
+    """Lookup key for a job title, so "data scientist " and "Data Scientist" share one analysis."""
+    return clean_job_title(job_title).casefold()
+
+
+MARKET_PULSE_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "market_summary": {"type": "STRING"},
+        "trending_skills": _STRING_LIST,
+        "salary_range": {"type": "STRING"},
+        "top_industries": _STRING_LIST,
+        "market_sentiment": {"type": "STRING"},
+    },
+    "required": ["market_summary", "trending_skills", "salary_range", "top_industries", "market_sentiment"],
+}
+
+
+def build_market_pulse_prompt(job_title):
+    return f"""
+                Analyze the current job market for a '{job_title}'. Based on recent trends and data, provide the following information in a valid JSON structure. Do not include any text outside of the JSON.
+
+                Example JSON for 'Data Scientist':
+                {{
+                    "market_summary": "The market for Data Scientists remains strong, with high demand in the tech, finance, and healthcare sectors. The role is becoming more specialized, with an emphasis on machine learning operations (MLOps) and cloud platforms.",
+                    "trending_skills": ["Python", "SQL", "TensorFlow/PyTorch", "AWS/GCP/Azure", "MLOps"],
+                    "salary_range": "₹12,00,000 - ₹25,00,000 per annum (India)",
+                    "top_industries": ["Technology & SaaS", "Financial Services", "Healthcare & Pharma"],
+                    "market_sentiment": "Growing"
+                }}
+                """
+
+
+class MarketPulseStore:
+    """
+    Persistent Market Pulse analyses keyed by normalized job title, shared by every session
+    and process on the host. Lookups count requests per title, which is what the warmer
+    uses to decide which titles to keep fresh. Methods take the title as the user spelled
+    it; the first spelling seen is kept for the warmer's prompts.
+    """
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS snapshots ("
+            "title_key TEXT PRIMARY KEY, payload TEXT, updated_at REAL, request_count INTEGER NOT NULL DEFAULT 0, title TEXT)"
+        )
+        with contextlib.suppress(sqlite3.OperationalError):  # stores created before `title` existed
+            self._conn.execute("ALTER TABLE snapshots ADD COLUMN title TEXT")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS snapshots_request_count ON snapshots (request_count)")
+        self._conn.commit()
+
+    def lookup(self, job_title):
+        """Records a request for the title and returns (payload, age_seconds), or None without a snapshot."""
+        title_key = normalize_job_title(job_title)
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO snapshots (title_key, title, request_count) VALUES (?, ?, 1) "
+                "ON CONFLICT (title_key) DO UPDATE SET request_count = request_count + 1, title = COALESCE(title, excluded.title)",
+                (title_key, job_title),
+            )
+            row = self._conn.execute("SELECT payload, updated_at FROM snapshots WHERE title_key = ?", (title_key,)).fetchone()
+            self._conn.commit()
+        if row[0] is None:
+            return None
+        return json.loads(row[0]), time.time() - row[1]
+
+    def peek(self, job_title):
+        """Like lookup, but without counting a request (prefetches and passive page loads)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, updated_at FROM snapshots WHERE title_key = ?", (normalize_job_title(job_title),)
+            ).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return json.loads(row[0]), time.time() - row[1]
+
+    def put(self, job_title, payload):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO snapshots (title_key, title, payload, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (title_key) DO UPDATE SET payload = excluded.payload, updated_at = excluded.updated_at, "
+                "title = COALESCE(title, excluded.title)",
+                (normalize_job_title(job_title), job_title, json.dumps(payload), time.time()),
+            )
+            self._conn.commit()
+
+    def due_for_refresh(self, top_n, max_age):
+        """The most requested `top_n` titles whose snapshot is missing or older than `max_age` seconds."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT COALESCE(title, title_key) FROM (SELECT * FROM snapshots ORDER BY request_count DESC LIMIT ?) "
+                "WHERE updated_at IS NULL OR updated_at <= ? ORDER BY request_count DESC",
+                (top_n, time.time() - max_age),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def stats(self):
+        with self._lock:
+            titles, snapshots = self._conn.execute("SELECT COUNT(*), COUNT(payload) FROM snapshots").fetchone()
+        return {"titles": titles, "snapshots": snapshots}
+
+
+@st.cache_resource
+def get_market_pulse_store():
+    return MarketPulseStore(os.path.join(CACHE_DIR, "market_pulse.sqlite3"))
+
+
+def generate_market_pulse(job_title):
+    """Generates and stores a fresh analysis; concurrent requests for one title share the call."""
+    def generate():
+        analysis = get_ai_response(
+            build_market_pulse_prompt(job_title),
+            is_json=True,
+            call_site="market_pulse",
+            response_schema=MARKET_PULSE_SCHEMA,
+        )
+        if analysis:
+            get_market_pulse_store().put(job_title, analysis)
+        return analysis
+
+    return get_single_flight().do(("market_pulse", normalize_job_title(job_title)), generate)
+
+
+class MarketPulseWarmer:
+    """Refreshes stale snapshots off the request path, one title at a time."""
+
+    def __init__(self, store):
+        self.store = store
+        self._lock = threading.Lock()
+        self._refreshing = set()
+
+    def refresh(self, job_title):
+        title_key = normalize_job_title(job_title)
+        with self._lock:
+            if title_key in self._refreshing:
+                return
+            self._refreshing.add(title_key)
+        try:
+            generate_market_pulse(job_title)
+        finally:
+            with self._lock:
+                self._refreshing.discard(title_key)
+
+    def refresh_in_background(self, job_title):
+        get_llm_executor().submit(self.refresh, job_title)
+
+    def warm(self):
+        # Refresh a little early so popular titles never go stale between passes.
+        max_age = max(0.0, MARKET_PULSE_FRESH_SECONDS - MARKET_PULSE_WARM_INTERVAL)
+        for job_title in self.store.due_for_refresh(MARKET_PULSE_WARM_TOP_N, max_age):
+            self.refresh(job_title)
+
+    def run_forever(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                self.warm()
+            except Exception:
+                logger.exception("Market Pulse warmer pass failed")
+
+
+@st.cache_resource
+def get_market_pulse_warmer():
+    """The process-wide warmer; its periodic pass runs on a daemon thread unless the interval is 0."""
+    warmer = MarketPulseWarmer(get_market_pulse_store())
+    if MARKET_PULSE_WARM_INTERVAL:
+        threading.Thread(
+            target=warmer.run_forever, args=(MARKET_PULSE_WARM_INTERVAL,), name="adept-market-pulse-warmer", daemon=True
+        ).start()
+    return warmer
+
+
+def get_market_pulse(job_title):
+    """
+    Market analysis for a job title, stale-while-revalidate: fresh snapshots are
+    returned as they are, stale ones are returned at once while a background refresh runs,
+    and missing or expired ones are generated now. Returns (analysis, age_seconds); the
+    analysis is None only if generation failed and there was nothing to fall back on.
+    """
+    snapshot = get_market_pulse_store().lookup(job_title)
+    if snapshot is not None and snapshot[1] < MARKET_PULSE_FRESH_SECONDS:
+        state = "fresh"
+    elif snapshot is not None and snapshot[1] < MARKET_PULSE_STALE_SECONDS:
+        state = "stale"
+        get_market_pulse_warmer().refresh_in_background(job_title)
+    else:
+        analysis = generate_market_pulse(job_title)
+        if analysis:
+            snapshot, state = (analysis, 0.0), "generated"
+        else:
+            # An expired snapshot still beats an error page.
+            state = "expired" if snapshot is not None else "failed"
+    get_metrics().inc("adept_market_pulse_lookups_total", "Market Pulse lookups by snapshot state.", {"state": state})
+    return snapshot if snapshot is not None else (None, 0.0)
+
+
+async def generate_market_pulse_async(job_title, single_flight=None):
+    """Asyncio counterpart of generate_market_pulse; pass an AsyncSingleFlight to share concurrent calls per title."""
+    async def generate():
+        analysis = await get_ai_response_async(
+            build_market_pulse_prompt(job_title),
+            is_json=True,
+            call_site="market_pulse",
+            response_schema=MARKET_PULSE_SCHEMA,
+        )
+        if analysis:
+            await asyncio.get_running_loop().run_in_executor(None, get_market_pulse_store().put, job_title, analysis)
+        return analysis
+
+    if single_flight is None:
+        return await generate()
+    return await single_flight.do(("market_pulse", normalize_job_title(job_title)), generate)
+
+
+async def get_market_pulse_async(job_title, single_flight=None):
+    """
+    Asyncio counterpart of get_market_pulse for the HTTP service: snapshot I/O runs in a
+    thread, generation on the async model path. Raises AIServiceError when generation fails
+    and there is no expired snapshot to fall back on.
+    """
+    loop = asyncio.get_running_loop()
+    snapshot = await loop.run_in_executor(None, get_market_pulse_store().lookup, job_title)
+    if snapshot is not None and snapshot[1] < MARKET_PULSE_FRESH_SECONDS:
+        state = "fresh"
+    elif snapshot is not None and snapshot[1] < MARKET_PULSE_STALE_SECONDS:
+        state = "stale"
+        get_market_pulse_warmer().refresh_in_background(job_title)
+    else:
+        try:
+            analysis = await generate_market_pulse_async(job_title, single_flight)
+        except AIServiceError:
+            if snapshot is None:
+                get_metrics().inc("adept_market_pulse_lookups_total", "Market Pulse lookups by snapshot state.", {"state": "failed"})
+                raise
+            analysis = None
+        if analysis:
+            snapshot, state = (analysis, 0.0), "generated"
+        else:
+            state = "expired" if snapshot is not None else "failed"
+    get_metrics().inc("adept_market_pulse_lookups_total", "Market Pulse lookups by snapshot state.", {"state": state})
+    return snapshot if snapshot is not None else (None, 0.0)
+
+
+def format_age(seconds):
+    if seconds < 60:
+        return "just now"
+    if seconds < 3600:
+        return f"{int(seconds // 60)} min ago"
+    if seconds < 2 * 86400:
+        return f"{int(seconds // 3600)} h ago"
+    return f"{int(seconds // 86400)} days ago"
+
+
+@timed_render("market_pulse")
+def render_market_pulse():
+    st.title("📈 Market Pulse Dashboard")
+    st.markdown("Get real-time insights into the job market for any career.")
+    render_market_dashboard()
+
+
+@st.fragment
+@timed_render("market_dashboard")
+@track_payload("market_dashboard")
+def render_market_dashboard():
+    job_title = clean_job_title(st.text_input(
+        "Enter a job title to analyze:",
+        value=st.session_state.user_profile.get("career_goal", ""),
+        placeholder="e.g., Data Scientist, UX Designer",
+    ))
+    title_key = normalize_job_title(job_title)
+    if job_title and title_key not in st.session_state.market_pulse_cache:
+        # Snapshots already in the store (prefetched on profile save, or warmed) show without a click.
+        snapshot = get_market_pulse_store().peek(job_title)
+        if snapshot is not None and snapshot[1] < MARKET_PULSE_STALE_SECONDS:
+            st.session_state.market_pulse_cache[title_key] = (snapshot[0], time.time() - snapshot[1])
+
+    if st.button("Analyze Market Trends", key="market_pulse_button"):
+        if not job_title:
+            st.error("Please enter a job title.", icon="🚨")
+        else:
+            with st.spinner(f"Analyzing the job market for '{job_title}'..."):
+                analysis, age = get_market_pulse(job_title)
+                if analysis:
+                    st.session_state.market_pulse_cache[title_key] = (analysis, time.time() - age)
+                else:
+                    st.error("Failed to get market analysis. The model may be overloaded or the request timed out. Please try again later.", icon="🔥")
+
+    if job_title and title_key in st.session_state.market_pulse_cache:
+        data, updated_at = st.session_state.market_pulse_cache[title_key]
+        st.markdown("---")
+        st.subheader(f"Insights for: {job_title}")
+        st.caption(f"Market snapshot updated {format_age(time.time() - updated_at)}.")
+        
+        st.markdown(f'<div class="card"><p><strong>Market Summary:</strong> {data.get("market_summary", "N/A")}</p></div>', unsafe_allow_html=True)
+
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric(label="Market Sentiment", value=data.get("market_sentiment", "N/A"))
+        with col2:
+            st.metric(label="Estimated Salary Range (India)", value=data.get("salary_range", "N/A"))
+        
+        c1, c2 = st.columns(2)
+        with c1:
+            with st.container(border=True):
+                st.subheader("🔥 Trending Skills")
+                for skill in data.get("trending_skills", []):
+                    st.markdown(f"- {skill}")
+        
+        with c2:
+            with st.container(border=True):
+                st.subheader("🏢 Top Hiring Industries")
+                for industry in data.get("top_industries", []):
+                    st.markdown(f"- {industry}")
+        
+# --- Interview Engine ---
+def new_interview_memory():
+    return {"summary": "", "summarized": 0, "compacting": False}
+
+
+@st.cache_resource
+def get_interview_memory_lock():
+    """Guards interview memories, which background compaction updates while script runs read them."""
+    return threading.Lock()
+
+
+def read_interview_memory(memory):
+    """A copy of `memory` whose summary and `summarized` watermark come from the same compaction."""
+    with get_interview_memory_lock():
+        return dict(memory)
+
+
+def build_interview_contents(transcript, memory):
+    """
+    Multi-turn contents for the next interviewer reply: the system prompt and rolling
+    summary of older turns, followed by the recent turns verbatim.
+    """
+    preamble = transcript[0]["content"]
+    if memory["summary"]:
+        preamble += f"\n\nSummary of the interview so far:\n{memory['summary']}\n\nContinue the interview from where it left off."
+    contents = [{"role": "user", "parts": [preamble]}]
+    for message in transcript[1 + memory["summarized"]:]:
+        contents.append({"role": "user" if message["role"] == "user" else "model", "parts": [message["content"]]})
+    return contents
+
+
+def interview_system_prompt(job_role):
+    return f"You are an expert interviewer for a '{job_role}' position. Introduce yourself and ask the first relevant question. Ask only one question at a time and wait for the user's response before proceeding. Keep your questions concise."
+
+
+def plan_interview_compaction(recent, summary):
+    """
+    Decides whether the oldest of the `recent` (not yet summarized) turns should be folded
+    into the rolling `summary` (they exceed INTERVIEW_VERBATIM_MESSAGES or
+    INTERVIEW_CONTEXT_TOKENS). Returns (messages_to_fold, summary_prompt), or None when the
+    context is still small enough.
+    """
+    recent_tokens = [estimate_tokens(message["content"]) for message in recent]
+    fold = max(0, len(recent) - INTERVIEW_VERBATIM_MESSAGES)
+    while fold < len(recent) - 2 and sum(recent_tokens[fold:]) > INTERVIEW_CONTEXT_TOKENS:
+        fold += 1
+    # Fold whole interviewer/candidate pairs so the verbatim part still starts with the interviewer.
+    fold -= fold % 2
+    if fold <= 0:
+        return None
+
+    folded_text = "\n".join(
+        f"{'Candidate' if message['role'] == 'user' else 'Interviewer'}: {message['content']}" for message in recent[:fold]
+    )
+    prompt = f"""
+    You are keeping notes during a job interview. Update the running summary with the new exchanges below.
+    Keep the questions asked, the key points of each answer and any impressions worth remembering. Use at most 150 words.
+
+    Running summary:
+    {summary or '(none yet)'}
+
+    New exchanges:
+    {folded_text}
+    """
+    return fold, prompt
+
+
+def compact_interview_memory(recent, memory):
+    """
+    Folds the oldest of the `recent` turns (those after memory["summarized"]) into the rolling
+    summary when plan_interview_compaction says so, keeping per-turn context flat.
+    """
+    plan = plan_interview_compaction(recent, memory["summary"])
+    if plan is None:
+        return
+    fold, prompt = plan
+    summary = get_ai_response(prompt, call_site="interview_summary")
+    if summary:
+        # Published together: a reader must never pair the new summary with the old watermark.
+        with get_interview_memory_lock():
+            memory.update(summary=summary.strip(), summarized=memory["summarized"] + fold)
+
+
+async def interview_turn_async(job_role, transcript, memory):
+    """
+    One interviewer turn for callers outside Streamlit. `transcript` holds the visible
+    user/bot messages (no system prompt); returns (reply, memory) with memory compacted
+    once the reply is in, or (None, memory) when generation failed.
+    """
+    transcript = [{"role": "system", "content": interview_system_prompt(job_role)}] + list(transcript)
+    memory = {**new_interview_memory(), **(memory or {}), "compacting": False}
+    call_site = "interview_turn" if len(transcript) > 1 else "interview_opener"
+    if len(transcript) > 1:
+        prompt = build_interview_contents(transcript, memory)
+    else:
+        prompt = transcript[0]["content"]
+    reply = await get_ai_response_async(prompt, call_site=call_site)
+    if reply is None:
+        return None, memory
+
+    plan = plan_interview_compaction(transcript[1 + memory["summarized"]:] + [{"role": "bot", "content": reply}], memory["summary"])
+    if plan is not None:
+        fold, summary_prompt = plan
+        try:
+            summary = await get_ai_response_async(summary_prompt, call_site="interview_summary")
+        except AIServiceError:
+            summary = None  # The reply stands; compaction is retried on the next turn.
+        if summary:
+            memory = {**memory, "summary": summary.strip(), "summarized": memory["summarized"] + fold}
+    return reply, memory
+
+
+def compact_interview_memory_in_background(transcript, memory):
+    """
+    Runs compact_interview_memory off the script thread. Only the unsummarized tail of the
+    transcript is handed over, sliced here, so a spilled transcript's older chunks stay on disk.
+    """
+    if memory["compacting"]:
+        return
+    recent = transcript[1 + memory["summarized"]:]
+
+    def run():
+        try:
+            compact_interview_memory(recent, memory)
+        finally:
+            memory["compacting"] = False
+
+    memory["compacting"] = True
+    get_llm_executor().submit(run)
+
+
+def chat_message_html(role, content):
+    if role == "user":
+        return f'<div class="chat-message user"><div style="flex-grow: 1; text-align: right;">{content}</div><div class="avatar" style="background-color: #4B8BBE; color: white; display: flex; align-items: center; justify-content: center;">You</div></div>'
+    if role == "bot":
+        return f'<div class="chat-message bot"><div class="avatar" style="background-color: #1E3A5F; color: white; display: flex; align-items: center; justify-content: center;">AI</div><div>{content}</div></div>'
+    return ""
+
+
+def render_chat_message(role, content, container=None):
+    target = container if container is not None else st
+    target.markdown(chat_message_html(role, content), unsafe_allow_html=True)
+
+
+def render_chat_history(chat):
+    """
+    Past messages (chat[0] is the system prompt) as a single markdown element, with only the
+    most recent ones drawn by default. Slicing just the recent end keeps spilled turns on disk.
+    """
+    hidden = max(0, len(chat) - 1 - INTERVIEW_VISIBLE_MESSAGES)
+    if hidden and not st.toggle(f"Show {hidden} earlier messages", key="interview_show_all"):
+        messages = chat[1 + hidden:]
+    else:
+        messages = chat[1:]
+    if messages:
+        st.markdown("\n".join(chat_message_html(m["role"], m["content"]) for m in messages), unsafe_allow_html=True)
+
+
+def stream_chat_message(chunks):
+    """Renders a bot chat bubble that grows as chunks arrive and returns the full text."""
+    placeholder = st.empty()
+    text = ""
+    for chunk in chunks:
+        text += chunk
+        render_chat_message("bot", text + " ▌", placeholder)
+    if text:
+        render_chat_message("bot", text, placeholder)
+    else:
+        placeholder.empty()
+    return text
+
+
+@timed_render("mock_interview")
+def render_mock_interview():
+    st.title("🎙️ AI Mock Interview Simulator")
+    st.markdown("Practice your interview skills. The AI will act as your interviewer and provide feedback.")
+
+    job_role = st.text_input("Enter the job role you want to practice for:", value=st.session_state.user_profile.get("career_goal", ""))
+
+    if st.button("Start New Interview", type="primary") and job_role:
+        st.session_state.interview_active = True
+        st.session_state.interview_feedback = None
+        st.session_state.interview_chat = SpillingList("interview_chat", [{
+            "role": "system",
+            "content": interview_system_prompt(job_role)
+        }])
+        st.session_state.interview_memory = new_interview_memory()
+
+    # Feedback is written by a background job; collect it before the panel draws it.
+    feedback_job = None
+    if st.session_state.interview_feedback_job:
+        job, finished = collect_job(st.session_state.interview_feedback_job)
+        if finished:
+            st.session_state.interview_feedback_job = None
+            if job is not None and job.status == "cancelled" and job.text:
+                st.session_state.interview_feedback = job.text + "\n\n*Feedback generation was cancelled.*"
+            elif job is not None and job.status == "done":
+                st.session_state.interview_feedback = job.result
+            else:
+                error = (job.error if job is not None else None) or "Failed to generate interview feedback. Please try again."
+                if job is not None and job.text:
+                    st.session_state.interview_feedback = job.text + "\n\n*This feedback is incomplete: generation stopped partway.*"
+                st.error(error, icon="🔥")
+        else:
+            feedback_job = job
+
+    render_interview_panel(job_role)
+
+    if feedback_job is not None:
+        st.subheader("📋 Interview Feedback")
+        render_jobs((feedback_job.id,), "Cancel feedback")
+
+
+@st.fragment
+@timed_render("interview_panel")
+@track_payload("interview_panel")
+def render_interview_panel(job_role):
+    """The chat and its controls. Answering reruns only this fragment, not the sidebar and the rest of the app."""
+    if not st.session_state.interview_active:
+        st.info("Enter a job role and click 'Start New Interview' to begin.")
+        if st.session_state.interview_feedback:
+            st.subheader("📋 Interview Feedback")
+            st.markdown(st.session_state.interview_feedback)
+        return
+
+    # Display chat history
+    chat_container = st.container(height=500, border=True)
+    with chat_container:
+        render_chat_history(st.session_state.interview_chat)
+
+    # The interviewer's reply is streamed straight into the chat, so no rerun is needed afterwards.
+    prompt, call_site = None, None
+    if user_input := st.chat_input("Your answer..."):
+        st.session_state.interview_chat.append({"role": "user", "content": user_input})
+        with chat_container:
+            render_chat_message("user", user_input)
+        prompt = build_interview_contents(st.session_state.interview_chat, read_interview_memory(st.session_state.interview_memory))
+        call_site = "interview_turn"
+    elif len(st.session_state.interview_chat) == 1:
+        opener = take_prefetched_opener(job_role)
+        if opener:
+            st.session_state.interview_chat.append({"role": "bot", "content": opener})
+            with chat_container:
+                render_chat_message("bot", opener)
+        else:
+            prompt = st.session_state.interview_chat[0]['content']
+            call_site = "interview_opener"
+
+    if prompt:
+        with chat_container:
+            ai_response = stream_chat_message(get_ai_response_stream(prompt, call_site=call_site))
+        if ai_response:
+            st.session_state.interview_chat.append({"role": "bot", "content": ai_response})
+            # Summarising older turns happens after the reply is shown, so it never adds to turn latency.
+            compact_interview_memory_in_background(st.session_state.interview_chat, st.session_state.interview_memory)
+        elif call_site == "interview_opener":
+            st.session_state.interview_active = False
+            st.rerun(scope="fragment")
+
+    if st.button("End Interview & Get Feedback"):
+        transcript_text = "\n".join([f"{'User' if msg['role'] == 'user' else 'Interviewer'}: {msg['content']}" for msg in st.session_state.interview_chat[1:]])
+        feedback_prompt = f"""
+        The following is a transcript of a job interview for a '{job_role}' position.
+        Please act as a hiring manager and provide constructive feedback for the user (Human).
+        Analyze their responses for clarity, STAR method usage (for behavioral questions), technical accuracy, and overall communication style.
+        Provide a summary of their strengths, areas for improvement, and actionable tips. Format the response in Markdown.
+
+        Transcript:
+        {transcript_text}
+        """
+        job = get_job_executor().submit(
+            "feedback",
+            lambda job: stream_into_job(job, get_ai_response_stream(feedback_prompt, call_site="feedback", raise_errors=True)),
+        )
+        if job is None:
+            st.warning(JOB_QUEUE_FULL_MESSAGE, icon="⏳")
+            return
+        st.session_state.interview_active = False
+        st.session_state.interview_feedback = None
+        st.session_state.interview_feedback_job = job.id
+        # A full rerun, so the page draws the job's progress outside this fragment.
+        st.rerun()
+        
+def copilot_resume_prefix(resume_content, call_site):
+    """
+    The opening of every co-pilot prompt: just the user's resume, so critiques and cover letters
+    against different job descriptions share one cached prefix.
+    """
+    return f"""
+        **User's Resume Content:**
+        {fit_to_budget(resume_content, call_site, "resume")}
+        """
+
+
+def build_critique_prompt(job_desc, resume_content, alignment=None):
+    if alignment is None:
+        alignment = keyword_alignment(resume_content, job_desc)
+    job_desc = fit_to_budget(job_desc, "critique", "job_description")
+    return PrefixedPrompt(copilot_resume_prefix(resume_content, "critique"), f"""
+        Act as a professional resume reviewer. Critique the resume above based on the provided job description.
+
+        **Job Description:**
+        {job_desc}
+
+        **Precomputed Keyword Alignment:** {alignment['score']}% of the job description's weighted keywords appear in the resume.
+        Missing keywords, most important first: {', '.join(alignment['missing']) or 'none'}
+
+        Provide a detailed critique covering these areas:
+        1.  **Keyword Alignment:** Using the precomputed alignment above rather than re-deriving it, explain which missing keywords matter most and how to work them into the resume truthfully.
+        2.  **Action Verb Strength:** Suggest stronger action verbs to make the experience more impactful.
+        3.  **Quantifiable Results:** Point out where the user could add numbers or metrics to show achievements.
+        4.  **Overall Impression & Suggestions:** Give a final summary and actionable advice for improvement.
+
+        Format the output using Markdown.
+        """)
+
+
+def build_cover_letter_prompt(job_desc, resume_content):
+    job_desc = fit_to_budget(job_desc, "cover_letter", "job_description")
+    return PrefixedPrompt(copilot_resume_prefix(resume_content, "cover_letter"), f"""
+        Act as a professional career coach. Write a compelling and professional draft for a cover letter based on the user's resume above and the target job description.
+
+        **Job Description:**
+        {job_desc}
+
+        The cover letter should:
+        - Be structured in 3-4 paragraphs.
+        - Directly address the key requirements from the job description.
+        - Highlight the most relevant skills and experiences from the user's resume.
+        - Maintain a professional and enthusiastic tone.
+        - Be a draft that the user can easily edit and personalize.
+
+        Format the output using Markdown.
+        """)
+
+
+@timed_render("resume_copilot")
+def render_resume_copilot():
+    st.title("📄 Resume & Cover Letter Co-pilot")
+    st.markdown("Tailor your application materials to perfectly match the job you want.")
+    render_copilot_workspace()
+
+    pending = st.session_state.copilot_job
+    if pending:
+        job, finished = collect_job(pending["id"])
+        if finished:
+            st.session_state.copilot_job = None
+            st.session_state.copilot_result = {
+                "alignment": pending["alignment"],
+                "text": job.text if job is not None else "",
+                "status": job.status if job is not None else "failed",
+                "error": job.error if job is not None else None,
+            }
+        else:
+            render_keyword_alignment(pending["alignment"])
+            st.markdown("---")
+            st.subheader("✨ Your AI-Generated Result")
+            render_jobs((job.id,))
+            return
+
+    result = st.session_state.copilot_result
+    if result:
+        render_keyword_alignment(result["alignment"])
+        st.markdown("---")
+        st.subheader("✨ Your AI-Generated Result")
+        if result["text"]:
+            st.markdown(result["text"])
+        if result["status"] == "cancelled":
+            st.caption("Generation was cancelled.")
+        elif result["status"] != "done":
+            if result["text"]:
+                st.caption("This response is incomplete: generation stopped partway.")
+            st.error(result.get("error") or "Failed to generate a response. Please try again.", icon="🔥")
+
+
+@st.fragment
+@timed_render("copilot_workspace")
+@track_payload("copilot_workspace")
+def render_copilot_workspace():
+    col1, col2 = st.columns(2)
+
+    with col1:
+        job_desc = st.text_area("📋 Paste the Job Description Here", height=400, placeholder="e.g., We are looking for a proactive Product Manager...")
+    
+    with col2:
+        resume_content = st.text_area("📝 Paste Your Resume/CV Content Here", height=400, value=st.session_state.user_profile.get("resume_text", ""), placeholder="e.g., John Doe - Experienced Software Engineer...")
+
+    option = st.radio(
+        "What would you like to generate?",
+        ("Critique My Resume", "Draft a Cover Letter"),
+        horizontal=True,
+    )
+    
+    if st.button("Analyze and Generate", key="copilot_generate"):
+        if not job_desc or not resume_content:
+            st.error("Please paste both the job description and your resume content.", icon="🚨")
+        else:
+            # Scored locally, so the user sees the alignment before the model starts writing.
+            alignment = keyword_alignment(resume_content, job_desc)
+            if option == "Critique My Resume":
+                prompt = build_critique_prompt(job_desc, resume_content, alignment)
+            else: # Draft a Cover Letter
+                prompt = build_cover_letter_prompt(job_desc, resume_content)
+
+            call_site = "critique" if option == "Critique My Resume" else "cover_letter"
+            job = get_job_executor().submit(
+                call_site,
+                lambda job: stream_into_job(job, get_ai_response_stream(prompt, call_site=call_site, raise_errors=True)),
+            )
+            if job is None:
+                st.warning(JOB_QUEUE_FULL_MESSAGE, icon="⏳")
+                return
+            st.session_state.copilot_job = {"id": job.id, "alignment": alignment}
+            st.session_state.copilot_result = None
+            # A full rerun, so the page draws the job's progress outside this fragment.
+            st.rerun()
+
+
+@timed_render("session_memory")
+def render_session_memory():
+    st.title("🧠 Session Memory")
+    memory = get_session_memory()
+    rows = memory.snapshot()
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Sessions", len(rows))
+    col2.metric("In memory", f"{sum(r['memory_bytes'] for r in rows) / 1024:.0f} KiB", help=f"Cap: {memory.global_max_bytes / 1024 / 1024:.0f} MiB")
+    col3.metric("Spilled to disk", f"{sum(r['spilled_bytes'] for r in rows) / 1024:.0f} KiB")
+    st.caption(f"Per-session cap: {memory.session_max_bytes / 1024:.0f} KiB. Spilled sizes are compressed.")
+    st.dataframe(rows, use_container_width=True)
+
+
+# --- Main App Logic ---
+@track_payload("app")
+def main():
+    st.set_page_config(
+        page_title="Adept AI",
+        page_icon="🤖",
+        layout="wide",
+        initial_sidebar_state="expanded",
+    )
+    inject_styles()
+    start_metrics_server()
+    get_market_pulse_warmer()
+    init_session_state()
+
+    with st.sidebar:
         st.markdown(f'<h1>AI Career Advisor</h1>', unsafe_allow_html=True)
         
         # Navigation
@@ -693,11 +4105,15 @@ def main():
             "Mock Interview": "🎙️ Mock Interview",
             "Resume Co-pilot": "📄 Resume Co-pilot",
         }
+        if ADMIN_VIEW:
+            pages["Session Memory"] = "🧠 Session Memory"
         
+        # Callbacks switch the page before the click's script run, so navigation costs one run instead of two.
         for page_id, page_name in pages.items():
-            if st.button(page_name, use_container_width=True, type="secondary" if st.session_state.page != page_id else "primary"):
-                st.session_state.page = page_id
-                st.rerun()
+            st.button(
+                page_name, use_container_width=True, type="secondary" if st.session_state.page != page_id else "primary",
+                on_click=navigate, args=(page_id,),
+            )
 
         #st.markdown("---")
         #st.info("Built for the Gen AI Hackathon with ❤️ by a Team TECHNOKAMI.")
@@ -717,6 +4133,18 @@ def main():
         render_mock_interview()
     elif st.session_state.page == "Resume Co-pilot":
         render_resume_copilot()
+    elif st.session_state.page == "Session Memory" and ADMIN_VIEW:
+        render_session_memory()
+
+    # Reruns that navigate away (st.rerun) never get here, so only completed paints are recorded.
+    run_seconds = time.perf_counter() - SCRIPT_STARTED
+    get_metrics().observe(
+        "adept_script_run_seconds", "Wall time of a full script run, imports included.",
+        {"page": st.session_state.page}, run_seconds,
+    )
+    if not st.session_state.get("first_paint_recorded"):
+        st.session_state.first_paint_recorded = True
+        get_metrics().observe("adept_first_paint_seconds", "Script run time of a session's first page view.", {}, run_seconds)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,239 @@
+"""
+Async HTTP service exposing Adept AI's engines to other backends (e.g. a job portal):
+
+    python service.py --port 8080 --max-concurrency 32
+    python service.py --fake-model          # offline, for load tests
+
+Endpoints (JSON in, JSON out):
+    POST /v1/advisor           {"profile": {"career_goal", "skills", "resume_text", "interests"}}
+    POST /v1/market-pulse      {"job_title"}
+    POST /v1/interview/turn    {"job_role", "transcript": [{"role": "user"|"bot", "content"}], "memory"}
+    POST /v1/copilot           {"task": "critique"|"cover_letter", "resume", "job_description"}
+    POST /v1/keyword-alignment {"resume", "job_descriptions": [str, ...]}   local scoring, no model call (up to 500 JDs)
+    GET  /healthz
+    GET  /metrics              Prometheus text, same registry as the Streamlit app
+
+Model calls go through gen.get_ai_response_async (generate_content_async on the shared,
+process-wide client), so the response cache, rate limiter, circuit breaker and metrics are
+the same as in the app. Market Pulse is served from the app's snapshot store.
+
+Model failures map to statuses clients can act on: 503 while the circuit breaker is open,
+429 when rate limited, 400 for requests the model refuses, 504 past the call deadline and
+502 otherwise, with {"error", "reason"} and, where known, a Retry-After header.
+"""
+import argparse
+import asyncio
+import sys
+
+try:
+    from aiohttp import web
+except ImportError:  # Only the service needs aiohttp; the Streamlit app runs without it.
+    web = None
+
+DEFAULT_MAX_CONCURRENCY = 32
+# How long a request may wait for a concurrency slot before the service answers 503.
+DEFAULT_QUEUE_TIMEOUT = 10.0
+# Most job descriptions one /v1/keyword-alignment request may score.
+MAX_JOB_DESCRIPTIONS = 500
+
+
+# HTTP status for each gen.AIServiceError reason.
+AI_ERROR_STATUS = {"circuit_open": 503, "rate_limited": 429, "bad_request": 400, "deadline": 504, "unavailable": 502}
+
+
+class BadRequest(Exception):
+    pass
+
+
+def _ai_error_response(error):
+    headers = {"Retry-After": str(max(1, round(error.retry_after)))} if error.retry_after is not None else None
+    return web.json_response(
+        {"error": str(error), "reason": error.reason}, status=AI_ERROR_STATUS.get(error.reason, 502), headers=headers
+    )
+
+
+async def _json_body(request):
+    try:
+        body = await request.json()
+    except ValueError:
+        raise BadRequest("Request body must be valid JSON.")
+    if not isinstance(body, dict):
+        raise BadRequest("Request body must be a JSON object.")
+    return body
+
+
+def _require_text(body, key):
+    value = body.get(key)
+    if not isinstance(value, str) or not value.strip():
+        raise BadRequest(f"'{key}' is required.")
+    return value
+
+
+def _local_advisor_work(gen, profile):
+    return gen.local_advisor_sections(profile), gen.prepare_advisor_profile(profile)
+
+
+async def handle_advisor(request):
+    gen = request.app["gen"]
+    body = await _json_body(request)
+    raw = body.get("profile") or {}
+    skills = raw.get("skills") or []
+    if isinstance(skills, str):
+        skills = [s.strip() for s in skills.split(",") if s.strip()]
+    profile = {
+        "career_goal": _require_text(raw, "career_goal"),
+        "skills": skills,
+        "resume_text": raw.get("resume_text", ""),
+        "interests": raw.get("interests", ""),
+    }
+    if not profile["skills"] and not profile["resume_text"]:
+        raise BadRequest("Provide at least some skills or a resume.")
+
+    # Taxonomy scan and resume condensing are CPU-bound; keep them off the event loop.
+    analysis, prompt_profile = await asyncio.get_running_loop().run_in_executor(None, _local_advisor_work, gen, profile)
+    skill_gap = analysis.get("skill_gap_analysis")
+    sections = [section for section in gen.ADVISOR_SECTION_PROMPTS if section not in analysis]
+    results = await asyncio.gather(*(
+        gen.fetch_advisor_section_async(prompt_profile, section, request.app["single_flight"], skill_gap)
+        for section in sections
+    ), return_exceptions=True)
+    errors = [result for result in results if isinstance(result, BaseException)]
+    if errors and not analysis and len(errors) == len(results):
+        raise errors[0]
+    analysis.update((section, result) for section, result in zip(sections, results) if result and not isinstance(result, BaseException))
+    failed = [section for section in sections if section not in analysis]
+    return web.json_response({"analysis": analysis, "failed_sections": failed}, status=200 if analysis else 502)
+
+
+async def handle_market_pulse(request):
+    gen = request.app["gen"]
+    body = await _json_body(request)
+    job_title = gen.clean_job_title(_require_text(body, "job_title"))
+    analysis, age = await gen.get_market_pulse_async(job_title, request.app["single_flight"])
+    if analysis is None:
+        return web.json_response({"error": "Market analysis failed. Please try again later."}, status=502)
+    return web.json_response({"job_title": job_title, "analysis": analysis, "age_seconds": round(age)})
+
+
+async def handle_interview_turn(request):
+    gen = request.app["gen"]
+    body = await _json_body(request)
+    job_role = _require_text(body, "job_role")
+    transcript = body.get("transcript") or []
+    if not isinstance(transcript, list) or any(
+        not isinstance(m, dict) or m.get("role") not in ("user", "bot") or not isinstance(m.get("content"), str)
+        for m in transcript
+    ):
+        raise BadRequest("'transcript' must be a list of {\"role\": \"user\"|\"bot\", \"content\": str} messages.")
+    reply, memory = await gen.interview_turn_async(job_role, transcript, body.get("memory"))
+    if reply is None:
+        return web.json_response({"error": "The interviewer could not respond. Please try again."}, status=502)
+    return web.json_response({"reply": reply, "memory": memory})
+
+
+async def handle_copilot(request):
+    gen = request.app["gen"]
+    body = await _json_body(request)
+    task = body.get("task", "critique")
+    if task not in ("critique", "cover_letter"):
+        raise BadRequest("'task' must be 'critique' or 'cover_letter'.")
+    resume = _require_text(body, "resume")
+    job_description = _require_text(body, "job_description")
+    build_prompt = gen.build_critique_prompt if task == "critique" else gen.build_cover_letter_prompt
+    # The critique prompt embeds the NumPy keyword alignment; build it off the event loop.
+    prompt = await asyncio.get_running_loop().run_in_executor(None, build_prompt, job_description, resume)
+    result = await gen.get_ai_response_async(prompt, call_site=task, single_flight=request.app["single_flight"])
+    if result is None:
+        return web.json_response({"error": "Generation failed. Please try again."}, status=502)
+    return web.json_response({"task": task, "result": result})
+
+
+async def handle_keyword_alignment(request):
+    gen = request.app["gen"]
+    body = await _json_body(request)
+    resume = _require_text(body, "resume")
+    job_descriptions = body.get("job_descriptions")
+    if not isinstance(job_descriptions, list) or not job_descriptions or not all(isinstance(jd, str) for jd in job_descriptions):
+        raise BadRequest("'job_descriptions' must be a non-empty list of strings.")
+    if len(job_descriptions) > MAX_JOB_DESCRIPTIONS:
+        raise BadRequest(f"'job_descriptions' may hold at most {MAX_JOB_DESCRIPTIONS} entries; split larger batches.")
+    # CPU-bound NumPy scoring; keep it off the event loop.
+    results = await asyncio.get_running_loop().run_in_executor(None, gen.keyword_alignment_many, resume, job_descriptions)
+    return web.json_response({"results": results})
+
+
+async def handle_health(request):
+    return web.json_response({"status": "ok"})
+
+
+async def handle_metrics(request):
+    text = request.app["gen"].get_metrics().prometheus_text()
+    return web.Response(text=text, content_type="text/plain", charset="utf-8")
+
+
+def _require_aiohttp():
+    if web is None:
+        raise SystemExit("The HTTP service needs aiohttp: pip install aiohttp")
+
+
+def create_app(max_concurrency=DEFAULT_MAX_CONCURRENCY, queue_timeout=DEFAULT_QUEUE_TIMEOUT):
+    _require_aiohttp()
+    import gen
+
+    slots = asyncio.Semaphore(max_concurrency)
+
+    @web.middleware
+    async def limit_concurrency(request, handler):
+        if not request.path.startswith("/v1/"):
+            return await handler(request)
+        try:
+            await asyncio.wait_for(slots.acquire(), timeout=queue_timeout)
+        except asyncio.TimeoutError:
+            return web.json_response({"error": "The service is at capacity. Please retry shortly."}, status=503)
+        try:
+            return await handler(request)
+        except BadRequest as e:
+            return web.json_response({"error": str(e)}, status=400)
+        except gen.AIServiceError as e:
+            return _ai_error_response(e)
+        finally:
+            slots.release()
+
+    app = web.Application(middlewares=[limit_concurrency])
+    app["gen"] = gen
+    app["single_flight"] = gen.AsyncSingleFlight()
+    gen.get_market_pulse_warmer()
+    app.add_routes([
+        web.post("/v1/advisor", handle_advisor),
+        web.post("/v1/market-pulse", handle_market_pulse),
+        web.post("/v1/interview/turn", handle_interview_turn),
+        web.post("/v1/copilot", handle_copilot),
+        web.post("/v1/keyword-alignment", handle_keyword_alignment),
+        web.get("/healthz", handle_health),
+        web.get("/metrics", handle_metrics),
+    ])
+    return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    # Local only by default: the API is unauthenticated and spends model quota.
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--max-concurrency", type=int, default=DEFAULT_MAX_CONCURRENCY, help="Requests handled at once.")
+    parser.add_argument("--queue-timeout", type=float, default=DEFAULT_QUEUE_TIMEOUT, help="Seconds to wait for a slot before 503.")
+    parser.add_argument("--fake-model", action="store_true", help="Serve from the offline fake model (load tests).")
+    args = parser.parse_args(argv)
+    # Checked first: web.run_app(create_app(...)) looks up web.run_app before create_app runs.
+    _require_aiohttp()
+
+    if args.fake_model:
+        import fake_model
+
+        fake_model.install()
+    web.run_app(create_app(args.max_concurrency, args.queue_timeout), host=args.host, port=args.port)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,20 @@
+"""
+Shared setup: gen.py reads its settings at import time, so the environment is pinned here,
+before any test imports it, and the Gemini client is replaced by the offline fake.
+"""
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+os.environ.setdefault("ADEPT_CACHE_DIR", tempfile.mkdtemp(prefix="adept-tests-"))
+os.environ.setdefault("ADEPT_METRICS_PORT", "0")
+os.environ.setdefault("ADEPT_METRICS_LOG", "")
+os.environ.setdefault("ADEPT_MARKET_PULSE_WARM_INTERVAL", "0")
+os.environ.setdefault("ADEPT_RETRY_BASE_DELAY", "0.001")
+
+import fake_model  # noqa: E402
+
+fake_model.install()
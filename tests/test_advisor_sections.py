@@ -0,0 +1,58 @@
+import pytest
+
+import gen
+
+
+@pytest.fixture
+def profile():
+    return {
+        "career_goal": "Data Scientist",
+        "skills": ["Python", "SQL", "Statistics"],
+        "resume_text": "Analyst at Acme.\nBuilt forecasting models.",
+        "interests": "Climate, sport analytics",
+    }
+
+
+def section_keys(profile):
+    fingerprints = gen.fingerprint_profile(profile)
+    return {section: gen.advisor_section_key(section, fingerprints) for section in gen.ADVISOR_SECTION_INPUTS}
+
+
+def changed_sections(before, after):
+    old, new = section_keys(before), section_keys(after)
+    return {section for section in old if old[section] != new[section]}
+
+
+def test_fingerprints_ignore_cosmetic_edits(profile):
+    edited = {
+        "career_goal": "  data   scientist ",
+        "skills": [" sql", "statistics ", "PYTHON", "Python"],
+        "resume_text": "Analyst at Acme.   Built forecasting\n\nmodels.",
+        "interests": "Climate,  sport analytics\n",
+    }
+    assert gen.fingerprint_profile(edited) == gen.fingerprint_profile(profile)
+
+
+@pytest.mark.parametrize(
+    "field, value, expected",
+    [
+        ("interests", "Music", {"alternative_careers", "summary"}),
+        ("skills", ["Python", "SQL"], set(gen.ADVISOR_SECTION_INPUTS)),
+        ("resume_text", "Analyst at Initech.", set(gen.ADVISOR_SECTION_INPUTS)),
+        ("career_goal", "ML Engineer", set(gen.ADVISOR_SECTION_INPUTS)),
+    ],
+)
+def test_an_edit_invalidates_only_the_sections_that_use_the_field(profile, field, value, expected):
+    assert changed_sections(profile, {**profile, field: value}) == expected
+
+
+def test_sections_never_share_a_key(profile):
+    keys = section_keys(profile)
+    assert len(set(keys.values())) == len(keys)
+
+
+def test_prompts_include_only_the_sections_inputs(profile):
+    gap = gen.build_advisor_prompt(profile, "skill_gap_analysis")
+    careers = gen.build_advisor_prompt(profile, "alternative_careers")
+    assert "sport analytics" not in str(gap)
+    assert "sport analytics" in str(careers)
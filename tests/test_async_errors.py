@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+
+import fake_model
+import gen
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+    breaker = gen.CircuitBreaker(failure_threshold=10, cooldown=60)
+    monkeypatch.setattr(gen, "get_circuit_breaker", lambda: breaker)
+    return breaker
+
+
+@pytest.fixture
+def model_errors():
+    def configure(code):
+        fake_model.configure(error_rate=1.0, error_code=code)
+
+    yield configure
+    fake_model.configure()
+
+
+def ask(prompt="Ask a question."):
+    return asyncio.run(gen.get_ai_response_async(prompt, call_site="interview_turn"))
+
+
+def test_answers_when_the_model_is_healthy(breaker):
+    assert ask()
+
+
+def test_open_circuit_raises_with_retry_after(breaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure("transient")
+    with pytest.raises(gen.AIServiceError) as raised:
+        ask()
+    assert raised.value.reason == "circuit_open"
+    assert raised.value.retry_after > 0
+
+
+@pytest.mark.parametrize("code, reason", [(400, "bad_request"), (429, "rate_limited"), (503, "unavailable"), (504, "deadline")])
+def test_model_errors_raise_their_reason(breaker, model_errors, code, reason):
+    model_errors(code)
+    with pytest.raises(gen.AIServiceError) as raised:
+        ask(f"Fail with {code}.")
+    assert raised.value.reason == reason
+
+
+def test_market_pulse_async_generates_and_stores(breaker):
+    analysis, age = asyncio.run(gen.get_market_pulse_async("Async Test Engineer"))
+    assert analysis["market_summary"] and age == 0.0
+    assert gen.get_market_pulse_store().peek("async test engineer")[0] == analysis
+
+
+def test_market_pulse_async_raises_without_a_snapshot(breaker, model_errors):
+    model_errors(400)
+    with pytest.raises(gen.AIServiceError):
+        asyncio.run(gen.get_market_pulse_async("Unseen Async Title"))
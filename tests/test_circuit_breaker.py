@@ -0,0 +1,95 @@
+import time
+
+import pytest
+
+import gen
+
+
+@pytest.fixture
+def breaker():
+    return gen.CircuitBreaker(failure_threshold=2, cooldown=0.05)
+
+
+def open_breaker(breaker):
+    breaker.record_failure("transient")
+    breaker.record_failure("transient")
+    assert not breaker.allow()
+
+
+def test_opens_after_consecutive_failures(breaker):
+    breaker.record_failure("transient")
+    assert breaker.allow()
+    breaker.record_failure("transient")
+    assert not breaker.allow()
+    assert breaker.retry_in() > 0
+
+
+def test_bad_requests_do_not_count(breaker):
+    for _ in range(5):
+        breaker.record_failure("bad_request")
+    assert breaker.allow()
+
+
+def test_success_resets_the_failure_count(breaker):
+    breaker.record_failure("transient")
+    breaker.record_success()
+    breaker.record_failure("transient")
+    assert breaker.allow()
+
+
+def test_single_probe_after_cooldown(breaker):
+    open_breaker(breaker)
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert not breaker.allow()
+
+
+def test_successful_probe_closes(breaker):
+    open_breaker(breaker)
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.allow()
+    assert breaker.allow()
+
+
+def test_failed_probe_reopens(breaker):
+    open_breaker(breaker)
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_failure("transient")
+    assert not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.allow()
+
+
+def test_bad_request_probe_closes(breaker):
+    open_breaker(breaker)
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_failure("bad_request")
+    assert breaker.allow()
+    assert breaker.retry_in() == 0.0
+
+
+def test_abandoned_probe_is_replaced(breaker):
+    open_breaker(breaker)
+    time.sleep(0.06)
+    assert breaker.allow()
+    # The probe never reports back (e.g. a stream the user navigated away from).
+    assert not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.allow()
+
+
+def test_classify_error():
+    assert gen.classify_error(fake_model_error(429)) == "quota"
+    assert gen.classify_error(fake_model_error(400)) == "bad_request"
+    assert gen.classify_error(fake_model_error(503)) == "transient"
+    assert gen.classify_error(ValueError("blocked by safety filters")) == "bad_request"
+
+
+def fake_model_error(code):
+    import fake_model
+
+    return fake_model.FakeAPIError(code, f"{code} from the fake model")
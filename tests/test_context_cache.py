@@ -0,0 +1,56 @@
+import time
+
+import pytest
+
+import fake_model
+import gen
+
+PREFIX = "Resume:\n" + "Built data pipelines in Python and SQL. " * 200
+
+
+@pytest.fixture
+def registry():
+    return gen.ContextCacheRegistry(ttl=600, max_entries=2)
+
+
+def wait_for_entry(registry, prefix=PREFIX):
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        entry = registry.lookup("gemini-2.5-flash", prefix)
+        if entry is not None:
+            return entry
+        time.sleep(0.01)
+    raise AssertionError("the context cache was never created")
+
+
+def test_first_sighting_is_sent_inline(registry):
+    created = fake_model.FakeCachedContent.created
+    assert registry.lookup("gemini-2.5-flash", PREFIX) is None
+    time.sleep(0.05)
+    assert fake_model.FakeCachedContent.created == created
+    assert registry.stats()["entries"] == 0
+
+
+def test_second_sighting_creates_in_the_background(registry):
+    created = fake_model.FakeCachedContent.created
+    assert registry.lookup("gemini-2.5-flash", PREFIX) is None
+    assert registry.lookup("gemini-2.5-flash", PREFIX) is None
+    entry = wait_for_entry(registry)
+    assert registry.lookup("gemini-2.5-flash", PREFIX) is entry
+    assert fake_model.FakeCachedContent.created == created + 1
+
+
+def test_failures_are_bounded(registry):
+    fake_model.configure(cache_min_tokens=10**9)
+    try:
+        for i in range(5):
+            prefix = f"{i}: {PREFIX}"
+            registry.lookup("gemini-2.5-flash", prefix)
+            registry.lookup("gemini-2.5-flash", prefix)
+        deadline = time.monotonic() + 5
+        while registry._creating and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        fake_model.configure()
+    assert registry.stats() == {"entries": 0, "failed": 2}
+    assert len(registry._seen) == 2
@@ -0,0 +1,27 @@
+import threading
+import time
+
+import gen
+
+
+def test_bounded_executor_turns_work_away_when_busy():
+    pool = gen.BoundedExecutor(1, "test-bounded")
+    release = threading.Event()
+    busy = pool.try_submit(lambda: release.wait(5))
+    assert busy is not None
+    assert pool.try_submit(lambda: "queued") is None
+    release.set()
+    busy.result(timeout=5)
+    # The slot is released by a done callback; wait for it rather than racing it.
+    for _ in range(100):
+        future = pool.try_submit(lambda: "ran")
+        if future is not None:
+            break
+        time.sleep(0.01)
+    assert future.result(timeout=5) == "ran"
+
+
+def test_refused_admission_frees_the_thread():
+    pool = gen.BoundedExecutor(1, "test-admit")
+    assert pool.try_submit(lambda: "never", admit=lambda: False) is None
+    assert pool.try_submit(lambda: "ran").result(timeout=5) == "ran"
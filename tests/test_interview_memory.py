@@ -0,0 +1,60 @@
+import time
+
+import pytest
+
+import gen
+
+
+def turn(i):
+    return {"role": "bot" if i % 2 else "user", "content": f"Message {i}: " + "word " * 20}
+
+
+def wait_for_compaction(memory):
+    deadline = time.monotonic() + 5
+    while memory["compacting"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not memory["compacting"]
+
+
+@pytest.fixture
+def transcript(monkeypatch):
+    """System prompt plus 40 turns, all but the last 12 spilled to disk, with disk reads recorded."""
+    monkeypatch.setattr(gen.SpillingList, "KEEP_IN_MEMORY", 12)
+    items = gen.SpillingList("test_interview", [{"role": "system", "content": "You are an interviewer."}])
+    for i in range(1, 41):
+        items.append(turn(i))
+    while items.spill_coldest():
+        pass
+    reads = []
+    read = items._read
+    monkeypatch.setattr(items, "_read", lambda name: reads.append(name) or read(name))
+    items.reads = reads
+    return items
+
+
+def test_plan_folds_whole_pairs_past_the_verbatim_window():
+    recent = [turn(i) for i in range(1, 14)]
+    fold, prompt = gen.plan_interview_compaction(recent, "Earlier notes.")
+    assert fold % 2 == 0 and len(recent) - fold <= gen.INTERVIEW_VERBATIM_MESSAGES + 1
+    assert "Earlier notes." in prompt and "Message 1:" in prompt
+
+
+def test_short_contexts_are_not_compacted():
+    assert gen.plan_interview_compaction([turn(1), turn(2)], "") is None
+
+
+def test_background_compaction_reads_only_the_unsummarized_tail(transcript):
+    memory = {**gen.new_interview_memory(), "summary": "Earlier notes.", "summarized": 28}
+    gen.compact_interview_memory_in_background(transcript, memory)
+    wait_for_compaction(memory)
+    assert transcript.reads == []
+    assert memory["summarized"] > 28 and memory["summary"]
+
+
+def test_contents_start_with_the_system_prompt_and_summary(transcript):
+    memory = {**gen.new_interview_memory(), "summary": "Earlier notes.", "summarized": 32}
+    contents = gen.build_interview_contents(transcript, memory)
+    assert contents[0]["parts"][0].startswith("You are an interviewer.")
+    assert "Earlier notes." in contents[0]["parts"][0]
+    assert len(contents) == 1 + 40 - 32
+    assert transcript.reads == []
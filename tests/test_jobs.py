@@ -0,0 +1,82 @@
+import threading
+
+import pytest
+
+import fake_model
+import gen
+
+
+@pytest.fixture
+def executor():
+    return gen.JobExecutor(max_workers=1, max_queued=1, retention=60)
+
+
+@pytest.fixture
+def failing_model():
+    fake_model.configure(error_rate=1.0, error_code=400)
+    yield
+    fake_model.configure()
+
+
+def wait(job):
+    job.future.result(timeout=5)
+    return job
+
+
+def test_runs_job_to_completion(executor):
+    job = wait(executor.submit("test", lambda job: "answer"))
+    assert job.status == "done"
+    assert job.result == "answer"
+    assert executor.get(job.id) is job
+
+
+def test_full_queue_returns_none(executor):
+    release = threading.Event()
+    running = executor.submit("test", lambda job: release.wait(5))
+    queued = executor.submit("test", lambda job: "queued")
+    assert executor.submit("test", lambda job: "rejected") is None
+    release.set()
+    assert wait(running).status == "done"
+    assert wait(queued).status == "done"
+    assert wait(executor.submit("test", lambda job: "accepted")).result == "accepted"
+
+
+def test_stream_failure_fails_job_and_keeps_partial_text(executor):
+    def chunks():
+        yield "The first half"
+        raise gen.AIResponseError("The AI response was interrupted.")
+
+    job = wait(executor.submit("test", lambda job: gen.stream_into_job(job, chunks())))
+    assert job.status == "failed"
+    assert job.text == "The first half"
+    assert job.error == "The AI response was interrupted."
+
+
+def test_cancelled_stream_stops_early(executor):
+    def chunks():
+        for word in ("one ", "two ", "three "):
+            yield word
+
+    def run(job):
+        job.cancel()
+        return gen.stream_into_job(job, chunks())
+
+    job = wait(executor.submit("test", run))
+    assert job.status == "cancelled"
+    assert job.text == "one "
+
+
+def test_response_stream_raises_model_errors_for_jobs(failing_model):
+    with pytest.raises(gen.AIResponseError, match="could not process"):
+        list(gen.get_ai_response_stream("Say something.", call_site="feedback", raise_errors=True))
+
+
+def test_response_stream_error_fails_job(executor, failing_model):
+    job = wait(
+        executor.submit(
+            "feedback",
+            lambda job: gen.stream_into_job(job, gen.get_ai_response_stream("Say something.", call_site="feedback", raise_errors=True)),
+        )
+    )
+    assert job.status == "failed"
+    assert job.error
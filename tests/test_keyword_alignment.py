@@ -0,0 +1,41 @@
+import gen
+
+RESUME = """SKILLS
+Python, SQL, Docker, Kubernetes, AWS
+EXPERIENCE
+Built ETL pipelines in Python and Airflow, deployed on Kubernetes."""
+
+JOB = """Requirements:
+Python, SQL and Spark. Experience with Kubernetes and Terraform.
+Responsibilities:
+Develop data pipelines. Develop dashboards with Tableau.
+Benefits:
+Free lunch and gym."""
+
+
+def test_scores_coverage_and_ranks_missing_keywords():
+    result = gen.keyword_alignment(RESUME, JOB)
+    assert 0 < result["score"] < 100
+    assert result["matched"][:3] == ["Python", "SQL", "Kubernetes"]
+    assert result["missing"][:3] == ["Apache Spark", "Terraform", "Tableau"]
+    assert [section["heading"] for section in result["sections"]] == ["Requirements", "Responsibilities"]
+
+
+def test_scores_do_not_depend_on_the_batch():
+    others = ["We need a Java developer with Spring and Docker experience.", "Sales manager, CRM, quotas, pipelines."]
+    alone = gen.keyword_alignment(RESUME, JOB)
+    assert gen.keyword_alignment_many(RESUME, [JOB, *others])[0] == alone
+    assert gen.keyword_alignment_many(RESUME, [*others, JOB])[2] == alone
+
+
+def test_skills_outweigh_plain_words_without_headings():
+    with_skill = gen.keyword_alignment("Python", "Python developer needed")
+    with_word = gen.keyword_alignment("developer", "Python developer needed")
+    assert with_skill["score"] > with_word["score"]
+
+
+def test_empty_job_descriptions_score_zero():
+    assert gen.keyword_alignment_many(RESUME, ["", "Benefits:\nFree lunch."]) == [
+        {"score": 0, "missing": [], "matched": [], "sections": []},
+        {"score": 0, "missing": [], "matched": [], "sections": []},
+    ]
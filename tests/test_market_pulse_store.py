@@ -0,0 +1,78 @@
+import types
+
+import pytest
+
+import gen
+
+
+@pytest.fixture
+def store(tmp_path):
+    return gen.MarketPulseStore(str(tmp_path / "market_pulse.sqlite3"))
+
+
+def test_titles_share_a_snapshot_across_spellings(store):
+    store.put("UX Designer", {"market_summary": "steady"})
+    assert store.peek(" ux  designer")[0] == {"market_summary": "steady"}
+    assert store.lookup("Ux Designer")[0] == {"market_summary": "steady"}
+
+
+def test_keeps_the_first_spelling_for_the_warmer(store):
+    store.lookup("iOS Developer")
+    store.lookup("ios developer")
+    assert store.due_for_refresh(top_n=5, max_age=0) == ["iOS Developer"]
+
+
+def test_peek_does_not_count_requests(store):
+    store.lookup("Data Scientist")
+    store.peek("Product Manager")
+    assert store.due_for_refresh(top_n=5, max_age=0) == ["Data Scientist"]
+
+
+def test_job_titles_keep_the_users_spelling():
+    assert gen.clean_job_title("  UX   Designer ") == "UX Designer"
+    assert gen.normalize_job_title("  UX   Designer ") == gen.normalize_job_title("ux designer")
+
+
+@pytest.fixture
+def pulse(store, monkeypatch):
+    """get_market_pulse over `store`, with a settable clock and background refreshes recorded in `pulse.refreshes`."""
+    now = [1_000_000.0]
+    monkeypatch.setattr(gen.time, "time", lambda: now[0])
+    monkeypatch.setattr(gen, "get_market_pulse_store", lambda: store)
+    refreshes = []
+    warmer = types.SimpleNamespace(refresh_in_background=refreshes.append)
+    monkeypatch.setattr(gen, "get_market_pulse_warmer", lambda: warmer)
+    return types.SimpleNamespace(now=now, refreshes=refreshes, store=store)
+
+
+def test_fresh_snapshots_are_served_as_they_are(pulse):
+    pulse.store.put("Data Engineer", {"market_summary": "cached"})
+    pulse.now[0] += gen.MARKET_PULSE_FRESH_SECONDS - 1
+    assert gen.get_market_pulse("Data Engineer")[0] == {"market_summary": "cached"}
+    assert pulse.refreshes == []
+
+
+def test_stale_snapshots_are_served_while_a_refresh_runs(pulse):
+    pulse.store.put("Data Engineer", {"market_summary": "cached"})
+    pulse.now[0] += gen.MARKET_PULSE_FRESH_SECONDS + 1
+    analysis, age = gen.get_market_pulse("Data Engineer")
+    assert analysis == {"market_summary": "cached"}
+    assert age == gen.MARKET_PULSE_FRESH_SECONDS + 1
+    assert pulse.refreshes == ["Data Engineer"]
+
+
+def test_expired_snapshots_are_regenerated(pulse):
+    pulse.store.put("Data Engineer", {"market_summary": "cached"})
+    pulse.now[0] += gen.MARKET_PULSE_STALE_SECONDS + 1
+    analysis, age = gen.get_market_pulse("Data Engineer")
+    assert analysis != {"market_summary": "cached"} and analysis["market_summary"]
+    assert age == 0.0
+    assert pulse.store.peek("data engineer") == (analysis, 0.0)
+
+
+def test_expired_snapshot_beats_a_failed_generation(pulse, monkeypatch):
+    pulse.store.put("Data Engineer", {"market_summary": "cached"})
+    pulse.now[0] += gen.MARKET_PULSE_STALE_SECONDS + 1
+    monkeypatch.setattr(gen, "generate_market_pulse", lambda job_title: None)
+    assert gen.get_market_pulse("Data Engineer")[0] == {"market_summary": "cached"}
+    assert gen.get_market_pulse("Never Generated") == (None, 0.0)
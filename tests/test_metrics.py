@@ -0,0 +1,20 @@
+import json
+
+import gen
+
+
+def test_event_log_is_off_without_a_path(tmp_path):
+    metrics = gen.MetricsRegistry()
+    metrics.log({"event": "render", "page": "home"})
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_event_log_rotates(tmp_path):
+    path = tmp_path / "metrics.jsonl"
+    metrics = gen.MetricsRegistry(str(path), log_max_bytes=2000)
+    for i in range(100):
+        metrics.log({"event": "render", "page": "home 100%", "i": i})
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["metrics.jsonl", "metrics.jsonl.1"]
+    assert path.stat().st_size <= 2000
+    assert json.loads(path.read_text().splitlines()[-1])["i"] == 99
+
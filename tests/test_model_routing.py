@@ -0,0 +1,144 @@
+import contextlib
+import types
+
+import pytest
+
+import fake_model
+import gen
+
+GOOD_TEXT = "Tell me about a project where you led the design end to end."
+SCHEMA = {
+    "type": "OBJECT",
+    "properties": {"title": {"type": "STRING"}, "years": {"type": "INTEGER"}, "tags": {"type": "ARRAY", "items": {"type": "STRING"}}},
+    "required": ["title"],
+}
+
+
+@pytest.mark.parametrize(
+    "result, is_json, schema, problem",
+    [
+        (GOOD_TEXT, False, None, None),
+        ("  Sure.  ", False, None, "too_short"),
+        ("I'm sorry, but I can't help with a career question like that.", False, None, "refusal"),
+        ("As an AI language model I have no opinion on your resume.", False, None, "refusal"),
+        ({"anything": 1}, True, None, None),
+        ({}, True, None, "empty"),
+        ({"title": "Analyst", "years": 3, "tags": ["sql"]}, True, SCHEMA, None),
+        ({"title": "", "years": 3}, True, SCHEMA, "missing_field"),
+        ({"title": "Analyst", "years": "three"}, True, SCHEMA, "schema"),
+        ({"title": "Analyst", "years": True}, True, SCHEMA, "schema"),
+        ({"title": "Analyst", "tags": ["sql", 4]}, True, SCHEMA, "schema"),
+        (["not", "an", "object"], True, SCHEMA, "schema"),
+    ],
+)
+def test_answer_problem(result, is_json, schema, problem):
+    assert gen.answer_problem(result, is_json, schema) == problem
+
+
+@pytest.fixture
+def records(monkeypatch):
+    """Every LLMCallRecord made during the test, in order."""
+    records = []
+    track = gen.track_llm_call
+
+    @contextlib.contextmanager
+    def tracking(call_site):
+        with track(call_site) as record:
+            records.append(record)
+            yield record
+
+    monkeypatch.setattr(gen, "track_llm_call", tracking)
+    return records
+
+
+@pytest.fixture
+def scripted(monkeypatch):
+    """Routes interview_turn through light then standard; set each tier's answer in `scripted.answers`."""
+    monkeypatch.setitem(gen.MODEL_ROUTES, "interview_turn", ("light", "standard"))
+    scripted = types.SimpleNamespace(answers={}, calls=[])
+
+    def generate(prompt, is_json, generation_config, record, tier="standard", escalate=False):
+        scripted.calls.append((tier, escalate, generation_config))
+        answer = scripted.answers[tier]
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+    monkeypatch.setattr(gen, "_generate_response", generate)
+    return scripted
+
+
+def outcomes(record):
+    return [(attempt["tier"], attempt["outcome"], attempt["reason"]) for attempt in record.tiers]
+
+
+def test_good_light_answer_is_not_escalated(scripted, records):
+    scripted.answers.update(light=GOOD_TEXT, standard="unused")
+    assert gen.get_ai_response("Ask a question.", call_site="interview_turn") == GOOD_TEXT
+    assert [(tier, escalate) for tier, escalate, _ in scripted.calls] == [("light", True)]
+    assert outcomes(records[-1]) == [("light", "ok", None)]
+
+
+def test_poor_light_answer_escalates(scripted, records):
+    scripted.answers.update(light="Okay.", standard=GOOD_TEXT)
+    assert gen.get_ai_response("Ask a question.", call_site="interview_turn") == GOOD_TEXT
+    assert [(tier, escalate) for tier, escalate, _ in scripted.calls] == [("light", True), ("standard", False)]
+    assert outcomes(records[-1]) == [("light", "escalated", "too_short"), ("standard", "ok", None)]
+
+
+def test_low_quality_exception_escalates(scripted, records):
+    scripted.answers.update(light=gen.LowQualityAnswer("malformed_json"), standard=GOOD_TEXT)
+    assert gen.get_ai_response("Ask a question.", call_site="interview_turn") == GOOD_TEXT
+    assert outcomes(records[-1]) == [("light", "escalated", "malformed_json"), ("standard", "ok", None)]
+
+
+def test_failed_call_is_not_escalated(scripted, records):
+    scripted.answers.update(light=None, standard=GOOD_TEXT)
+    assert gen.get_ai_response("Ask a question.", call_site="interview_turn") is None
+    assert outcomes(records[-1]) == [("light", "error", None)]
+    assert records[-1].status == "error"
+
+
+def test_final_tier_answer_is_kept_even_if_poor(scripted):
+    scripted.answers.update(light="Okay.", standard="Fine.")
+    assert gen.get_ai_response("Ask a question.", call_site="interview_turn") == "Fine."
+
+
+def test_each_tier_gets_its_own_generation_config(scripted):
+    scripted.answers.update(light="Okay.", standard=GOOD_TEXT)
+    gen.get_ai_response("Ask a question.", call_site="interview_turn")
+    light, standard = (config for _, _, config in scripted.calls)
+    assert light == gen._default_generation_config(tier="light")
+    assert standard == gen._default_generation_config(tier="standard")
+    assert light != standard
+
+
+def test_routes_come_from_settings(monkeypatch):
+    monkeypatch.setenv("ADEPT_ROUTE_FEEDBACK", "light, bogus ,standard")
+    assert gen._route_setting("feedback", "standard") == ("light", "standard")
+    monkeypatch.setenv("ADEPT_ROUTE_FEEDBACK", "bogus")
+    assert gen._route_setting("feedback", "light") == ("standard",)
+    assert gen.model_route("not_a_call_site") == ("standard",)
+
+
+def test_fake_model_answer_passes_the_first_tier(records):
+    analysis = gen.get_ai_response(
+        "Market pulse for a routing test.", is_json=True, call_site="market_pulse", response_schema=gen.MARKET_PULSE_SCHEMA
+    )
+    assert gen.answer_problem(analysis, True, gen.MARKET_PULSE_SCHEMA) is None
+    assert outcomes(records[-1]) == [("light", "ok", None)]
+    assert records[-1].tiers[0]["cost_usd"] > 0
+
+
+def test_repaired_json_missing_fields_escalates(records):
+    # The fake truncates JSON, which is repaired locally but loses the last required field.
+    fake_model.configure(malformed_json_rate=1.0)
+    try:
+        result = gen.get_ai_response(
+            "Market pulse for a truncated test.", is_json=True, call_site="market_pulse", response_schema=gen.MARKET_PULSE_SCHEMA
+        )
+    finally:
+        fake_model.configure()
+    assert result["market_summary"]
+    assert records[-1].json_outcomes == ["repaired", "repaired"]
+    assert outcomes(records[-1]) == [("light", "escalated", "missing_field"), ("standard", "ok", None)]
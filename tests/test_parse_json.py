@@ -0,0 +1,43 @@
+import json
+
+import pytest
+
+import gen
+
+PAYLOAD = {"market_summary": "Strong demand.", "trending_skills": ["Python", "SQL"], "salary_range": "$90k - $120k"}
+TEXT = json.dumps(PAYLOAD)
+
+
+def test_clean_json_is_ok():
+    assert gen.parse_json_response(TEXT) == (PAYLOAD, "ok")
+
+
+@pytest.mark.parametrize("damaged", [
+    "```json\n" + TEXT + "\n```",
+    "Here is the analysis:\n" + TEXT + "\nLet me know if you need more.",
+    TEXT.replace('"SQL"]', '"SQL",]'),
+])
+def test_fences_prose_and_trailing_commas_are_repaired(damaged):
+    assert gen.parse_json_response(damaged) == (PAYLOAD, "repaired")
+
+
+def test_truncated_output_keeps_complete_fields():
+    data, outcome = gen.parse_json_response("```json\n" + TEXT[:TEXT.index('"salary_range"') + 5])
+    assert outcome == "repaired"
+    assert data["market_summary"] == PAYLOAD["market_summary"]
+    assert data["trending_skills"] == PAYLOAD["trending_skills"]
+
+
+def test_truncated_inside_a_string():
+    data, _ = gen.parse_json_response('{"summary": "You have a strong foun')
+    assert data == {"summary": "You have a strong foun"}
+
+
+def test_escaped_quotes_survive_repair():
+    data, _ = gen.parse_json_response('{"a": "say \\"hi\\"", "b": [1, 2')
+    assert data == {"a": 'say "hi"', "b": [1, 2]}
+
+
+def test_no_json_raises():
+    with pytest.raises(ValueError):
+        gen.parse_json_response("I'm sorry, I can't help with that.")
@@ -0,0 +1,62 @@
+import gen
+
+RESUME = """Jane Doe
+jane@example.com
+
+EXPERIENCE
+Senior Engineer at Acme, 2019-2024: led the payments platform rewrite.
+Engineer at Initech, 2015-2019: built the reporting pipeline.
+
+SKILLS
+Python, SQL, Kafka, Kubernetes
+
+EDUCATION
+BSc Computer Science, 2015
+
+HOBBIES
+Marathon running, chess, landscape photography and restoring old bicycles.
+Weekend sailing with the local club and volunteering at the food bank.
+
+REFERENCES
+References available upon request.
+"""
+
+
+def tokens(text):
+    return gen.estimate_tokens(text)
+
+
+def test_splits_on_headings_with_priorities():
+    sections = {heading: priority for heading, priority, _ in gen.split_sections(RESUME)}
+    assert sections == {"": 1, "EXPERIENCE": 3, "SKILLS": 3, "EDUCATION": 2, "HOBBIES": 0, "REFERENCES": 0}
+
+
+def test_collapses_whitespace_and_drops_boilerplate_and_repeats():
+    repeated = "Built the reporting pipeline for the finance team."
+    text = f"EXPERIENCE\n  Led   the    rewrite.\n{repeated}\n{repeated}\nEqual opportunity employer.\n"
+    compressed, before, after = gen.compress_document(text, budget=10_000)
+    assert compressed == f"EXPERIENCE\nLed the rewrite.\n{repeated}"
+    assert after < before
+
+
+def test_trims_low_priority_sections_first():
+    full, _, full_tokens = gen.compress_document(RESUME, budget=10_000)
+    hobbies = next(lines for heading, _, lines in gen.split_sections(full) if heading == "HOBBIES")
+    compressed, _, after = gen.compress_document(RESUME, budget=full_tokens - sum(tokens(line) for line in hobbies))
+    assert "Marathon running" not in compressed and "sailing" not in compressed
+    assert "payments platform rewrite" in compressed
+    assert "Python, SQL, Kafka, Kubernetes" in compressed
+    assert "BSc Computer Science" in compressed
+    assert after <= full_tokens
+
+
+def test_experience_and_skills_go_last():
+    compressed, _, after = gen.compress_document(RESUME, budget=45)
+    assert after <= 45
+    assert "SKILLS" in compressed and "EXPERIENCE" in compressed
+    assert "EDUCATION" not in compressed and "HOBBIES" not in compressed
+
+
+def test_fit_to_budget_leaves_call_sites_without_a_budget_alone():
+    assert gen.fit_to_budget(RESUME, "interview_turn", "resume") == RESUME
+    assert gen.fit_to_budget(RESUME, "advisor", "resume") == gen.compress_document(RESUME, gen.PROMPT_BUDGETS["advisor"]["resume"])[0]
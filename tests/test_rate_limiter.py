@@ -0,0 +1,46 @@
+import time
+
+import gen
+
+
+def test_reserve_waits_for_refill():
+    bucket = gen.TokenBucket(rate_per_minute=60)
+    assert bucket.reserve(60) == 0.0
+    assert abs(bucket.reserve(1) - 1.0) < 0.05
+
+
+def test_reserve_past_max_wait_takes_nothing():
+    bucket = gen.TokenBucket(rate_per_minute=60)
+    bucket.reserve(60)
+    assert bucket.reserve(1, max_wait=0.5) is None
+    assert bucket.reserve(1, max_wait=0.5) is None
+    assert abs(bucket.reserve(1) - 1.0) < 0.05
+
+
+def test_acquire_fails_fast_past_the_deadline():
+    limiter = gen.RateLimiter(requests_per_minute=6, tokens_per_minute=10**9)
+    for _ in range(6):
+        assert limiter.acquire(10, deadline=time.monotonic() + 1)
+    started = time.monotonic()
+    assert not limiter.acquire(10, deadline=time.monotonic() + 1)
+    assert time.monotonic() - started < 0.1
+    # The refused call reserved nothing from either bucket.
+    assert limiter.requests.tokens < 1 and limiter.tokens.tokens > 10**9 - 100
+
+
+def test_token_shortfall_returns_the_request_slot():
+    limiter = gen.RateLimiter(requests_per_minute=60, tokens_per_minute=600)
+    assert limiter.reserve(600) == 0.0
+    requests_left = limiter.requests.tokens
+    assert limiter.reserve(300, max_wait=1) is None
+    assert abs(limiter.requests.tokens - requests_left) < 0.1
+
+
+def test_model_call_that_would_wait_past_its_deadline_fails_at_once(monkeypatch):
+    limiter = gen.RateLimiter(requests_per_minute=1, tokens_per_minute=10**9)
+    limiter.acquire(1)
+    monkeypatch.setattr(gen, "get_rate_limiter", lambda: limiter)
+    monkeypatch.setitem(gen.CALL_DEADLINES, "interview_turn", 1.0)
+    started = time.monotonic()
+    assert gen.get_ai_response("Ask a question.", call_site="interview_turn") is None
+    assert time.monotonic() - started < 0.5
@@ -0,0 +1,73 @@
+import pytest
+
+import gen
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A settable `time.time()` so TTL and LRU order don't depend on the wall clock."""
+    now = [1000.0]
+    monkeypatch.setattr(gen.time, "time", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    return gen.ResponseCache(str(tmp_path / "responses.sqlite3"), max_entries=3)
+
+
+def test_round_trips_json_values(cache):
+    cache.set("key", {"answer": ["a", 1]}, ttl=60)
+    assert cache.get("key") == {"answer": ["a", 1]}
+    assert cache.get("other") is None
+    assert cache.stats() == {"hits": 1, "misses": 1, "entries": 1}
+
+
+def test_entries_expire_after_their_ttl(cache, clock):
+    cache.set("short", "soon gone", ttl=10)
+    cache.set("long", "still here", ttl=100)
+    clock[0] += 9
+    assert cache.get("short") == "soon gone"
+    clock[0] += 1
+    assert cache.get("short") is None
+    assert cache.get("long") == "still here"
+    assert cache.stats()["entries"] == 1
+
+
+def test_evicts_the_least_recently_used_entry(cache, clock):
+    for key in ("a", "b", "c"):
+        clock[0] += 1
+        cache.set(key, key, ttl=60)
+    clock[0] += 1
+    assert cache.get("a") == "a"
+    clock[0] += 1
+    cache.set("d", "d", ttl=60)
+    assert cache.get("b") is None
+    assert [cache.get(key) for key in ("a", "c", "d")] == ["a", "c", "d"]
+    assert cache.stats()["entries"] == 3
+
+
+def test_survives_a_reopen(tmp_path, clock):
+    path = str(tmp_path / "responses.sqlite3")
+    gen.ResponseCache(path).set("key", "kept", ttl=60)
+    assert gen.ResponseCache(path).get("key") == "kept"
+
+
+def test_cache_key_covers_every_input():
+    config = {"temperature": 0.2, "max_output_tokens": 512}
+    base = gen.make_cache_key("prompt", "model-a", False, config)
+    assert gen.make_cache_key("prompt", "model-a", False, dict(reversed(config.items()))) == base
+    variants = [
+        gen.make_cache_key("other prompt", "model-a", False, config),
+        gen.make_cache_key("prompt", "model-b", False, config),
+        gen.make_cache_key("prompt", "model-a", True, config),
+        gen.make_cache_key("prompt", "model-a", False, {**config, "temperature": 0.3}),
+    ]
+    assert len({base, *variants}) == 5
+
+
+def test_cache_key_accepts_generation_config_objects():
+    config = gen._default_generation_config(is_json=True)
+    assert gen.make_cache_key("prompt", "model-a", True, config) == gen.make_cache_key(
+        "prompt", "model-a", True, gen._config_to_dict(config)
+    )
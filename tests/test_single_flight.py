@@ -0,0 +1,84 @@
+import asyncio
+import threading
+
+import pytest
+
+import gen
+
+
+class Stop(BaseException):
+    pass
+
+
+def run_concurrently(flight, fn, followers=3):
+    """Start a leader inside `fn`, join `followers` callers while it runs, and collect each outcome."""
+    started, release = threading.Event(), threading.Event()
+    outcomes = []
+
+    def leader_fn():
+        started.set()
+        release.wait(5)
+        return fn()
+
+    def call(target):
+        try:
+            outcomes.append(("result", flight.do("key", target)))
+        except BaseException as e:
+            outcomes.append(("raised", e))
+
+    threads = [threading.Thread(target=call, args=(leader_fn,))]
+    threads[0].start()
+    assert started.wait(5)
+    threads += [threading.Thread(target=call, args=(pytest.fail,)) for _ in range(followers)]
+    for thread in threads[1:]:
+        thread.start()
+        thread.join(0.05)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    return outcomes
+
+
+def test_concurrent_callers_share_one_call():
+    calls = []
+    outcomes = run_concurrently(gen.SingleFlight(), lambda: calls.append(1) or "answer")
+    assert calls == [1]
+    assert outcomes == [("result", "answer")] * 4
+
+
+def test_followers_see_the_leaders_exception():
+    outcomes = run_concurrently(gen.SingleFlight(), lambda: 1 / 0)
+    assert len(outcomes) == 4
+    assert all(kind == "raised" and isinstance(error, ZeroDivisionError) for kind, error in outcomes)
+
+
+def test_followers_see_base_exceptions_instead_of_none():
+    def stop():
+        raise Stop()
+
+    outcomes = run_concurrently(gen.SingleFlight(), stop)
+    assert len(outcomes) == 4
+    assert all(kind == "raised" and isinstance(error, Stop) for kind, error in outcomes)
+
+
+def test_key_is_released_after_a_failure():
+    flight = gen.SingleFlight()
+    with pytest.raises(Stop):
+        flight.do("key", lambda: (_ for _ in ()).throw(Stop()))
+    assert flight.do("key", lambda: "retried") == "retried"
+
+
+def test_async_callers_share_one_task():
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "answer"
+
+    async def main():
+        flight = gen.AsyncSingleFlight()
+        return await asyncio.gather(*(flight.do("key", fetch) for _ in range(4)))
+
+    assert asyncio.run(main()) == ["answer"] * 4
+    assert calls == [1]
@@ -0,0 +1,30 @@
+import pytest
+
+import gen
+
+
+@pytest.fixture
+def index():
+    return gen.get_skill_index()
+
+
+def test_aliases_match_in_any_case(index):
+    assert index.extract("python, GOLANG, sklearn and C++") == ["Python", "Go", "scikit-learn", "C++"]
+
+
+def test_longest_alias_wins(index):
+    assert index.extract("React Native and React apps") == ["React Native", "React"]
+
+
+@pytest.mark.parametrize("text", ["I go hiking", "excel at details", "led R&D", "a Go-to-market plan", "spark joy"])
+def test_ambiguous_aliases_need_their_exact_spelling(index, text):
+    assert index.extract(text) == []
+
+
+def test_ambiguous_aliases_match_as_spelled(index):
+    assert index.extract("Services in Go and R, reports in Excel") == ["Go", "R", "Excel"]
+
+
+def test_skills_list_entries_match_in_any_case(index):
+    profile = {"skills": ["go", "excel", "Python"], "resume_text": "I go the extra mile."}
+    assert index.profile_skills(profile) == {"Go", "Excel", "Python"}
@@ -0,0 +1,80 @@
+import pytest
+
+import gen
+
+
+def message(i):
+    return {"role": "user" if i % 2 else "model", "content": f"message {i}"}
+
+
+@pytest.fixture
+def transcript(monkeypatch):
+    """
+    20 items: item 0 pinned, items 1-16 spilled in four chunks of four, items 17-19 in memory.
+    Disk reads are recorded in `transcript.reads`.
+    """
+    monkeypatch.setattr(gen.SpillingList, "KEEP_IN_MEMORY", 3)
+    items = gen.SpillingList("test_transcript", [message(i) for i in range(4)])
+    for _ in range(4):
+        for _ in range(4):
+            items.append(message(len(items)))
+        assert items.spill_coldest()
+    reads = []
+    read = items._read
+    monkeypatch.setattr(items, "_read", lambda name: reads.append(name) or read(name))
+    items.reads = reads
+    return items
+
+
+def test_spills_all_but_the_pinned_and_recent_items(transcript):
+    assert len(transcript) == 20
+    assert transcript.entry_counts() == (4, 16)
+    assert not transcript.spillable()
+    assert transcript.spill_coldest() == 0
+
+
+def test_pinned_and_recent_items_do_not_touch_disk(transcript):
+    assert transcript[0] == message(0)
+    assert transcript[-1] == message(19)
+    assert transcript[17:] == [message(i) for i in range(17, 20)]
+    assert transcript[-3:] == [message(i) for i in range(17, 20)]
+    assert transcript.reads == []
+
+
+def test_reads_only_the_chunks_in_range(transcript):
+    assert transcript[10] == message(10)
+    assert transcript.reads == [2]
+    transcript.reads.clear()
+    assert transcript[6:14] == [message(i) for i in range(6, 14)]
+    assert transcript.reads == [1, 2, 3]
+
+
+def test_full_reads_match_a_plain_list(transcript):
+    expected = [message(i) for i in range(20)]
+    assert list(transcript) == expected
+    assert transcript[::-3] == expected[::-3]
+    assert transcript[1:] == expected[1:]
+    assert transcript[-20] == expected[0]
+    with pytest.raises(IndexError):
+        transcript[20]
+    with pytest.raises(IndexError):
+        transcript[-21]
+
+
+def test_byte_counts_follow_spills():
+    items = gen.SpillingList("test_bytes", [message(i) for i in range(3)])
+    total = items.bytes
+    for i in range(3, 40):
+        items.append(message(i))
+    assert items.bytes > total
+    before = items.bytes
+    freed = items.spill_coldest()
+    assert freed > 0
+    assert items.bytes == before - freed
+    assert items.spilled_bytes > 0
+    assert len(items) == 40 and items[0] == message(0)
+
+
+def test_keeps_enough_items_for_an_interview_turn():
+    assert gen.SpillingList.KEEP_IN_MEMORY >= gen.INTERVIEW_VERBATIM_MESSAGES
+    assert gen.SpillingList.KEEP_IN_MEMORY >= gen.INTERVIEW_VISIBLE_MESSAGES